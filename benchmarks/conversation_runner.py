@@ -0,0 +1,220 @@
+"""
+BicameralAGI Batch Conversation Runner
+======================================
+
+Overview:
+---------
+This script replays scripted conversations through BicaCharacter in parallel, for regression evals and capacity
+planning. Every input line holds a character description and the user turns of one conversation. Conversations run
+concurrently on a thread or process pool (the turns of one conversation stay in order), responses are written to an
+output JSONL as conversations finish, and a throughput report is printed at the end:
+
+- turns/sec over the whole run, and turn latency percentiles
+- p50/p95/max latency per stage of BicaCharacter.process_input (from the tracing spans)
+- LLM calls per turn, counting every GPTHandler call made for the turn, including its background memory update
+
+Input format (one conversation per line; "id" is optional and defaults to the line number):
+    {"id": "knight-1", "description": "A brave knight from the future.", "turns": ["Hi!", "What is your mission?"]}
+
+Output format (one line per conversation, in completion order):
+    {"id": "knight-1", "character_name": "...", "turns": [{"user": "...", "response": "...", "latency_ms": 812.4,
+     "llm_calls": 7}, ...]}
+
+Usage:
+------
+Run from the project root (the bica package and its sources root must be importable):
+
+    $ PYTHONPATH=.:bica python -m benchmarks.conversation_runner conversations.jsonl --output responses.jsonl
+    $ PYTHONPATH=.:bica python -m benchmarks.conversation_runner conversations.jsonl --workers 16 --executor process \\
+          --report report.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from bica.utils.tracing import tracer
+
+TRACE_BUFFER_SIZE = 1_000_000
+
+
+def load_conversations(file_path: str) -> List[Dict[str, Any]]:
+    conversations = []
+    with open(file_path, 'r', encoding='utf-8') as input_file:
+        for line_number, line in enumerate(input_file, start=1):
+            if not line.strip():
+                continue
+            conversation = json.loads(line)
+            if "description" not in conversation or not isinstance(conversation.get("turns"), list):
+                raise ValueError(f"Line {line_number}: expected 'description' and a 'turns' list")
+            conversation.setdefault("id", line_number)
+            conversations.append(conversation)
+    return conversations
+
+
+def _default_character_factory(description: str, debug_mode: bool):
+    from bica.core.character import BicaCharacter
+    return BicaCharacter(description, debug_mode)
+
+
+def run_conversation(conversation: Dict[str, Any], debug_mode: bool = False,
+                     character_factory: Callable = _default_character_factory) -> Dict[str, Any]:
+    """
+    Replay one conversation. Each turn runs inside a "batch.turn" span, so every span of the turn (stages, GPT calls,
+    the background memory update) shares that span's trace id, which is stored with the turn.
+    """
+    result = {"id": conversation["id"], "turns": []}
+    character = None
+    try:
+        with tracer.span("batch.character_init"):
+            character = character_factory(conversation["description"], debug_mode)
+        result["character_name"] = character.character_name
+        for user_input in conversation["turns"]:
+            start = time.perf_counter()
+            with tracer.span("batch.turn") as span:
+                response = character.process_input(user_input)
+            result["turns"].append({"user": user_input, "response": response,
+                                    "latency_ms": (time.perf_counter() - start) * 1000,
+                                    "trace_id": getattr(span, "trace_id", None)})
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {str(e)}"
+    finally:
+        if character is not None:
+            character.shutdown()  # Drains the background memory update so its GPT call is counted
+    return result
+
+
+def _init_process_worker():
+    tracer.enable(buffer_size=TRACE_BUFFER_SIZE)
+
+
+def _run_conversation_in_process(conversation: Dict[str, Any], debug_mode: bool) -> Dict[str, Any]:
+    # A process worker runs one conversation at a time, so its whole buffer belongs to this conversation.
+    # Trace ids are only unique per process and are prefixed with the pid.
+    result = run_conversation(conversation, debug_mode)
+    pid = os.getpid()
+    for turn in result["turns"]:
+        turn["trace_id"] = f"{pid}:{turn['trace_id']}"
+    result["spans"] = [{"name": span.name, "duration_ms": span.duration_ms, "trace_id": f"{pid}:{span.trace_id}"}
+                       for span in tracer.spans()]
+    tracer.clear()
+    return result
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    return {"count": len(values), "p50_ms": float(np.percentile(values, 50)),
+            "p95_ms": float(np.percentile(values, 95)), "p99_ms": float(np.percentile(values, 99)),
+            "max_ms": float(max(values))}
+
+
+def build_report(results: List[Dict[str, Any]], spans: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    llm_calls_by_trace: Dict[Any, int] = {}
+    stage_durations: Dict[str, List[float]] = {}
+    for span in spans:
+        if span["name"] == "gpt.generate_response":
+            llm_calls_by_trace[span["trace_id"]] = llm_calls_by_trace.get(span["trace_id"], 0) + 1
+        elif span["name"].startswith(("stage.", "background.")) or span["name"] in ("turn", "batch.character_init"):
+            stage_durations.setdefault(span["name"], []).append(span["duration_ms"])
+
+    turns = [turn for result in results for turn in result["turns"]]
+    llm_calls = []
+    for turn in turns:
+        turn["llm_calls"] = llm_calls_by_trace.get(turn.pop("trace_id", None), 0)
+        llm_calls.append(turn["llm_calls"])
+
+    return {
+        "conversations": len(results),
+        "failed_conversations": sum(1 for result in results if "error" in result),
+        "turns": len(turns),
+        "wall_seconds": wall_seconds,
+        "turns_per_second": len(turns) / wall_seconds if wall_seconds > 0 else 0.0,
+        "turn_latency": percentiles([turn["latency_ms"] for turn in turns]),
+        "stage_latency": {name: percentiles(values) for name, values in sorted(stage_durations.items())},
+        "llm_calls_per_turn": {
+            "mean": float(np.mean(llm_calls)) if llm_calls else 0.0,
+            "p95": float(np.percentile(llm_calls, 95)) if llm_calls else 0.0,
+            "max": max(llm_calls) if llm_calls else 0,
+        },
+    }
+
+
+def run_batch(conversations: List[Dict[str, Any]], workers: int = 8, executor_kind: str = "thread",
+              output_path: Optional[str] = None, debug_mode: bool = False,
+              character_factory: Callable = _default_character_factory) -> Dict[str, Any]:
+    """Run all conversations and return the throughput report; responses are streamed to `output_path`."""
+    results, spans = [], []
+    output_file = open(output_path, 'w', encoding='utf-8') if output_path else None
+    start = time.perf_counter()
+    try:
+        if executor_kind == "process":
+            # Characters are built inside the workers, so only the default factory can be used here
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_process_worker)
+            futures = [pool.submit(_run_conversation_in_process, conversation, debug_mode)
+                       for conversation in conversations]
+        else:
+            tracer.enable(buffer_size=TRACE_BUFFER_SIZE)
+            tracer.clear()
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bica-batch")
+            futures = [pool.submit(run_conversation, conversation, debug_mode, character_factory)
+                       for conversation in conversations]
+
+        with pool:
+            for done, future in enumerate(as_completed(futures), start=1):
+                result = future.result()
+                spans.extend(result.pop("spans", []))
+                results.append(result)
+                if output_file:
+                    record = {**result, "turns": [{k: v for k, v in turn.items() if k != "trace_id"}
+                                                  for turn in result["turns"]]}
+                    output_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    output_file.flush()
+                print(f"[{done}/{len(conversations)}] conversation {result['id']}: {len(result['turns'])} turns"
+                      f"{' (error: ' + result['error'] + ')' if 'error' in result else ''}", file=sys.stderr)
+        wall_seconds = time.perf_counter() - start
+
+        if executor_kind != "process":
+            spans = [{"name": span.name, "duration_ms": span.duration_ms, "trace_id": span.trace_id}
+                     for span in tracer.spans()]
+    finally:
+        if output_file:
+            output_file.close()
+
+    return build_report(results, spans, wall_seconds)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay scripted conversations through BicaCharacter in parallel")
+    parser.add_argument("input", help="JSONL file with one {description, turns} conversation per line")
+    parser.add_argument("--output", default=None, help="JSONL file for the responses")
+    parser.add_argument("--report", default=None, help="Write the throughput report here instead of stdout")
+    parser.add_argument("--workers", type=int, default=8, help="Conversations running concurrently")
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    parser.add_argument("--limit", type=int, default=None, help="Only run the first N conversations")
+    parser.add_argument("--debug", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    conversations = load_conversations(args.input)[:args.limit]
+    report = run_batch(conversations, workers=args.workers, executor_kind=args.executor,
+                       output_path=args.output, debug_mode=args.debug)
+    report["config"] = {k: v for k, v in vars(args).items() if k not in ("output", "report")}
+
+    if args.report:
+        with open(args.report, 'w') as report_file:
+            json.dump(report, report_file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+BicameralAGI Memory Retrieval Benchmark
+=======================================
+
+Overview:
+---------
+This script measures how the memory retrieval strategies of BicaMemory behave as the memory store grows. It generates
+synthetic memory corpora with planted relevant items, runs every retrieval path over the same queries and reports
+recall@k, p50/p95 query latency, index build time and memory footprint as JSON.
+
+Every query has three planted memories:
+- a "keyword" memory that names the queried entity but sits far away in embedding space
+- a "semantic" memory that never names the entity but sits close to the query embedding
+- a "both" memory that names the entity and is close in embedding space
+
+Embeddings are synthetic (clustered random vectors), so no sentence-transformer model is needed and million-entry
+corpora can be generated in seconds.
+
+Retrieval paths:
+----------------
+- llm_index_picking: BicaMemory.get_relevant_long_term_memories with a stub GPT handler that picks by word overlap
+- exact_vector:      VectorIndex (float32 brute force)
+- ann_binary:        QuantizedVectorIndex in binary mode with exact re-scoring
+- ann_int8:          QuantizedVectorIndex in int8 mode with exact re-scoring
+- bm25:              BM25Index
+- hybrid:            reciprocal-rank fusion of bm25 and exact_vector
+
+Usage:
+------
+Run from the project root (the bica package and its sources root must be importable):
+
+    $ PYTHONPATH=.:bica python -m benchmarks.memory_retrieval --sizes 1000 10000 100000 --output bench.json
+    $ PYTHONPATH=.:bica python -m benchmarks.memory_retrieval --sizes 1000000 --paths exact_vector ann_binary bm25
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from bica.core.memory import BicaMemory, Memory
+from bica.core.memory_search import (BM25Index, QuantizedVectorIndex, VectorIndex, reciprocal_rank_fusion,
+                                     tokenize)
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "to", "vi", "za", "qu", "ber", "dan", "fel", "gor", "hil", "jun"]
+ATTRIBUTES = ["favorite color", "secret code", "home town", "pet name", "birthday", "lucky number"]
+PATHS = ["llm_index_picking", "exact_vector", "ann_binary", "ann_int8", "bm25", "hybrid"]
+
+
+class SyntheticCorpus:
+    def __init__(self, size: int, num_queries: int, dimension: int, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        vocabulary = self._make_vocabulary(rng, 5000)
+        word_probabilities = 1.0 / np.arange(1, len(vocabulary) + 1)
+        word_probabilities /= word_probabilities.sum()
+
+        num_planted = 3 * num_queries
+        if size <= num_planted:
+            raise ValueError(f"Corpus size {size} is too small for {num_queries} queries")
+
+        # Background memories: Zipf-distributed words and clustered embeddings
+        lengths = rng.integers(8, 17, size - num_planted)
+        words = rng.choice(len(vocabulary), size=int(lengths.sum()), p=word_probabilities)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        self.texts = [" ".join(vocabulary[w] for w in words[offsets[i]:offsets[i + 1]]) for i in range(len(lengths))]
+        centers = rng.normal(size=(256, dimension)).astype(np.float32)
+        background = centers[rng.integers(0, len(centers), len(self.texts))]
+        background += rng.normal(scale=1.0, size=background.shape).astype(np.float32)
+
+        # Queries and their planted memories
+        self.queries: List[str] = []
+        self.query_vectors = self._normalize(rng.normal(size=(num_queries, dimension)).astype(np.float32))
+        self.relevant: List[set] = []
+        planted_vectors = []
+        for query_id in range(num_queries):
+            entity = f"{vocabulary[rng.integers(len(vocabulary))]}{query_id}x"
+            attribute = ATTRIBUTES[query_id % len(ATTRIBUTES)]
+            value = int(rng.integers(1000, 9999))
+            self.queries.append(f"What is the {attribute} of {entity}?")
+            query_vector = self.query_vectors[query_id]
+            far = rng.normal(size=dimension).astype(np.float32)
+            near = [query_vector * 2.0 + rng.normal(scale=0.05, size=dimension).astype(np.float32) for _ in range(2)]
+            planted = [
+                (f"User: remember that the {attribute} of {entity} is {value}", far),
+                (f"User: it is {value}, the one we talked about before", near[0]),
+                (f"User: {entity} told me the {attribute} is {value}", near[1]),
+            ]
+            ids = set()
+            for text, vector in planted:
+                ids.add(len(self.texts))
+                self.texts.append(text)
+                planted_vectors.append(vector)
+            self.relevant.append(ids)
+
+        self.vectors = self._normalize(np.vstack([background, np.array(planted_vectors, dtype=np.float32)]))
+
+    @staticmethod
+    def _make_vocabulary(rng, size: int) -> List[str]:
+        vocabulary = set()
+        while len(vocabulary) < size:
+            vocabulary.add("".join(rng.choice(SYLLABLES, size=rng.integers(2, 5))))
+        return sorted(vocabulary)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+class StubLLMHandler:
+    """Stands in for GPTHandler when picking memory indices: scores every listed memory by word overlap."""
+
+    def __init__(self, texts: List[str], latency: float = 0.0):
+        self.token_sets = [set(tokenize(text)) for text in texts]
+        self.latency = latency
+        self.calls = 0
+
+    def generate_response(self, prompt: str, **kwargs) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        context = prompt.split("Given the current context:", 1)[1].split("Analyze the following", 1)[0]
+        query_tokens = set(re.findall(r'\w+', context.lower())) - {"working", "memory", "short", "term", "user"}
+        overlaps = np.array([len(query_tokens & tokens) for tokens in self.token_sets])
+        return ", ".join(str(i) for i in np.argsort(-overlaps, kind='stable')[:5])
+
+
+class StubProfile:
+    character_name = "Benchmark"
+    character_summary = "A character used to benchmark memory retrieval."
+
+
+def build_path(path: str, corpus: SyntheticCorpus, args) -> Callable[[int, int], List[int]]:
+    """Build the index for one retrieval path and return a search function (query_id, top_k) -> memory ids."""
+    if path == "llm_index_picking":
+        handler = StubLLMHandler(corpus.texts, latency=args.llm_latency)
+        memory = BicaMemory(StubProfile(), debug_mode=False, gpt_handler=handler)
+        memory.long_term_memory = [Memory(text, importance=0.5) for text in corpus.texts]
+        positions = {m.memory_id: i for i, m in enumerate(memory.long_term_memory)}
+
+        def search(query_id, top_k):
+            memory.short_term_memory = [Memory(corpus.queries[query_id], importance=0.5)]
+            return [positions[m.memory_id] for m in memory.get_relevant_long_term_memories()]
+        return search
+
+    if path in ("exact_vector", "ann_binary", "ann_int8", "hybrid"):
+        if path in ("ann_binary", "ann_int8"):
+            mode = path.split("_")[1]
+            float_store_path = None
+            if args.float_store_dir:
+                float_store_path = os.path.join(args.float_store_dir, f"{mode}_{len(corpus.texts)}.f32")
+            vector_index = QuantizedVectorIndex(mode, rescore_multiplier=args.rescore_multiplier,
+                                                float_store_path=float_store_path)
+        else:
+            vector_index = VectorIndex(initial_capacity=len(corpus.texts))
+        vector_index.add_batch(range(len(corpus.texts)), corpus.vectors)
+
+    if path in ("bm25", "hybrid"):
+        keyword_index = BM25Index()
+        for doc_id, text in enumerate(corpus.texts):
+            keyword_index.add(doc_id, text)
+
+    if path == "bm25":
+        return lambda query_id, top_k: [i for i, _ in keyword_index.search(corpus.queries[query_id], top_k)]
+    if path == "hybrid":
+        def search(query_id, top_k):
+            rankings = [keyword_index.search(corpus.queries[query_id], top_k * 4),
+                        vector_index.search(corpus.query_vectors[query_id], top_k * 4)]
+            return [i for i, _ in reciprocal_rank_fusion(rankings, top_k)]
+        return search
+    if path in ("exact_vector", "ann_binary", "ann_int8"):
+        return lambda query_id, top_k: [i for i, _ in vector_index.search(corpus.query_vectors[query_id], top_k)]
+    raise ValueError(f"Unknown retrieval path: {path}")
+
+
+def run_path(path: str, corpus: SyntheticCorpus, args) -> Dict[str, Any]:
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    search = build_path(path, corpus, args)
+    build_seconds = time.perf_counter() - start
+    memory_bytes = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    latencies, recalls = [], []
+    for query_id, relevant in enumerate(corpus.relevant):
+        start = time.perf_counter()
+        hits = search(query_id, args.top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(relevant & set(hits)) / len(relevant))
+
+    return {
+        "size": len(corpus.texts),
+        "path": path,
+        f"recall_at_{args.top_k}": round(float(np.mean(recalls)), 4),
+        "latency_ms": {"p50": round(float(np.percentile(latencies, 50)), 4),
+                       "p95": round(float(np.percentile(latencies, 95)), 4)},
+        "build_seconds": round(build_seconds, 4),
+        "memory_bytes": int(memory_bytes),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark BicaMemory retrieval strategies on synthetic corpora.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--paths", nargs="+", choices=PATHS, default=PATHS)
+    parser.add_argument("--queries", type=int, default=100, help="Number of queries (3 planted memories each)")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--rescore-multiplier", type=int, default=10)
+    parser.add_argument("--float-store-dir", help="Directory for the memmapped float32 vectors of the ann paths "
+                                                      "(default: temporary files); memory_bytes only counts the "
+                                                      "quantized codes either way")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated seconds per stub LLM call")
+    parser.add_argument("--llm-max-size", type=int, default=10000,
+                        help="Skip llm_index_picking above this size (the prompt would not fit a context window)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = []
+    for size in args.sizes:
+        start = time.perf_counter()
+        corpus = SyntheticCorpus(size, args.queries, args.dimension, args.seed)
+        print(f"Generated corpus of {size} memories in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        for path in args.paths:
+            if path == "llm_index_picking" and size > args.llm_max_size:
+                results.append({"size": size, "path": path, "skipped": "size above --llm-max-size"})
+                continue
+            result = run_path(path, corpus, args)
+            print(f"  {path:18s} {json.dumps(result)}", file=sys.stderr)
+            results.append(result)
+
+    report = {"config": {k: v for k, v in vars(args).items() if k != "output"}, "results": results}
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
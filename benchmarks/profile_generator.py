@@ -0,0 +1,226 @@
+"""
+BicameralAGI Bulk Profile Generator
+===================================
+
+Overview:
+---------
+This script pre-provisions character profiles in bulk through BicaProfile. Characters are generated concurrently on a
+bounded thread pool. Each BicaProfile already issues its two pattern calls in parallel, so up to 2 x workers LLM
+calls are in flight. Only `workers` x 2 characters are queued at a time, so catalogs of any size run in constant
+memory. A throughput report is printed at the end.
+
+- Dedupe: characters whose summary (or description) is identical after normalization are generated once; the
+  others are reported as duplicates of the first
+- Checkpoint / resume: every finished character is appended to a JSONL checkpoint, and a restarted run skips the
+  characters (and summaries) that are already done. A torn line from a crash is skipped
+- Report: profiles/sec, per-profile latency percentiles and LLM calls per profile (from the tracing spans)
+
+Input format (one character per line; "id" defaults to the line number). Lines with a name and summary are used as
+they are, lines with only a description have their name and summary resolved first (through the definition cache):
+    {"id": "knight-1", "name": "Sir Chronos", "summary": "You are Sir Chronos, a knight from the future."}
+    {"id": "pirate-7", "description": "A cheerful space pirate who collects rare teas."}
+A plain text file (not .jsonl) is read as one description per line.
+
+Usage:
+------
+Run from the project root (the bica package and its sources root must be importable):
+
+    $ PYTHONPATH=.:bica python -m benchmarks.profile_generator characters.jsonl --workers 16
+    $ PYTHONPATH=.:bica python -m benchmarks.profile_generator characters.jsonl --db data/characters/characters.db \\
+          --checkpoint catalog.checkpoint.jsonl --report report.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from benchmarks.conversation_runner import TRACE_BUFFER_SIZE, percentiles
+from bica.core.definition_cache import description_key, get_definition_cache
+from bica.utils.jsonl_log import end_with_newline, read_jsonl
+from bica.utils.tracing import tracer
+
+
+def load_characters(file_path: str) -> Iterator[Dict[str, Any]]:
+    """Yield {id, name?, summary?, description?} entries without reading the whole file into memory."""
+    as_jsonl = file_path.endswith(".jsonl")
+    with open(file_path, 'r', encoding='utf-8') as input_file:
+        for line_number, line in enumerate(input_file, start=1):
+            if not line.strip():
+                continue
+            entry = json.loads(line) if as_jsonl else {"description": line.strip()}
+            if not entry.get("description") and not (entry.get("name") and entry.get("summary")):
+                raise ValueError(f"Line {line_number}: expected a 'description' or a 'name' and 'summary'")
+            entry.setdefault("id", line_number)
+            yield entry
+
+
+def dedupe_key(entry: Dict[str, Any]) -> str:
+    return description_key(entry.get("summary") or entry["description"])
+
+
+class Checkpoint:
+    """Append-only JSONL record of finished characters, flushed and fsynced per line."""
+
+    def __init__(self, file_path: Optional[str]):
+        self.file_path = file_path
+        self.done: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if file_path:
+            # A torn line from a crashed run is skipped, and the records after it still count
+            for record in read_jsonl(file_path):
+                if record.get("status") == "ok":
+                    self.done[record["key"]] = record
+            end_with_newline(file_path)
+        self._file = open(file_path, 'a', encoding='utf-8') if file_path else None
+
+    def record(self, record: Dict[str, Any]):
+        with self._lock:
+            if record.get("status") == "ok":
+                self.done[record["key"]] = record
+            if self._file:
+                self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+def _default_profile_factory(name: str, summary: str, gpt_handler, store):
+    from bica.core.profile import BicaProfile
+    return BicaProfile(name, summary, gpt_handler, store=store)
+
+
+def generate_profile(entry: Dict[str, Any], gpt_handler, store=None,
+                     profile_factory: Callable = _default_profile_factory) -> Dict[str, Any]:
+    """Resolve the character definition if needed and create its profile, inside one "bulk.profile" span."""
+    from bica.core.character import resolve_character_definition
+
+    record = {"id": entry["id"], "key": dedupe_key(entry)}
+    start = time.perf_counter()
+    with tracer.span("bulk.profile") as span:
+        try:
+            name, summary = entry.get("name"), entry.get("summary")
+            if not (name and summary):
+                definition = get_definition_cache().get(entry["description"]) or \
+                    resolve_character_definition(entry["description"], gpt_handler)
+                if not definition:
+                    raise ValueError("Could not resolve the character definition")
+                name, summary = definition["name"], definition["summary"]
+            profile = profile_factory(name, summary, gpt_handler, store)
+            record.update(status="ok", name=profile.character_name)
+        except Exception as e:
+            record.update(status="error", error=f"{type(e).__name__}: {str(e)}")
+    record["latency_ms"] = (time.perf_counter() - start) * 1000
+    record["trace_id"] = getattr(span, "trace_id", None)
+    return record
+
+
+def run_bulk(entries, workers: int = 8, checkpoint_path: Optional[str] = None, store=None, gpt_handler=None,
+             profile_factory: Callable = _default_profile_factory) -> Dict[str, Any]:
+    """Generate all profiles and return the throughput report."""
+    if gpt_handler is None:
+        from bica.external.gpt_handler import GPTHandler
+        gpt_handler = GPTHandler()
+    tracer.enable(buffer_size=TRACE_BUFFER_SIZE)
+    tracer.clear()
+
+    checkpoint = Checkpoint(checkpoint_path)
+    counts = {"resumed": 0, "duplicates": 0}
+    records: List[Dict[str, Any]] = []
+    in_flight_keys = set()
+    max_pending = max(workers * 2, 1)
+    start = time.perf_counter()
+
+    def collect(done_futures):
+        for future in done_futures:
+            record = future.result()
+            in_flight_keys.discard(record["key"])
+            checkpoint.record({k: v for k, v in record.items() if k != "trace_id"})
+            records.append(record)
+            print(f"[{len(records)}] {record['id']}: {record['status']}"
+                  f"{' (' + record['error'] + ')' if 'error' in record else ''}", file=sys.stderr)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bica-bulk") as pool:
+            pending = set()
+            for entry in entries:
+                key = dedupe_key(entry)
+                if key in checkpoint.done:
+                    counts["resumed" if checkpoint.done[key]["id"] == entry["id"] else "duplicates"] += 1
+                    continue
+                if key in in_flight_keys:
+                    counts["duplicates"] += 1
+                    continue
+                in_flight_keys.add(key)
+                pending.add(pool.submit(generate_profile, entry, gpt_handler, store, profile_factory))
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+            collect(wait(pending)[0])
+    finally:
+        checkpoint.close()
+    wall_seconds = time.perf_counter() - start
+
+    llm_calls_by_trace: Dict[Any, int] = {}
+    for span in tracer.spans():
+        if span.name == "gpt.generate_response":
+            llm_calls_by_trace[span.trace_id] = llm_calls_by_trace.get(span.trace_id, 0) + 1
+    created = [record for record in records if record["status"] == "ok"]
+    llm_calls = [llm_calls_by_trace.get(record["trace_id"], 0) for record in created]
+    return {
+        "created": len(created),
+        "failed": len(records) - len(created),
+        "resumed": counts["resumed"],
+        "duplicates": counts["duplicates"],
+        "wall_seconds": wall_seconds,
+        "profiles_per_second": len(created) / wall_seconds if wall_seconds > 0 else 0.0,
+        "profile_latency": percentiles([record["latency_ms"] for record in created]),
+        "llm_calls": sum(llm_calls),
+        "llm_calls_per_profile": sum(llm_calls) / len(llm_calls) if llm_calls else 0.0,
+        "errors": [{"id": record["id"], "error": record["error"]} for record in records if "error" in record][:20],
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate character profiles in bulk through BicaProfile")
+    parser.add_argument("input", help="JSONL file of {name, summary} or {description} entries, or a text file with "
+                                      "one description per line")
+    parser.add_argument("--workers", type=int, default=8, help="Characters generated concurrently")
+    parser.add_argument("--checkpoint", default=None,
+                        help="Checkpoint file for resuming (default: <input>.checkpoint.jsonl)")
+    parser.add_argument("--db", default=None, help="Write profiles to this BicaCharacterStore database instead of "
+                                                   "the per-character JSON files")
+    parser.add_argument("--report", default=None, help="Write the throughput report here instead of stdout")
+    parser.add_argument("--limit", type=int, default=None, help="Only read the first N characters")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from itertools import islice
+
+    args = parse_args(argv)
+    store = None
+    if args.db:
+        from bica.core.character_store import BicaCharacterStore
+        store = BicaCharacterStore(args.db)
+    entries = islice(load_characters(args.input), args.limit)
+    report = run_bulk(entries, workers=args.workers, store=store,
+                      checkpoint_path=args.checkpoint or f"{args.input}.checkpoint.jsonl")
+    report["config"] = {k: v for k, v in vars(args).items() if k != "report"}
+
+    if args.report:
+        with open(args.report, 'w') as report_file:
+            json.dump(report, report_file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
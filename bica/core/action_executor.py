@@ -30,6 +30,10 @@ class BicaActionExecutor:
         :param compiled_data:
         :return:
         """
+        # Pre-built chat messages (see BicaPromptBuilder) are sent as they are
+        if context and "messages" in context:
+            return self.gpt_handler.generate_response({"messages": context["messages"]})
+
         if compiled_data is None:
             compiled_data = context.get("compiled_data", {}) if context else {}
 
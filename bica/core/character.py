@@ -15,6 +15,10 @@ Current Features:
 2. **Context Management**: Tracks and updates conversation context for more informed responses.
 3. **Prompt Compilation**: Constructs dynamic prompts based on the current system state (context, user input, etc.).
 4. **Action Execution**: Handles executing responses based on user input and the processed context.
+5. **Turn Scheduling**: Runs the stages of a turn as a dependency graph so independent stages overlap.
+6. **Prompt Budgeting**: Packs the turn data of the response prompt into a fixed token budget.
+7. **Latency Budget**: Degrades optional stages (destiny influence, destiny, long-term recall, context) to stay
+   within a per-turn time budget and reports which stages were degraded.
 
 Usage Example:
 --------------
@@ -27,7 +31,10 @@ Author:
 Alan Hourmand
 Date: 10/2/2024
 """
+import contextvars
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from bica.core.action_executor import BicaActionExecutor
 from bica.core.context import BicaContext
@@ -36,32 +43,161 @@ from bica.core.profile import BicaProfile
 from bica.core.memory import BicaMemory
 from bica.core.destiny import BicaDestiny
 from bica.core.subconcious import BicaSubconscious
+from bica.core.prompt_builder import BicaPromptBuilder
+from bica.core.context_packer import BicaContextPacker
+from bica.core.definition_cache import get_definition_cache
+from bica.utils.stage_graph import BicaStageGraph
+from bica.utils.tracing import tracer
+from bica.utils.work_queue import BicaWorkQueue
 from bica.utils.utilities import *
 
+# Seconds each stage of a conversation turn may take; None means no limit
+DEFAULT_STAGE_TIMEOUTS = {
+    "recall": None,
+    "context": None,
+    "destiny_influence": 20.0,
+    "destiny": 20.0,
+    "respond": None,
+}
+
+# Optional work given up, in this order, when a turn risks exceeding its time budget:
+# skip destiny influence, fall back to the context destiny, rank long-term memories locally, reuse the last contexts
+DEGRADATION_ORDER = ["destiny_influence", "destiny", "recall", "context"]
+DEGRADATION_MODES = {"destiny_influence": "skipped", "destiny": "default", "recall": "local", "context": "reused"}
+# Share of the budget kept for the response while no respond timing is known yet
+RESPOND_RESERVE_FRACTION = 0.5
+# Smoothing of the per-stage duration estimates, and how fast the estimate of a degraded stage decays so it is retried
+STAGE_ESTIMATE_ALPHA = 0.3
+DEGRADED_ESTIMATE_DECAY = 0.8
+
+# Largest change of any viewpoint weight for which a speculative draft built on the previous context is kept
+DEFAULT_SPECULATION_THRESHOLD = 0.05
+
+# Estimated tokens the volatile turn data of the response prompt may use (the cached static prefix is not counted)
+DEFAULT_PROMPT_TOKEN_BUDGET = 1500
+
+
+def resolve_character_definition(character_description: str, gpt_handler: GPTHandler):
+    """
+    Ask GPT for the {"name", "summary"} of the character a description refers to (a name is generated if none is
+    given) and store it in the definition cache. Returns None if the reply cannot be parsed.
+    """
+    prompt = f"""
+    Based on the following short description, try to figure out what character the user is referring to. If a name is not provided, generate one that best fits the description.
+    
+    Also if the description the user gives you seems like traits, just make up a character that best fits the traits.
+
+    Description: {character_description}
+
+    Respond in the format:
+    {{
+        "name": "Character's name",
+        "summary": "You are {{name}}, [brief character summary]."
+    }}
+    """
+
+    # Generate the response using GPT
+    response = gpt_handler.generate_response(prompt)
+    try:
+        # Remove the backticks if present around the JSON
+        cleaned_response = response.strip("```json").strip("```").strip()
+
+        # Parse the cleaned JSON response
+        character_info = json.loads(cleaned_response)
+    except json.JSONDecodeError:
+        # Fallback if GPT response is not in proper JSON format
+        print("Error: Could not parse the character definition from the AI response.")
+        print(f"Fallback raw response: {response}")  # Debugging the raw response
+        return None
+
+    # Extract the name and summary from the response
+    name = character_info.get("name", "Unknown Character")
+    definition = {"name": name, "summary": character_info.get("summary", f"You are {name}, a mysterious figure.")}
+    get_definition_cache().put(character_description, definition)
+    return definition
+
+
+class _LazyComponent:
+    """A character component built by `factory(character)` on first access (thread safe) and assignable."""
+
+    def __init__(self, factory):
+        self.factory = factory
+
+    def __set_name__(self, owner, name):
+        self.attribute = f"_{name}"
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        component = instance.__dict__.get(self.attribute)
+        if component is None:
+            with instance._component_lock:
+                component = instance.__dict__.get(self.attribute)
+                if component is None:
+                    component = self.factory(instance)
+                    instance.__dict__[self.attribute] = component
+        return component
+
+    def __set__(self, instance, component):
+        instance.__dict__[self.attribute] = component
+
 
 class BicaCharacter:
-    def __init__(self, character_description: str, debug_mode: bool):
+    # Cognitive components are built on first use, so a character for a known description is ready in milliseconds
+    profile = _LazyComponent(lambda self: BicaProfile(self.character_name, self.character_summary, self.gpt_handler,
+                                                      store=self.character_store))
+    memory = _LazyComponent(lambda self: BicaMemory(self.profile, self.debug_mode, gpt_handler=self.gpt_handler))
+    destiny = _LazyComponent(lambda self: BicaDestiny(self.character_name, self.memory,
+                                                      character_store=self.character_store))
+    context = _LazyComponent(lambda self: BicaContext())
+    prompt_builder = _LazyComponent(lambda self: BicaPromptBuilder(self.character_summary, self.profile))
+
+    def __init__(self, character_description: str, debug_mode: bool,
+                 prompt_token_budget: int = DEFAULT_PROMPT_TOKEN_BUDGET, character_definition: dict = None,
+                 turn_budget: float = None, speculative: bool = False,
+                 speculation_threshold: float = DEFAULT_SPECULATION_THRESHOLD, character_store=None):
         self.debug_mode = debug_mode
+        # Optional BicaCharacterStore holding profiles and destinies; None keeps the per-character JSON files
+        self.character_store = character_store
+        self._component_lock = threading.RLock()
         self.action_executor = BicaActionExecutor()
         self._recent_conversation = []  # Initialize here
         self.gpt_handler = GPTHandler()
+        self.stage_timeouts = dict(DEFAULT_STAGE_TIMEOUTS)
+
+        # Per-turn latency budget in seconds (None disables degradation), running stage estimates and the last report
+        self.turn_budget = turn_budget
+        self._stage_estimates = {}
+        self.last_turn_report = {}
+
+        # Speculative mode drafts the reply from the previous context while the viewpoints are being updated
+        self.speculative = speculative
+        self.speculation_threshold = speculation_threshold
+        self._speculation_executor = None
+        self._speculation_outcome = None
 
         # ||||||||| BICA AGI COGNITIVE SETUP ||||||||||
         self.character_name = "BICA AGI"
         self.character_summary = "You are an artificial general intelligence called BICA. You were created by Alan Hourmand."
-        self.extract_character_definition(character_description)
-
-        self.profile = BicaProfile(self.character_name, self.character_summary, self.gpt_handler)
+        if character_definition is None:
+            character_definition = get_definition_cache().get(character_description)
+        if character_definition:
+            # An already resolved {"name", "summary"} pair skips the GPT call (known description or restored session)
+            self.character_name = character_definition["name"]
+            self.character_summary = character_definition["summary"]
+        else:
+            self.extract_character_definition(character_description)
 
-        # Cognitive setup
-        self.memory = BicaMemory(self.profile, debug_mode)
-        self.destiny = BicaDestiny(self.character_name, self.memory)  # Initialize the destiny module
-        self.context = BicaContext()
+        # Profile, memory, destiny, context and prompt builder are lazy components (see the class attributes)
+        self.context_packer = BicaContextPacker(token_budget=prompt_token_budget)
 
-        # Wait until the profile is initialized
-        self.initialize_profile_with_retries()
+        # Post-response bookkeeping (memory insertion and importance scoring) runs here while the user reads the reply
+        self.background = BicaWorkQueue(self.character_name)
         # |||||||||||||||||||||||||||||||||||||||||||||
 
+    def component_loaded(self, name: str) -> bool:
+        return self.__dict__.get(f"_{name}") is not None
+
     def initialize_profile_with_retries(self, retries=3, delay=5):
         for attempt in range(retries):
             try:
@@ -82,87 +218,239 @@ class BicaCharacter:
         Generates or updates the character's name and summary based on the provided description.
         If no name is provided, one is generated.
         """
-        prompt = f"""
-        Based on the following short description, try to figure out what character the user is referring to. If a name is not provided, generate one that best fits the description.
-        
-        Also if the description the user gives you seems like traits, just make up a character that best fits the traits.
-
-        Description: {character_description}
-
-        Respond in the format:
-        {{
-            "name": "Character's name",
-            "summary": "You are {{name}}, [brief character summary]."
-        }}
-        """
-
-        try:
-            # Generate the response using GPT
-            response = self.gpt_handler.generate_response(prompt)
-
-            # Remove the backticks if present around the JSON
-            cleaned_response = response.strip("```json").strip("```").strip()
-
-            # Parse the cleaned JSON response
-            character_info = json.loads(cleaned_response)
-
-            # Extract the name and summary from the response
-            self.character_name = character_info.get("name", "Unknown Character")
-            self.character_summary = character_info.get(
-                "summary", f"You are {self.character_name}, a mysterious figure."
-            )
-        except json.JSONDecodeError:
-            # Fallback if GPT response is not in proper JSON format
-            print("Error: Could not parse the character definition from the AI response.")
-            print(f"Fallback raw response: {response}")  # Debugging the raw response
+        definition = resolve_character_definition(character_description, self.gpt_handler)
+        if definition:
+            self.character_name = definition["name"]
+            self.character_summary = definition["summary"]
+        else:
             self.character_name = "Unknown Character"
             self.character_summary = f"You are {self.character_name}, an enigmatic character."
 
+    def plan_degradation(self, budget: float = None) -> dict:
+        """
+        Decide which optional stages to degrade up front so the predicted critical path (recall, then the slowest
+        of context/destiny stages, then respond) fits the budget. Uses the running stage estimates of earlier turns
+        and picks the fitting combination that gives up the fewest stages late in DEGRADATION_ORDER.
+        """
+        if budget is None or not self._stage_estimates:
+            return {}
+        estimates = self._stage_estimates
+        available = budget - estimates.get("respond", budget * RESPOND_RESERVE_FRACTION)
+
+        def critical_path(degraded):
+            recall = estimates.get("recall_local", 0.0) if "recall" in degraded else estimates.get("recall", 0.0)
+            parallel = [estimates.get(stage, 0.0) for stage in ("context", "destiny_influence", "destiny")
+                        if stage not in degraded]
+            return recall + max(parallel, default=0.0)
+
+        # Subsets as bit masks over DEGRADATION_ORDER: a lower mask value gives up less important stages
+        for mask in range(2 ** len(DEGRADATION_ORDER)):
+            degraded = [stage for index, stage in enumerate(DEGRADATION_ORDER) if mask & (1 << index)]
+            if critical_path(degraded) <= available:
+                break
+        return {stage: DEGRADATION_MODES[stage] for stage in degraded}
+
+    def _update_stage_estimates(self, timings: dict, degraded: dict, timed_out: list):
+        for stage, seconds in timings.items():
+            mode = degraded.get(stage)
+            if mode == "local":
+                name = "recall_local"
+            elif mode:
+                continue  # A cheap stand-in says nothing about the real stage
+            else:
+                name = stage
+            previous = self._stage_estimates.get(name)
+            if previous is None:
+                self._stage_estimates[name] = seconds
+            elif name in timed_out:
+                # The stage was cut off, so its duration is only a lower bound
+                self._stage_estimates[name] = max(previous, seconds)
+            else:
+                self._stage_estimates[name] = (1 - STAGE_ESTIMATE_ALPHA) * previous + STAGE_ESTIMATE_ALPHA * seconds
+        # A degraded stage is not measured, so let its estimate fade until the stage gets another chance
+        for stage in degraded:
+            if stage in self._stage_estimates:
+                self._stage_estimates[stage] *= DEGRADED_ESTIMATE_DECAY
+
+    def build_turn_graph(self, user_input: str, recent_convo: list, degraded: dict = None,
+                         deadline: float = None) -> BicaStageGraph:
+        """
+        Lays out one conversation turn as a dependency graph. Context update and the two destiny stages only need
+        the recalled memories, so they run concurrently; the response waits for all of them.
+
+        :param degraded: Stages to run in their cheap form, as returned by plan_degradation
+        :param deadline: time.perf_counter() value by which the optional stages must finish; a stage that misses it
+                         falls back to the same cheap result
+        """
+        timeouts = self.stage_timeouts
+        degraded = degraded or {}
+        previous_context = dict(self.context.get_context())
+        default_destiny = self.destiny.default_destiny_based_on_context()
+
+        def recall_memories():
+            # The memory store must include the previous turn before anything reads from it
+            self.background.wait_for(["memory"])
+            return self.memory.get_memories(local_query=user_input if "recall" in degraded else None)
+
+        def update_context(recall):
+            # The update runs on a fork that the turn adopts once it has the result (see adopt_turn_context), so a
+            # stage that was cut off and keeps running never changes the live context under later stages or turns
+            working = self.context.fork()
+            working.update_context(user_input, recall)
+            return working
+
+        # The context stage returns a BicaContext; the live one itself stands for "unchanged"
+        graph = BicaStageGraph(max_workers=3)
+        graph.add_stage("recall", recall_memories, timeout=timeouts.get("recall"))
+        graph.add_stage("context", (lambda recall: self.context) if "context" in degraded else update_context,
+                        depends_on=["recall"], timeout=timeouts.get("context"), default=self.context,
+                        deadline=deadline)
+        graph.add_stage("destiny_influence",
+                        (lambda recall: {}) if "destiny_influence" in degraded else
+                        (lambda recall: self.destiny.get_current_destiny_influence(recall, recent_convo)),
+                        depends_on=["recall"], timeout=timeouts.get("destiny_influence"), default={},
+                        deadline=deadline)
+        graph.add_stage("destiny",
+                        (lambda recall: default_destiny) if "destiny" in degraded else
+                        (lambda recall: self.decide_destiny()),
+                        depends_on=["recall"], timeout=timeouts.get("destiny"), default=default_destiny,
+                        deadline=deadline)
+        if self.speculative and "context" not in degraded:
+            self._add_speculative_response(graph, user_input, recent_convo, previous_context)
+        else:
+            graph.add_stage("respond",
+                            lambda recall, context, destiny_influence, destiny: self.generate_response(
+                                user_input, recent_convo, recall, context.get_context(), destiny_influence, destiny,
+                                context.weights),
+                            depends_on=["recall", "context", "destiny_influence", "destiny"],
+                            timeout=timeouts.get("respond"))
+        return graph
+
+    def adopt_turn_context(self, context):
+        """Make the context stage's result the live context, unless the stage fell back to the live one."""
+        if context is not self.context:
+            self.context.adopt(context)
+
+    def _add_speculative_response(self, graph: BicaStageGraph, user_input: str, recent_convo: list,
+                                  previous_context: dict):
+        """
+        Adds a "draft" stage that starts generating the reply from the previous turn's context as soon as recall and
+        the destiny stages are done, overlapping the context update. The "respond" stage keeps the draft when no
+        viewpoint weight moved by `speculation_threshold` or more, and otherwise discards it and regenerates.
+        """
+        previous_weights = dict(self.context.weights)
+        if self._speculation_executor is None:
+            # Two threads, so a discarded draft that is still waiting on GPT does not hold up the next one
+            self._speculation_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="bica-draft")
+
+        def start_draft(recall, destiny_influence, destiny):
+            # The draft runs outside the graph so a discarded one does not delay the turn
+            return self._speculation_executor.submit(
+                contextvars.copy_context().run, self.generate_response, user_input, recent_convo, recall,
+                previous_context, destiny_influence, destiny, previous_weights)
+
+        def respond(recall, context, destiny_influence, destiny, draft):
+            # Drift is measured on the context the stage returned. If the stage fell back to the live context there
+            # is no update to compare, and the draft was written from exactly that context, so it is used as is.
+            fell_back = context is self.context
+            weights = context.weights
+            drift = 0.0 if fell_back else \
+                max(abs(weights[viewpoint] - previous_weights.get(viewpoint, 0.0)) for viewpoint in weights)
+            if fell_back or drift < self.speculation_threshold:
+                try:
+                    compiled_data = draft.result()
+                    # The reply stands, but the turn is remembered with the up-to-date context
+                    compiled_data["updated_context"] = context.get_context()
+                    self._speculation_outcome = {"outcome": "context_fallback" if fell_back else "kept",
+                                                 "weight_drift": drift}
+                    return compiled_data
+                except Exception as e:
+                    print(f"Speculative draft failed, regenerating: {str(e)}")
+            draft.cancel()
+            self._speculation_outcome = {"outcome": "regenerated", "weight_drift": drift}
+            return self.generate_response(user_input, recent_convo, recall, context.get_context(), destiny_influence,
+                                          destiny, weights)
+
+        graph.add_stage("draft", start_draft, depends_on=["recall", "destiny_influence", "destiny"])
+        graph.add_stage("respond", respond, depends_on=["recall", "context", "destiny_influence", "destiny", "draft"],
+                        timeout=self.stage_timeouts.get("respond"))
+
+    def generate_response(self, user_input, recent_convo, recalled_memories, updated_context, destiny_influence,
+                          relevant_destinies, context_weights=None):
+        print("\n--- Destiny Information ---")
+        print(f"Relevant destinies: {json.dumps(relevant_destinies, indent=2)}")
+        print(f"Destiny influence: {json.dumps(destiny_influence, indent=2)}")
+        print("---------------------------\n")
+
+        # Gather the volatile turn data; the character definition and profile are the builder's cached prefix
+        compiled_data = {
+            "user_input": user_input,
+            "recent_conversation": recent_convo,
+            "updated_context": updated_context,
+            "relevant_memories": recalled_memories,
+            "relevant_destinies": relevant_destinies,
+            "destiny_influence": destiny_influence
+        }
+
+        # Only the best-scoring fragments that fit the token budget go into the prompt
+        context_weights = self.context.weights if context_weights is None else context_weights
+        turn_data = self.context_packer.pack_turn_data(compiled_data, context_weights=context_weights)
+        if self.debug_mode:
+            print(f"Prompt packing: {self.context_packer.last_stats}")
+
+        messages = self.prompt_builder.build_messages(**turn_data)
+        response = self.action_executor.execute_action("respond", context={"messages": messages})
+        compiled_data["character_response"] = response
+        return compiled_data
+
     def process_input(self, user_input: str) -> str:
+        with tracer.span("turn", character=self.character_name):
+            return self._process_input(user_input)
+
+    def _process_input(self, user_input: str) -> str:
         try:
             # Get recent conversation
             recent_convo = self.get_recent_conversation()
 
-            # Retrieves the combined active memories
-            recalled_memories = self.memory.get_memories()
-
-            # Update context with user input
-            self.context.update_context(user_input, recalled_memories)
-            updated_context = self.context.get_context()
-
-            # Calculate destiny influence and generate relevant destinies
-            destiny_influence = self.destiny.get_current_destiny_influence(recalled_memories, recent_convo)
-            # Check for conflicts in short-term memory and decide how to influence destiny
-            # Decide on the destiny based on memories or default to abstract paths
-            relevant_destinies = self.decide_destiny()
-
-            print("\n--- Destiny Information ---")
-            print(f"Relevant destinies: {json.dumps(relevant_destinies, indent=2)}")
-            print(f"Destiny influence: {json.dumps(destiny_influence, indent=2)}")
-            print("---------------------------\n")
-
-            # Gather context data
-            compiled_data = {
-                "user_input": user_input,
-                "recent_conversation": recent_convo,
-                "system_prompt": self.get_character_definition(),
-                "updated_context": updated_context,  # Add updated context to the prompt data
-                "character_profile": self.profile.get_profile(),  # Add character profile to the prompt data
-                "relevant_memories": recalled_memories,
-                "relevant_destinies": relevant_destinies  # Include relevant destinies in context # Add destiny influence to the context
-            }
-
-            # Check if compiled_data is a string, if so, wrap it in a dictionary
-            if isinstance(compiled_data, str):
-                compiled_data = {"compiled_prompt": compiled_data}
-
-            response = self.action_executor.execute_action("respond", compiled_data=compiled_data)
-            compiled_data["character_response"] = response
+            # Under a turn budget, optional stages are degraded up front from earlier timings, and whatever is
+            # still running when only the respond reserve is left falls back to its cheap result
+            started = time.perf_counter()
+            budget = self.turn_budget
+            degraded = self.plan_degradation(budget)
+            deadline = None
+            if budget is not None:
+                reserve = self._stage_estimates.get("respond", budget * RESPOND_RESERVE_FRACTION)
+                deadline = started + max(0.0, budget - reserve)
+
+            # Recall, context, destiny and response stages run as a dependency graph
+            self._speculation_outcome = None
+            graph = self.build_turn_graph(user_input, recent_convo, degraded=degraded, deadline=deadline)
+            results = graph.run()
+            self.adopt_turn_context(results["context"])
+            compiled_data = results["respond"]
+            recalled_memories = results["recall"]
+            response = compiled_data["character_response"]
+
+            self._update_stage_estimates(graph.timings, degraded, graph.timed_out)
+            for stage in graph.timed_out:
+                degraded[stage] = "timed_out"
+            self.last_turn_report = {"budget_seconds": budget, "elapsed_seconds": time.perf_counter() - started,
+                                     "degraded": degraded, "speculation": self._speculation_outcome}
+            current_span = tracer.current_span()
+            if current_span is not None and degraded:
+                current_span.set(degraded=degraded)
+
+            if self.debug_mode:
+                print(f"Stage timings: { {stage: round(seconds, 3) for stage, seconds in graph.timings.items()} }")
+                if degraded:
+                    print(f"Degraded stages: {degraded}")
+                if self._speculation_outcome:
+                    print(f"Speculative draft: {self._speculation_outcome}")
 
             self.update_recent_conversation(user_input, response)
 
-            # Now update the memory with the complete context, including the AI's response
-            self.memory.update_memories(compiled_data)
+            # Store the turn in memory (including the GPT importance rating) off the request path
+            self.background.submit("memory", self.memory.update_memories, compiled_data)
 
             if self.debug_mode:
                 print(f"Working Memory: {recalled_memories['working_memory']}")
@@ -178,15 +466,47 @@ class BicaCharacter:
             traceback.print_exc()
             return "I apologize, but I encountered an error. Could you please try again?"
 
+    def export_state(self) -> dict:
+        """
+        JSON-serializable conversation state (definition, recent conversation, memories and viewpoint contexts).
+        The profile and destinies already live on disk under the character's name.
+        """
+        self.background.drain()
+        return {
+            "character_definition": {"name": self.character_name, "summary": self.character_summary},
+            "recent_conversation": list(self._recent_conversation),
+            "memory": self.memory.export_state() if self.component_loaded("memory") else {},
+            "context": self.context.export_state() if self.component_loaded("context") else {},
+        }
+
+    @classmethod
+    def from_state(cls, state: dict, debug_mode: bool = False, **kwargs) -> "BicaCharacter":
+        character = cls("", debug_mode, character_definition=state["character_definition"], **kwargs)
+        character._recent_conversation = list(state.get("recent_conversation", []))
+        if state.get("memory"):
+            character.memory.load_state(state["memory"])
+        if state.get("context"):
+            character.context.load_state(state["context"])
+        return character
+
+    def shutdown(self):
+        """Finish all queued background work, e.g. before the session ends."""
+        self.background.drain()
+        self.background.close()
+        if self._speculation_executor is not None:
+            self._speculation_executor.shutdown(wait=False, cancel_futures=True)
+        if self.component_loaded("destiny"):
+            self.destiny.close()
+
     def decide_destiny(self):
         """
-        Decides on a destiny based on current important memories, or defaults to a typical abstract path.
-        This approach is generic and adapts to any character input without predefined scenarios.
+        Decides on a destiny based on the dominant themes of the important memories, or defaults to a typical
+        abstract path. The themes are maintained incrementally by the memory system, so nothing is rescanned here.
         """
-        important_memories = self.memory.get_high_importance_memories()
+        themes = self.memory.get_dominant_themes()
 
-        if important_memories:
-            return self.destiny.generate_destiny_from_memories(important_memories)
+        if themes:
+            return self.destiny.generate_destiny_from_themes(themes)
         else:
             return self.destiny.default_destiny_based_on_context()
 
@@ -196,10 +516,10 @@ class BicaCharacter:
         If important memories are present, influence destiny based on them.
         Otherwise, use long-term memories or default to character traits.
         """
-        important_memories = self.memory.get_high_importance_memories()
+        themes = self.memory.get_dominant_themes()
 
-        if important_memories:
-            return self.destiny.generate_destiny_from_memories(important_memories)
+        if themes:
+            return self.destiny.generate_destiny_from_themes(themes)
         else:
             return self.destiny.default_destiny_based_on_profile(self.profile)
 
@@ -0,0 +1,417 @@
+"""
+BicameralAGI Character Store Module
+===================================
+
+Overview:
+---------
+This module keeps the profiles and destinies of many characters in one SQLite database instead of one JSON file per
+character, so listing, loading and updating thousands of characters does not pay a file open (and its filesystem
+metadata lookups) per character. Characters are looked up by name through the primary-key index (case-insensitive,
+like the file names on most systems). Every top-level profile section (characterInfo, cognitiveModel, ...) is its own
+row with a JSON column, so a request that only needs the cognitive model never parses the rest of the profile, and an
+update rewrites only the sections that changed. Destinies are one JSON row per character.
+
+The existing file layout stays the exchange format: `import_files` reads data/characters/<name>/<name>_profile.json
+and bica/data/destinies/<name>_destinies.json into the database, and `export_files` writes them back out.
+
+Key Features:
+-------------
+1. Indexed lookup by name and paged listing
+2. Batched reads (`get_profiles`, `get_destinies_many`) and writes (`put_profiles`) in one query or transaction
+3. Lazy hydration: `lazy_profile(name)` returns a mapping that loads each section on first access
+4. Drop-in destiny persistence for BicaDestiny (`destiny_store(name)` has the BicaDestinyStore interface) and
+   profile history for BicaProfile (`profile_history(name)`)
+5. WAL journal mode with one connection per thread, so readers do not block the writer
+
+Usage:
+------
+    store = BicaCharacterStore("data/characters/characters.db")
+    store.import_files("data/characters", "bica/data/destinies")
+    traits = store.get_profile("Tron", sections=["cognitiveModel"])["cognitiveModel"]["traits"]
+    profiles = store.get_profiles(["Tron", "Jane Doe"], sections=["characterInfo"])
+    profile = BicaProfile("Tron", summary, gpt_handler, store=store)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from bica.core.profile_history import ProfileHistory
+
+DEFAULT_DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../data/characters/characters.db'))
+
+# SQLite limits the number of bound parameters per statement; batched reads are chunked below it
+MAX_QUERY_PARAMETERS = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS characters (
+    name TEXT PRIMARY KEY COLLATE NOCASE,
+    summary TEXT,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS profile_sections (
+    name TEXT NOT NULL COLLATE NOCASE REFERENCES characters(name) ON DELETE CASCADE,
+    section TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (name, section)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS profile_history (
+    name TEXT NOT NULL COLLATE NOCASE REFERENCES characters(name) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (name, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS destinies (
+    name TEXT PRIMARY KEY COLLATE NOCASE REFERENCES characters(name) ON DELETE CASCADE,
+    data TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+
+def _chunks(items: Sequence[str], size: int = MAX_QUERY_PARAMETERS) -> Iterator[Sequence[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class LazyProfile(Mapping):
+    """Read-only view of a stored profile that loads each section the first time it is accessed."""
+
+    def __init__(self, store: "BicaCharacterStore", name: str, sections: List[str]):
+        self.store = store
+        self.name = name
+        self._sections = sections
+        self._loaded: Dict[str, Any] = {}
+
+    def __getitem__(self, section: str) -> Any:
+        if section not in self._loaded:
+            if section not in self._sections:
+                raise KeyError(section)
+            self._loaded.update(self.store.get_profile(self.name, sections=[section]) or {})
+        return self._loaded[section]
+
+    def __iter__(self):
+        return iter(self._sections)
+
+    def __len__(self):
+        return len(self._sections)
+
+    def loaded_sections(self) -> List[str]:
+        return list(self._loaded)
+
+
+class StoredDestinies:
+    """Persists one character's destinies in a BicaCharacterStore, with the interface of BicaDestinyStore."""
+
+    def __init__(self, store: "BicaCharacterStore", name: str):
+        self.store = store
+        self.name = name
+
+    def load(self) -> List[Dict[str, Any]]:
+        return self.store.get_destinies(self.name)
+
+    def record(self, destinies: List[Dict[str, Any]]):
+        # A single-row upsert in WAL mode is cheap enough to do synchronously
+        self.store.put_destinies(self.name, destinies)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class StoredProfileHistory(ProfileHistory):
+    """Profile deltas and snapshots of one character kept in a BicaCharacterStore."""
+
+    def __init__(self, store: "BicaCharacterStore", name: str, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+        self.name = name
+
+    def _entries(self) -> List[Dict[str, Any]]:
+        return [json.loads(data) for (data,) in self.store._connection().execute(
+            "SELECT data FROM profile_history WHERE name = ? ORDER BY position", (self.name,))]
+
+    def _append(self, entries: List[Dict[str, Any]]):
+        with self.store._transaction() as connection:
+            self.store._touch(connection, [(self.name, None)])
+            start = connection.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM profile_history WHERE name = ?",
+                                       (self.name,)).fetchone()[0]
+            connection.executemany("INSERT INTO profile_history (name, position, data) VALUES (?, ?, ?)",
+                                   [(self.name, start + offset, _dumps(entry)) for offset, entry in enumerate(entries)])
+
+    def _rewrite(self, entries: List[Dict[str, Any]]):
+        with self.store._transaction() as connection:
+            connection.execute("DELETE FROM profile_history WHERE name = ?", (self.name,))
+            connection.executemany("INSERT INTO profile_history (name, position, data) VALUES (?, ?, ?)",
+                                   [(self.name, position, _dumps(entry)) for position, entry in enumerate(entries)])
+
+
+class BicaCharacterStore:
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        """:param db_path: SQLite database file, created on first use; ":memory:" is not supported across threads"""
+        self.db_path = db_path
+        self._local = threading.local()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._connection().executescript(SCHEMA)
+
+    # Connections
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def close(self):
+        """Close this thread's connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    # Characters
+    def list_characters(self, prefix: str = "", limit: int = 100, offset: int = 0) -> List[str]:
+        """Character names in name order, optionally only those starting with `prefix` (served by the index)."""
+        if prefix:
+            upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+            rows = self._connection().execute(
+                "SELECT name FROM characters WHERE name >= ? AND name < ? ORDER BY name LIMIT ? OFFSET ?",
+                (prefix, upper, limit, offset))
+        else:
+            rows = self._connection().execute("SELECT name FROM characters ORDER BY name LIMIT ? OFFSET ?",
+                                              (limit, offset))
+        return [name for (name,) in rows]
+
+    def count_characters(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM characters").fetchone()[0]
+
+    def has_character(self, name: str) -> bool:
+        return self._connection().execute("SELECT 1 FROM characters WHERE name = ?", (name,)).fetchone() is not None
+
+    def delete_character(self, name: str):
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM characters WHERE name = ?", (name,))
+
+    def _touch(self, connection: sqlite3.Connection, names_and_summaries: Iterable[Tuple[str, Optional[str]]]):
+        connection.executemany(
+            "INSERT INTO characters (name, summary, updated) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET summary = COALESCE(excluded.summary, summary), updated = excluded.updated",
+            [(name, summary, time.time()) for name, summary in names_and_summaries])
+
+    # Profiles
+    def put_profile(self, name: str, profile: Dict[str, Any], summary: Optional[str] = None):
+        """Store a whole profile, replacing its previous sections."""
+        self.put_profiles([(name, profile, summary)])
+
+    def put_profiles(self, profiles: Iterable[Tuple[str, Dict[str, Any], Optional[str]]]):
+        """Store many (name, profile, summary) triples in one transaction."""
+        profiles = list(profiles)
+        with self._transaction() as connection:
+            self._touch(connection, [(name, summary) for name, _, summary in profiles])
+            connection.executemany("DELETE FROM profile_sections WHERE name = ?", [(name,) for name, _, _ in profiles])
+            connection.executemany("INSERT INTO profile_sections (name, section, data) VALUES (?, ?, ?)",
+                                   [(name, section, _dumps(data)) for name, profile, _ in profiles
+                                    for section, data in profile.items()])
+
+    def update_profile_sections(self, name: str, sections: Dict[str, Any]):
+        """Rewrite only the given top-level sections of a profile."""
+        with self._transaction() as connection:
+            self._touch(connection, [(name, None)])
+            connection.executemany(
+                "INSERT INTO profile_sections (name, section, data) VALUES (?, ?, ?) "
+                "ON CONFLICT(name, section) DO UPDATE SET data = excluded.data",
+                [(name, section, _dumps(data)) for section, data in sections.items()])
+
+    def get_profile(self, name: str, sections: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        """The profile (or only the requested sections) of one character; None if the character has no profile."""
+        return self.get_profiles([name], sections).get(name)
+
+    def get_profiles(self, names: Sequence[str],
+                     sections: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Profiles for many characters, keyed by the names as passed in; characters without a profile are left out."""
+        by_key = {name.casefold(): name for name in names}
+        profiles: Dict[str, Dict[str, Any]] = {}
+        section_filter = ""
+        if sections is not None:
+            section_filter = f" AND section IN ({','.join('?' * len(sections))})"
+        for chunk in _chunks(list(names), MAX_QUERY_PARAMETERS - len(sections or [])):
+            rows = self._connection().execute(
+                f"SELECT name, section, data FROM profile_sections "
+                f"WHERE name IN ({','.join('?' * len(chunk))}){section_filter}",
+                [*chunk, *(sections or [])])
+            for name, section, data in rows:
+                profiles.setdefault(by_key.get(name.casefold(), name), {})[section] = json.loads(data)
+        return profiles
+
+    def profile_sections(self, name: str) -> List[str]:
+        return [section for (section,) in self._connection().execute(
+            "SELECT section FROM profile_sections WHERE name = ?", (name,))]
+
+    def lazy_profile(self, name: str) -> Optional[LazyProfile]:
+        """A mapping over the profile's sections that hydrates each section on first access."""
+        sections = self.profile_sections(name)
+        return LazyProfile(self, name, sections) if sections else None
+
+    # Destinies
+    def put_destinies(self, name: str, destinies: List[Dict[str, Any]]):
+        self.put_destinies_many([(name, destinies)])
+
+    def put_destinies_many(self, items: Iterable[Tuple[str, List[Dict[str, Any]]]]):
+        items = list(items)
+        now = time.time()
+        with self._transaction() as connection:
+            self._touch(connection, [(name, None) for name, _ in items])
+            connection.executemany(
+                "INSERT INTO destinies (name, data, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET data = excluded.data, updated = excluded.updated",
+                [(name, _dumps(destinies), now) for name, destinies in items])
+
+    def get_destinies(self, name: str) -> List[Dict[str, Any]]:
+        return self.get_destinies_many([name]).get(name, [])
+
+    def get_destinies_many(self, names: Sequence[str]) -> Dict[str, List[Dict[str, Any]]]:
+        by_key = {name.casefold(): name for name in names}
+        destinies = {}
+        for chunk in _chunks(list(names)):
+            rows = self._connection().execute(
+                f"SELECT name, data FROM destinies WHERE name IN ({','.join('?' * len(chunk))})", list(chunk))
+            for name, data in rows:
+                destinies[by_key.get(name.casefold(), name)] = json.loads(data)
+        return destinies
+
+    def destiny_store(self, name: str) -> StoredDestinies:
+        """Destiny persistence for BicaDestiny backed by this store."""
+        return StoredDestinies(self, name)
+
+    # Profile history
+    def profile_history(self, name: str, **kwargs) -> StoredProfileHistory:
+        """Versioned profile deltas for BicaProfile backed by this store (see ProfileHistory for the options)."""
+        return StoredProfileHistory(self, name, **kwargs)
+
+    # File import / export
+    def import_files(self, characters_dir: Optional[str] = None, destinies_dir: Optional[str] = None,
+                     batch_size: int = 500) -> Dict[str, int]:
+        """
+        Load <characters_dir>/<name>/<name>_profile.json and <destinies_dir>/<name>_destinies.json files, writing
+        `batch_size` characters per transaction. Destiny journals (see BicaDestinyStore) are replayed first.
+        """
+        counts = {"profiles": 0, "destinies": 0}
+        if characters_dir and os.path.isdir(characters_dir):
+            batch = []
+            for entry in sorted(os.listdir(characters_dir)):
+                profile_path = os.path.join(characters_dir, entry, f"{entry}_profile.json")
+                if not os.path.isfile(profile_path):
+                    continue
+                with open(profile_path, 'r', encoding='utf-8') as profile_file:
+                    profile = json.load(profile_file)
+                batch.append((entry, profile, profile.get("characterInfo", {}).get("description")))
+                if len(batch) >= batch_size:
+                    self.put_profiles(batch)
+                    counts["profiles"] += len(batch)
+                    batch = []
+            if batch:
+                self.put_profiles(batch)
+                counts["profiles"] += len(batch)
+
+        if destinies_dir and os.path.isdir(destinies_dir):
+            from bica.core.destiny_store import BicaDestinyStore
+
+            batch = []
+            for entry in sorted(os.listdir(destinies_dir)):
+                if not entry.endswith("_destinies.json"):
+                    continue
+                name = entry[:-len("_destinies.json")]
+                batch.append((name, BicaDestinyStore(os.path.join(destinies_dir, entry)).load()))
+                if len(batch) >= batch_size:
+                    self.put_destinies_many(batch)
+                    counts["destinies"] += len(batch)
+                    batch = []
+            if batch:
+                self.put_destinies_many(batch)
+                counts["destinies"] += len(batch)
+        return counts
+
+    def export_files(self, characters_dir: Optional[str] = None, destinies_dir: Optional[str] = None,
+                     names: Optional[Sequence[str]] = None, batch_size: int = 500) -> Dict[str, int]:
+        """Write profiles and destinies back out in the file layout BicaProfile and BicaDestiny use."""
+        counts = {"profiles": 0, "destinies": 0}
+        if names is None:
+            names = [name for (name,) in self._connection().execute("SELECT name FROM characters ORDER BY name")]
+        for chunk in _chunks(list(names), batch_size):
+            if characters_dir:
+                for name, profile in self.get_profiles(chunk).items():
+                    os.makedirs(os.path.join(characters_dir, name), exist_ok=True)
+                    with open(os.path.join(characters_dir, name, f"{name}_profile.json"), 'w') as profile_file:
+                        json.dump(profile, profile_file, indent=4)
+                    counts["profiles"] += 1
+            if destinies_dir:
+                os.makedirs(destinies_dir, exist_ok=True)
+                for name, destinies in self.get_destinies_many(chunk).items():
+                    with open(os.path.join(destinies_dir, f"{name}_destinies.json"), 'w') as destinies_file:
+                        json.dump({"destinies": destinies}, destinies_file, indent=2)
+                    counts["destinies"] += 1
+        return counts
+
+
+def main():
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = BicaCharacterStore(os.path.join(temp_dir, "characters.db"))
+        base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+        print(f"Imported from files: {store.import_files(os.path.join(base_dir, 'data', 'characters'))}")
+
+        template = store.get_profile("Tron") or {"characterInfo": {"name": "Tron"}, "cognitiveModel": {"traits": {}}}
+        count = 10000
+        start = time.perf_counter()
+        store.put_profiles((f"Character {index:05d}", template, f"Generated character {index}")
+                           for index in range(count))
+        store.put_destinies_many((f"Character {index:05d}", [{"title": "Guardian", "weight": 0.5}])
+                                 for index in range(count))
+        print(f"Wrote {count} profiles and destinies in {time.perf_counter() - start:.2f} s")
+
+        start = time.perf_counter()
+        names = store.list_characters(prefix="Character 01", limit=1000)
+        profiles = store.get_profiles(names, sections=["cognitiveModel"])
+        print(f"Listed {len(names)} characters and loaded their cognitive models in "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+        start = time.perf_counter()
+        profile = store.lazy_profile("character 04242")  # Case-insensitive lookup
+        traits = profile["cognitiveModel"].get("traits", {})
+        print(f"Lazy lookup: {len(traits)} traits, sections loaded {profile.loaded_sections()} of {list(profile)} "
+              f"({(time.perf_counter() - start) * 1000:.2f} ms)")
+
+        export_dir = os.path.join(temp_dir, "export")
+        print(f"Exported: {store.export_files(os.path.join(export_dir, 'characters'), os.path.join(export_dir, 'destinies'), names=names[:5])}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
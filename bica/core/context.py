@@ -29,9 +29,11 @@ Author: Alan Hourmand
 Date: 10/2/2024
 """
 
-from sentence_transformers import SentenceTransformer
 from external.gpt_handler import GPTHandler as gpt
 from scipy.spatial.distance import cosine
+from bica.utils.embeddings import get_sentence_model
+from bica.utils.tracing import tracer
+import copy
 import json
 
 
@@ -39,11 +41,16 @@ class BicaContext:
     def __init__(self, max_length=1000):
         self.context_viewpoints = {"positive": "", "neutral": "", "negative": ""}
         self.weights = {"positive": 0.33, "neutral": 0.33, "negative": 0.34}  # Initial weights
-        self.model = SentenceTransformer('paraphrase-MiniLM-L6-v2')  # Load the embedding model
+        self.model_name = 'paraphrase-MiniLM-L6-v2'
         self.max_length = max_length
         self.gpt_handler = gpt()
         self.memory = []
 
+    @property
+    def model(self):
+        # Shared with every other context using the same model, and loaded on first use
+        return get_sentence_model(self.model_name)
+
     def update_context(self, new_info, recalled_memories):
         self.update_viewpoint_weights(new_info)
         for viewpoint in self.context_viewpoints:
@@ -66,7 +73,8 @@ class BicaContext:
 
     def update_viewpoint_weights(self, new_info):
         # Encode the new information into a vector representation
-        new_info_embedding = self.model.encode(new_info, convert_to_tensor=True)
+        with tracer.span("embedding.encode", model="paraphrase-MiniLM-L6-v2", texts=1):
+            new_info_embedding = self.model.encode(new_info, convert_to_tensor=True)
 
         similarities = {}
 
@@ -84,7 +92,8 @@ class BicaContext:
             except json.JSONDecodeError:
                 interpretation = response  # Fallback to raw response if JSON parsing fails
 
-            response_embedding = self.model.encode(interpretation, convert_to_tensor=True)
+            with tracer.span("embedding.encode", model="paraphrase-MiniLM-L6-v2", texts=1):
+                response_embedding = self.model.encode(interpretation, convert_to_tensor=True)
 
             # Calculate similarity between new info and interpretation
             similarity = 1 - cosine(new_info_embedding, response_embedding)
@@ -194,9 +203,30 @@ class BicaContext:
 
         return ai_response.strip(), reasoning
 
+    def fork(self):
+        """A copy whose updates do not touch this context until it is adopted."""
+        forked = copy.copy(self)
+        forked.context_viewpoints = dict(self.context_viewpoints)
+        forked.weights = dict(self.weights)
+        forked.memory = list(self.memory)
+        return forked
+
+    def adopt(self, forked):
+        """Take over the state of an updated fork."""
+        self.context_viewpoints = forked.context_viewpoints
+        self.weights = forked.weights
+        self.memory = forked.memory
+
     def get_context(self):
         return self.context_viewpoints
 
+    def export_state(self):
+        return {"context_viewpoints": dict(self.context_viewpoints), "weights": dict(self.weights)}
+
+    def load_state(self, state):
+        self.context_viewpoints.update(state.get("context_viewpoints", {}))
+        self.weights.update(state.get("weights", {}))
+
     def get_weighted_context(self):
         weighted_context = {}
         for viewpoint, context in self.context_viewpoints.items():
@@ -0,0 +1,247 @@
+"""
+BicameralAGI Context Packer Module
+==================================
+
+Overview:
+---------
+This module keeps the turn data sent with the final response call inside a fixed token budget. Every candidate
+piece of context (a recent exchange, a viewpoint, a recalled memory, a destiny) becomes a fragment with an estimated
+token count and a score built from its relevance and recency. The packer then selects the best set of fragments that
+fits the budget, either greedily or with a 0/1 knapsack. Fragments are rendered and measured once and cached across
+turns, so a long session only pays for the fragments that are new.
+
+Key Features:
+-------------
+1. Cheap token estimation (about four characters per token) on the compact JSON rendering of each fragment
+2. Score = relevance * 2 ** (-age / recency_half_life)
+3. "greedy" (best score first) and "knapsack" (maximum total score) selection strategies
+4. Required fragments that are always kept, and an LRU cache of rendered fragments
+
+Usage:
+------
+    packer = BicaContextPacker(token_budget=1500)
+    fragments = [Fragment("memory", memory.memory_id, memory.content, relevance=memory.importance,
+                          timestamp=memory.timestamp), ...]
+    selected = packer.pack(fragments)  # {"memory": [Fragment, ...], ...}
+
+    # Or directly on the compiled turn data of a character
+    turn_data = packer.pack_turn_data(compiled_data, context_weights=context.weights)
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from bica.core.prompt_builder import compact_json
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
+
+
+class Fragment:
+    def __init__(self, section: str, key: Hashable, value: Any, relevance: float = 1.0,
+                 timestamp: Optional[float] = None, required: bool = False, order: int = 0):
+        """
+        :param section: Where the fragment goes in the prompt, e.g. "recent_conversation" or "memory"
+        :param key: Identifies the fragment across turns; it must change whenever `value` changes
+        :param value: The JSON-serializable value that ends up in the prompt
+        :param order: Position of the fragment within its section in the final prompt
+        """
+        self.section = section
+        self.key = key
+        self.value = value
+        self.relevance = relevance
+        self.timestamp = timestamp
+        self.required = required
+        self.order = order
+        self.text = ""
+        self.tokens = 0
+
+    def __repr__(self):
+        return f"Fragment({self.section!r}, {self.key!r}, tokens={self.tokens}, relevance={self.relevance:.2f})"
+
+
+class BicaContextPacker:
+    STRATEGIES = ("greedy", "knapsack")
+
+    def __init__(self, token_budget: int = 1500, strategy: str = "greedy", recency_half_life: float = 3600.0,
+                 cache_size: int = 2048, knapsack_granularity: int = 8):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown packing strategy: {strategy}. Expected one of {self.STRATEGIES}")
+        self.token_budget = token_budget
+        self.strategy = strategy
+        self.recency_half_life = recency_half_life
+        self.cache_size = cache_size
+        self.knapsack_granularity = knapsack_granularity
+        self._render_cache: "OrderedDict[Tuple[str, Hashable], Tuple[str, int]]" = OrderedDict()
+        self.last_stats: Dict[str, int] = {}
+
+    def render(self, fragment: Fragment) -> Fragment:
+        cache_key = (fragment.section, fragment.key)
+        cached = self._render_cache.get(cache_key)
+        if cached is None:
+            text = fragment.value if isinstance(fragment.value, str) else compact_json(fragment.value)
+            cached = (text, estimate_tokens(text))
+            self._render_cache[cache_key] = cached
+            if len(self._render_cache) > self.cache_size:
+                self._render_cache.popitem(last=False)
+        else:
+            self._render_cache.move_to_end(cache_key)
+        fragment.text, fragment.tokens = cached
+        return fragment
+
+    def score(self, fragment: Fragment, now: float) -> float:
+        if fragment.timestamp is None:
+            return fragment.relevance
+        age = max(0.0, now - fragment.timestamp)
+        return fragment.relevance * 2 ** (-age / self.recency_half_life)
+
+    def _select_greedy(self, fragments: List[Fragment], scores: List[float], budget: int) -> List[Fragment]:
+        selected = []
+        for index in sorted(range(len(fragments)), key=lambda i: scores[i], reverse=True):
+            if fragments[index].tokens <= budget:
+                selected.append(fragments[index])
+                budget -= fragments[index].tokens
+        return selected
+
+    def _select_knapsack(self, fragments: List[Fragment], scores: List[float], budget: int) -> List[Fragment]:
+        # Token costs are rounded up to multiples of `knapsack_granularity` to keep the table small
+        unit = self.knapsack_granularity
+        capacity = budget // unit
+        costs = [-(-fragment.tokens // unit) for fragment in fragments]
+        best = np.zeros(capacity + 1)
+        taken = np.zeros((len(fragments), capacity + 1), dtype=bool)
+        for i, (cost, value) in enumerate(zip(costs, scores)):
+            if cost > capacity:
+                continue
+            candidate = best[:capacity + 1 - cost] + value
+            improved = candidate > best[cost:]
+            taken[i, cost:] = improved
+            best[cost:] = np.where(improved, candidate, best[cost:])
+
+        selected, remaining = [], capacity
+        for i in range(len(fragments) - 1, -1, -1):
+            if taken[i, remaining]:
+                selected.append(fragments[i])
+                remaining -= costs[i]
+        return selected
+
+    def pack(self, fragments: List[Fragment], token_budget: Optional[int] = None,
+             now: Optional[float] = None) -> Dict[str, List[Fragment]]:
+        """Select fragments under the budget and return them grouped by section, each section in `order`."""
+        budget = self.token_budget if token_budget is None else token_budget
+        now = time.time() if now is None else now
+        for fragment in fragments:
+            self.render(fragment)
+
+        required = [fragment for fragment in fragments if fragment.required]
+        optional = [fragment for fragment in fragments if not fragment.required]
+        remaining = budget - sum(fragment.tokens for fragment in required)
+        scores = [self.score(fragment, now) for fragment in optional]
+        if remaining <= 0:
+            chosen = []
+        elif self.strategy == "knapsack":
+            chosen = self._select_knapsack(optional, scores, remaining)
+        else:
+            chosen = self._select_greedy(optional, scores, remaining)
+
+        selected = required + chosen
+        self.last_stats = {
+            "budget": budget,
+            "used_tokens": sum(fragment.tokens for fragment in selected),
+            "candidate_tokens": sum(fragment.tokens for fragment in fragments),
+            "selected": len(selected),
+            "dropped": len(fragments) - len(selected),
+        }
+
+        sections: Dict[str, List[Fragment]] = {}
+        for fragment in sorted(selected, key=lambda f: f.order):
+            sections.setdefault(fragment.section, []).append(fragment)
+        return sections
+
+    def pack_turn_data(self, turn_data: Dict[str, Any], context_weights: Optional[Dict[str, float]] = None,
+                       token_budget: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Fit the compiled turn data of BicaCharacter.generate_response into the budget. The user input, self memory,
+        destinies and destiny influence are always kept; recent exchanges (newest first), viewpoint contexts (by
+        viewpoint weight) and recalled memories (by importance and age) compete for the rest.
+        """
+        fragments = []
+        recent_conversation = turn_data.get("recent_conversation") or []
+        for position, exchange in enumerate(recent_conversation):
+            age = len(recent_conversation) - 1 - position
+            fragments.append(Fragment("recent_conversation", (exchange.get("user"), exchange.get("character")),
+                                      exchange, relevance=0.8 ** age, required=age == 0, order=position))
+
+        context_weights = context_weights or {}
+        for position, (viewpoint, text) in enumerate((turn_data.get("updated_context") or {}).items()):
+            if text:
+                fragments.append(Fragment("updated_context", (viewpoint, text), text,
+                                          relevance=context_weights.get(viewpoint, 1.0), order=position))
+
+        memories = turn_data.get("relevant_memories") or {}
+        seen_ids = set()
+        position = 0
+        for memory_type in ("working_memory", "short_term_memory", "long_term_memory"):
+            for memory in memories.get(memory_type) or []:
+                if memory.memory_id in seen_ids:
+                    continue
+                seen_ids.add(memory.memory_id)
+                fragments.append(Fragment(memory_type, memory.memory_id, memory.content,
+                                          relevance=memory.importance, timestamp=memory.timestamp, order=position))
+                position += 1
+        if memories.get("self_memory"):
+            fragments.append(Fragment("self_memory", memories["self_memory"], memories["self_memory"], required=True))
+
+        for section in ("relevant_destinies", "destiny_influence"):
+            if turn_data.get(section):
+                fragments.append(Fragment(section, compact_json(turn_data[section]), turn_data[section],
+                                          required=True))
+
+        sections = self.pack(fragments, token_budget=token_budget)
+        packed = {
+            "user_input": turn_data.get("user_input"),
+            "recent_conversation": [f.value for f in sections.get("recent_conversation", [])],
+            "updated_context": {f.key[0]: f.value for f in sections.get("updated_context", [])},
+            "relevant_memories": {
+                memory_type: [f.value for f in sections[memory_type]]
+                for memory_type in ("working_memory", "short_term_memory", "long_term_memory")
+                if memory_type in sections
+            },
+        }
+        if "self_memory" in sections:
+            packed["relevant_memories"]["self_memory"] = sections["self_memory"][0].value
+        for section in ("relevant_destinies", "destiny_influence"):
+            if section in sections:
+                packed[section] = sections[section][0].value
+        return packed
+
+
+def main():
+    rng = np.random.default_rng(0)
+    now = time.time()
+    fragments = [Fragment("memory", i, f"Memory {i}: " + "detail " * int(rng.integers(5, 80)),
+                          relevance=float(rng.uniform()), timestamp=now - float(rng.uniform(0, 7200)), order=i)
+                 for i in range(200)]
+    fragments.append(Fragment("destinies", "current", {"title": "Unknown Journey"}, required=True))
+
+    for strategy in BicaContextPacker.STRATEGIES:
+        packer = BicaContextPacker(token_budget=1000, strategy=strategy)
+        start = time.perf_counter()
+        selected = packer.pack(fragments, now=now)
+        first = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        packer.pack(fragments, now=now)
+        cached = (time.perf_counter() - start) * 1000
+        total_score = sum(packer.score(f, now) for f in selected["memory"])
+        print(f"{strategy:8s} {packer.last_stats} score={total_score:.2f} "
+              f"first pack {first:.2f} ms, cached pack {cached:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+BicameralAGI Character Definition Cache Module
+==============================================
+
+Overview:
+---------
+This module remembers the character definitions (name and summary) that GPT resolved from user descriptions, so
+building a BicaCharacter for a description that was seen before does not need the definition call again. Entries are
+keyed by a hash of the normalized description (lowercase, collapsed whitespace), kept in memory and persisted as an
+append-only JSONL log (see jsonl_log): each put appends one {"key", "name", "summary"} line, so its cost does not grow
+with the size of the cache. On load, later lines win.
+
+Usage:
+------
+    cache = CharacterDefinitionCache()
+    definition = cache.get("A brave knight from the future.")  # None on a miss
+    cache.put("A brave knight from the future.", {"name": "Sir Chronos", "summary": "You are Sir Chronos, ..."})
+"""
+
+import hashlib
+import os
+import threading
+from typing import Dict, Optional
+
+from bica.utils.jsonl_log import append_jsonl, read_jsonl
+from bica.utils.utilities import normalize_text
+
+DEFAULT_CACHE_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../../data/characters/definition_cache.jsonl'))
+
+
+def description_key(description: str) -> str:
+    return hashlib.sha256(normalize_text(description).encode('utf-8')).hexdigest()
+
+
+class CharacterDefinitionCache:
+    def __init__(self, file_path: Optional[str] = DEFAULT_CACHE_PATH):
+        """:param file_path: JSONL log backing the cache; None keeps it in memory only"""
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._definitions: Dict[str, Dict[str, str]] = {}
+        if file_path:
+            try:
+                for entry in read_jsonl(file_path):
+                    self._definitions[entry["key"]] = {"name": entry["name"], "summary": entry["summary"]}
+            except OSError as e:
+                print(f"Warning: Ignoring unreadable character definition cache {file_path}: {str(e)}")
+
+    def get(self, description: str) -> Optional[Dict[str, str]]:
+        definition = self._definitions.get(description_key(description))
+        return dict(definition) if definition else None
+
+    def put(self, description: str, definition: Dict[str, str]):
+        key = description_key(description)
+        entry = {"name": definition["name"], "summary": definition["summary"]}
+        with self._lock:
+            self._definitions[key] = entry
+            if self.file_path:
+                append_jsonl(self.file_path, [{"key": key, **entry}])
+
+    def __len__(self):
+        return len(self._definitions)
+
+
+_default_cache: Optional[CharacterDefinitionCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_definition_cache() -> CharacterDefinitionCache:
+    """The process-wide cache used by BicaCharacter, loaded on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = CharacterDefinitionCache()
+        return _default_cache
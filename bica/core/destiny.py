@@ -9,41 +9,70 @@ import json
 import os
 import random
 import re
-from typing import List, Dict, Any
+import sqlite3
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
 
 from utils.bica_logging import BicaLogging
 from external.gpt_handler import GPTHandler
-from utils.utilities import load_json_file, save_json_file
 from core.memory import BicaMemory
+from bica.core.destiny_store import BicaDestinyStore
+from bica.core.destiny_scoring import BicaDestinyScorer, memory_text
+from bica.core.destiny_simulation import BicaDestinySimulator, trait_text
+from bica.core.memory_themes import BicaThemeClusterer
 
 
 class BicaDestiny:
-    def __init__(self, character_name: str, memory_system: BicaMemory):
+    def __init__(self, character_name: str, memory_system: BicaMemory, influence_mode: str = "local",
+                 character_store=None):
+        """
+        :param influence_mode: "local" scores destiny influence with cached embeddings (no LLM call),
+                               "gpt" asks GPT for the influence map
+        :param character_store: Optional BicaCharacterStore to keep the destinies in instead of a journaled file
+        """
         self.character_name = character_name
+        self.influence_mode = influence_mode
+        self.scorer = BicaDestinyScorer()
+        self.simulator = BicaDestinySimulator()
         self.gpt_handler = GPTHandler()
         self.logger = BicaLogging("BicaDestiny")
         self.memory_system = memory_system
         self.destinies: List[Dict] = []
+        if character_store is not None:
+            self.store = character_store.destiny_store(self.character_name)
+        else:
+            destiny_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'destinies')
+            # Changes are journaled and flushed in batches off the request path; see BicaDestinyStore
+            self.store = BicaDestinyStore(os.path.join(destiny_dir, f"{self.character_name}_destinies.json"))
         self._load_destinies()
-        print(f"Loaded destinies: {self.destinies}")
 
-    def generate_destiny_from_memories(self, memories):
+    def generate_destiny_from_themes(self, themes: List[Tuple[str, float]]) -> Dict[str, Any]:
         """
-        Generate a generic destiny based on important memories, abstracting the influence into a flexible destiny.
-        This function avoids hardcoded scenarios and adapts based on the memory context.
+        Generate a generic destiny from the dominant memory themes ([(label, weight), ...], heaviest first, as
+        returned by BicaMemory.get_dominant_themes). The heaviest theme names the destiny, and its weight sets the
+        influence in the 0.5-1.0 range.
         """
-        if memories:
-            # Analyze the content of important memories to extract influence
-            memory_content = " ".join([memory.content for memory in memories])
-            theme = self.extract_generic_theme(memory_content)
-            return {
-                "title": f"Destiny: {theme}",
-                "story": f"The character is heading toward a future influenced by {theme}.",
-                "influence": random.uniform(0.5, 1.0)  # Random influence within range
-            }
-        else:
-            # No important memories: return a default generic destiny
+        if not themes:
             return {"title": "Undefined Path", "story": "The character is moving through an unknown future."}
+        theme, weight = themes[0]
+        story = f"The character is heading toward a future influenced by {theme}"
+        if len(themes) > 1:
+            story += f", shaped along the way by {', '.join(label for label, _ in themes[1:])}"
+        return {"title": f"Destiny: {theme}", "story": f"{story}.", "influence": 0.5 + 0.5 * weight}
+
+    def generate_destiny_from_memories(self, memories):
+        """
+        Generate a generic destiny from an explicit list of important memories (Memory objects or dicts) by
+        clustering them into themes. Characters use generate_destiny_from_themes with the themes their memory
+        system maintains incrementally instead.
+        """
+        themes = BicaThemeClusterer(embedder=self.scorer.embedder)
+        for memory_id, memory in enumerate(memories or []):
+            importance = memory.get('importance', 1.0) if isinstance(memory, dict) else getattr(memory, 'importance', 1.0)
+            themes.add(memory_id, memory_text(memory), importance)
+        themes.assign_pending()
+        return self.generate_destiny_from_themes(themes.dominant_themes())
 
     # In BicaDestiny (destiny.py)
 
@@ -59,20 +88,6 @@ class BicaDestiny:
         }
 
 
-    def extract_generic_theme(self, memory_content):
-        """
-        Extracts a generic theme from the combined memory content. This function is flexible and adapts
-        based on any memory input without relying on predefined scenarios or specific terms.
-        """
-        if "change" in memory_content or "transformation" in memory_content:
-            return "Change"
-        elif "challenge" in memory_content or "difficulty" in memory_content:
-            return "Challenge"
-        elif "discovery" in memory_content:
-            return "Discovery"
-        else:
-            return "Uncertainty"
-
     def default_destiny_based_on_profile(self, profile):
         """
         Generates a default destiny based on the character's traits if no significant memories are available.
@@ -115,14 +130,52 @@ class BicaDestiny:
         summary = " ".join([memory['content'] for memory in relevant_memories])
         return {"title": "Memory Influence", "description": f"The character is shaped by: {summary[:100]}...", "weight": 0.8}
 
-    """
     # Core functionality methods
     def get_current_destiny_influence(self, memories, recent_conversations):
         current_destinies = self.get_destinies()
-        influence = self._calculate_influence_gpt(current_destinies, memories, recent_conversations)
+        if self.influence_mode == "local":
+            influence = self.scorer.score(current_destinies, memories, recent_conversations)
+        else:
+            influence = self._calculate_influence_gpt(current_destinies, memories, recent_conversations)
         print(f"Current destiny influence: {influence}")
         return self._normalize_influence(influence)
 
+    def simulate_destiny_distribution(self, memories=None, traits: Dict[str, float] = None) -> Dict[str, float]:
+        """
+        Probability of each destiny being where the character ends up, from Monte-Carlo rollouts over embeddings
+        (see BicaDestinySimulator). No LLM call is made.
+
+        :param memories: Memory objects or dicts with content and importance; defaults to the memory system's
+                         working, short-term and long-term memories
+        :param traits: Profile traits, e.g. profile["cognitiveModel"]["traits"]
+        """
+        current_destinies = self.get_destinies()
+        if not current_destinies:
+            return {}
+        if memories is None:
+            memories = [memory for memory_type in ("working_memory", "short_term_memory", "long_term_memory")
+                        for memory in getattr(self.memory_system, memory_type, [])]
+
+        texts, weights = [], []
+        for memory in memories:
+            text = memory_text(memory)
+            if text:
+                texts.append(text)
+                weights.append(memory.get('importance', 0.5) if isinstance(memory, dict)
+                               else getattr(memory, 'importance', 0.5))
+
+        traits = {name: float(value) for name, value in (traits or {}).items() if isinstance(value, (int, float))}
+        result = self.simulator.simulate(
+            self.scorer.destiny_matrix(current_destinies),
+            memory_vectors=self.scorer.embedder.encode(texts) if texts else None,
+            memory_weights=np.asarray(weights, dtype=np.float32) if texts else None,
+            trait_values=traits,
+            trait_vectors=self.scorer.embedder.encode([trait_text(name) for name in traits]) if traits else None,
+            destiny_priors=np.asarray([destiny.get('weight', 0.5) for destiny in current_destinies]))
+        distribution = {destiny['title']: float(p) for destiny, p in zip(current_destinies, result.probabilities)}
+        print(f"Simulated destiny distribution: {distribution} ({result.elapsed_ms:.1f} ms)")
+        return distribution
+
     def generate_destiny(self, is_initial=False, **kwargs):
         # Retrieve high-importance memories from memory system
         high_importance_memories_summary = self.memory_system.get_high_importance_memories()
@@ -420,22 +473,24 @@ class BicaDestiny:
 
     # File operations
     def _load_destinies(self):
-        destiny_file = os.path.join(os.path.dirname(__file__), '..', 'data', 'destinies', f"{self.character_name}_destinies.json")
-        if os.path.exists(destiny_file):
-            loaded_data = load_json_file(destiny_file)
-            self.destinies = loaded_data.get("destinies", [])
+        try:
+            self.destinies = self.store.load()
+        except (OSError, json.JSONDecodeError, sqlite3.Error) as e:
+            self.logger.error(f"Failed to load destinies for {self.character_name}: {str(e)}")
+            self.destinies = []
+        if self.destinies:
             self.logger.info(f"Loaded {len(self.destinies)} destinies for {self.character_name}")
-            print(f"Loaded destiny file contents: {json.dumps(loaded_data, indent=2)}")
+            print(f"Loaded {len(self.destinies)} destinies for {self.character_name}")
         else:
             self.logger.info(f"No existing destinies found for {self.character_name}")
 
     def _save_destinies(self):
-        destiny_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'destinies')
-        os.makedirs(destiny_dir, exist_ok=True)
-        file_path = os.path.join(destiny_dir, f"{self.character_name}_destinies.json")
-        destinies_dict = {"destinies": self.destinies}
-        save_json_file(destinies_dict, file_path)
-        self.logger.info(f"Saved {len(self.destinies)} destinies to {file_path}")
+        # Only the changes since the last save are journaled, and the write happens on the store's flush timer
+        self.store.record(self.destinies)
+
+    def close(self):
+        """Flush pending destiny changes and write a compact snapshot."""
+        self.store.close()
 
 
 def main():
@@ -492,8 +547,16 @@ def main():
     for title, value in influence.items():
         print(f"  {title}: {value:.2f}")
 
-    # Test 6: Alter Existing Destiny
-    print("\n6. Altering Existing Destiny:")
+    # Test 6: Simulate Destiny Trajectories
+    print("\n6. Simulating Destiny Trajectories:")
+    distribution = destiny.simulate_destiny_distribution(
+        memories=mock_memories['short_term_memory'],
+        traits={"openness": 0.8, "conscientiousness": 0.6, "curiosity": 0.9})
+    for title, probability in distribution.items():
+        print(f"  {title}: {probability:.2%}")
+
+    # Test 7: Alter Existing Destiny
+    print("\n7. Altering Existing Destiny:")
     if destinies:
         destiny.alter_destiny(
             0,  # Alter the first destiny
@@ -507,6 +570,7 @@ def main():
     final_destinies = destiny.get_destinies()
     for i, d in enumerate(final_destinies):
         print(f"{i}. {d.get('title', 'No title')}: {d.get('description', 'No description')} (Weight: {d.get('weight', 'No weight')})")
+    destiny.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,128 @@
+"""
+BicameralAGI Destiny Scoring Module
+===================================
+
+Overview:
+---------
+This module scores how strongly each destiny influences the current turn without an LLM call. Every destiny's title
+and description are embedded once and cached until the destiny text changes. The recent memories and conversation
+are embedded as one batch per turn, and the influence of a destiny is its recency-weighted cosine similarity to that
+context (similarities below `similarity_floor`, typical for unrelated texts, count as zero), scaled to the 0-5 range
+that BicaDestiny uses. The result goes through BicaDestiny._normalize_influence like the GPT-based scores did, so
+downstream consumers see the same shape.
+
+Usage:
+------
+    scorer = BicaDestinyScorer()
+    influence = scorer.score(destinies, recalled_memories, recent_conversations)  # {"Guardian": 3.1, ...}
+"""
+
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from bica.utils.embeddings import BicaEmbedder
+
+MAX_INFLUENCE = 5.0
+
+
+def destiny_text(destiny: Dict[str, Any]) -> str:
+    description = destiny.get('description') or destiny.get('story') or ""
+    return f"{destiny.get('title', '')}: {description}"
+
+
+def memory_text(memory: Any) -> str:
+    if isinstance(memory, dict):
+        return memory.get('content', "")
+    return getattr(memory, 'content', memory if isinstance(memory, str) else "")
+
+
+class BicaDestinyScorer:
+    def __init__(self, embedder: BicaEmbedder = None, max_memories: int = 5, max_conversations: int = 3,
+                 recency_decay: float = 0.8, similarity_floor: float = 0.2):
+        """
+        :param recency_decay: Weight multiplier per step back in time for the context texts
+        :param similarity_floor: Cosine similarity that maps to zero influence
+        """
+        self.embedder = embedder if embedder is not None else BicaEmbedder()
+        self.max_memories = max_memories
+        self.max_conversations = max_conversations
+        self.recency_decay = recency_decay
+        self.similarity_floor = similarity_floor
+        self._destiny_vectors: Dict[str, np.ndarray] = {}
+
+    def destiny_matrix(self, destinies: List[Dict[str, Any]]) -> np.ndarray:
+        """Embedding per destiny, encoding only destinies whose text is new or changed."""
+        texts = [destiny_text(destiny) for destiny in destinies]
+        missing = [text for text in dict.fromkeys(texts) if text not in self._destiny_vectors]
+        if missing:
+            for text, vector in zip(missing, self.embedder.encode(missing)):
+                self._destiny_vectors[text] = vector
+        # Forget destinies that were altered or wiped
+        if len(self._destiny_vectors) > len(texts):
+            current = set(texts)
+            self._destiny_vectors = {text: v for text, v in self._destiny_vectors.items() if text in current}
+        return np.stack([self._destiny_vectors[text] for text in texts])
+
+    def context_texts(self, memories: Any, recent_conversations: List[Dict[str, str]]) -> Tuple[List[str], np.ndarray]:
+        """Context texts (oldest first) and their recency weights."""
+        texts = []
+        if isinstance(memories, dict):
+            for memory_type in ("long_term_memory", "short_term_memory", "working_memory"):
+                texts += [memory_text(memory) for memory in (memories.get(memory_type) or [])[-self.max_memories:]]
+        elif isinstance(memories, (list, tuple)):
+            texts += [memory_text(memory) for memory in memories[-self.max_memories:]]
+        elif isinstance(memories, str) and memories.strip():
+            texts.append(memories)
+        for conversation in (recent_conversations or [])[-self.max_conversations:]:
+            texts.append(f"User: {conversation.get('user', '')} AI: {conversation.get('character', '')}")
+
+        texts = [text for text in texts if text]
+        weights = self.recency_decay ** np.arange(len(texts) - 1, -1, -1, dtype=np.float32)
+        return texts, weights
+
+    def score(self, destinies: List[Dict[str, Any]], memories: Any,
+              recent_conversations: List[Dict[str, str]]) -> Dict[str, float]:
+        """Raw influence per destiny title in [0, MAX_INFLUENCE], before normalization."""
+        if not destinies:
+            return {}
+        texts, weights = self.context_texts(memories, recent_conversations)
+        if not texts:
+            return {destiny['title']: 0.0 for destiny in destinies}
+
+        similarities = self.destiny_matrix(destinies) @ self.embedder.encode(texts).T  # (destinies, texts)
+        relevance = np.clip((similarities - self.similarity_floor) / (1.0 - self.similarity_floor), 0.0, 1.0)
+        relevance = relevance @ (weights / weights.sum())
+        return {destiny['title']: float(MAX_INFLUENCE * value) for destiny, value in zip(destinies, relevance)}
+
+
+def main():
+    import time
+
+    class HashingEmbedder:
+        """Bag-of-words hashing embedder, so the demo runs without downloading a model."""
+        def encode(self, texts):
+            single = isinstance(texts, str)
+            texts = [texts] if single else texts
+            vectors = np.zeros((len(texts), 256), dtype=np.float32)
+            for row, text in enumerate(texts):
+                for word in text.lower().split():
+                    vectors[row, hash(word.strip('.,!?:')) % 256] += 1.0
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+            return vectors[0] if single else vectors
+
+    destinies = [
+        {"title": "Climate Guardian", "description": "The AI will help humanity fight climate change", "weight": 0.8},
+        {"title": "Master Chef", "description": "The AI will cook meals and share recipes", "weight": 0.5},
+    ]
+    memories = {"short_term_memory": [{"content": "User asked about carbon emissions and climate change"}]}
+    conversations = [{"user": "How can AI help with climate change?", "character": "AI can model emissions."}]
+
+    scorer = BicaDestinyScorer(embedder=HashingEmbedder())
+    start = time.perf_counter()
+    influence = scorer.score(destinies, memories, conversations)
+    print(f"Influence: {influence} ({(time.perf_counter() - start) * 1000:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
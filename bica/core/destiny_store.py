@@ -0,0 +1,305 @@
+"""
+BicameralAGI Destiny Store Module
+=================================
+
+Overview:
+---------
+This module persists a character's destinies without rewriting the whole destinies file on every change. Changes are
+recorded as small operations (add, set, clear, replace) in an in-memory buffer and appended in batches to a JSONL
+journal next to the snapshot file. The flush is debounced and runs on a timer thread, off the request path. After
+`compact_every` journaled operations the store writes a fresh snapshot and truncates the journal. Snapshots are written
+to a temporary file and renamed into place, so a crash never leaves a half-written snapshot. On load the snapshot is
+read and the journal replayed. A torn last journal line (a crash during an append) is cut off under the file lock
+before anything else is appended, and a line that does not parse is skipped, so replay always continues past it.
+Every operation carries a sequence number and the snapshot stores the last one it contains, so operations that are
+already in the snapshot are skipped if a crash happens between writing a snapshot and truncating the journal.
+
+Several writers can share one destinies file. Within a process, every BicaDestinyStore for the same path shares one
+journal, so sequence numbers are never handed out twice; each store still diffs against the list it loaded or last
+recorded, so two sessions that each add a destiny both keep theirs. Across processes, journal appends and compactions
+hold an exclusive lock on `<name>_destinies.lock` and first replay whatever other processes wrote since, and pending
+operations are numbered only then.
+
+Key Features:
+-------------
+1. Operations are derived by diffing against the last recorded list, so callers just hand over the current destinies
+2. Debounced, batched journal appends (at most one flush per `flush_interval` seconds)
+3. Periodic compaction into an atomic snapshot (temp file + os.replace) in the existing {"destinies": [...]} format
+4. Crash-tolerant replay of snapshot + journal
+5. Safe for several stores on the same file, in one process or several
+
+Usage:
+------
+    store = BicaDestinyStore("bica/data/destinies/Tron_destinies.json")
+    destinies = store.load()
+    destinies.append({"title": "Guardian", "description": "...", "weight": 0.7})
+    store.record(destinies)   # returns immediately; the journal append happens on the flush timer
+    store.close()             # flush and compact
+"""
+
+import copy
+import json
+import os
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from bica.utils.bica_logging import BicaLogging
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, stores in one process are still shared
+    fcntl = None
+
+# One logger for all stores: BicaLogging adds a file handler per instance
+logger = BicaLogging("BicaDestinyStore")
+
+
+class _DestinyJournal:
+    """Snapshot + journal state of one destinies file, shared by every BicaDestinyStore on that path."""
+
+    def __init__(self, snapshot_path: str, flush_interval: float, compact_every: int):
+        self.snapshot_path = snapshot_path
+        self.journal_path = os.path.splitext(snapshot_path)[0] + ".journal"
+        self.lock_path = os.path.splitext(snapshot_path)[0] + ".lock"
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+
+        self.lock = threading.RLock()
+        self.destinies: List[Dict[str, Any]] = []  # On-disk state plus pending operations
+        self._committed: List[Dict[str, Any]] = []  # On-disk state as last read or written by this process
+        self._pending: List[Dict[str, Any]] = []
+        self._sequence = 0
+        self._journal_offset = 0  # Bytes of the journal already replayed
+        self._journal_length = 0
+        self._snapshot_stat = None
+        self._loaded = False
+        self._timer: Optional[threading.Timer] = None
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(self.lock_path) or '.', exist_ok=True)
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    @staticmethod
+    def _stat(path: str):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    # Reading the files
+    def _catch_up(self):
+        """Bring the committed state up to date with the files; called with both locks held."""
+        snapshot_stat = self._stat(self.snapshot_path)
+        journal_size = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+        if not self._loaded or snapshot_stat != self._snapshot_stat or journal_size < self._journal_offset:
+            # First load, or another process compacted: start over from the snapshot
+            self._committed, self._sequence = [], 0
+            if snapshot_stat is not None:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as snapshot_file:
+                    snapshot = json.load(snapshot_file)
+                self._committed = snapshot.get("destinies", [])
+                self._sequence = snapshot.get("sequence", 0)
+            self._snapshot_stat = snapshot_stat
+            self._journal_offset = self._journal_length = 0
+            self._loaded = True
+
+        if journal_size > self._journal_offset:
+            torn_at = None
+            with open(self.journal_path, 'rb') as journal_file:
+                journal_file.seek(self._journal_offset)
+                for line in journal_file:
+                    if not line.endswith(b'\n'):
+                        # Every append ends with a newline, so this is a write cut short by a crash
+                        torn_at = self._journal_offset
+                        break
+                    self._journal_offset += len(line)
+                    try:
+                        operation = json.loads(line)
+                    except ValueError:
+                        logger.warning(f"Skipping unreadable journal entry in {self.journal_path}")
+                        continue
+                    self._journal_length += 1
+                    if operation.get("sequence", 0) > self._sequence:
+                        _apply(self._committed, operation)
+                        self._sequence = operation["sequence"]
+            # Without a file lock another process may still be writing that line, so it is only cut off under one
+            if torn_at is not None and fcntl is not None:
+                logger.warning(f"Truncating torn journal entry in {self.journal_path}")
+                with open(self.journal_path, 'r+b') as journal_file:
+                    journal_file.truncate(torn_at)
+
+        self.destinies = copy.deepcopy(self._committed)
+        for operation in self._pending:
+            _apply(self.destinies, copy.deepcopy(operation))
+
+    def load(self) -> List[Dict[str, Any]]:
+        with self.lock, self._file_lock():
+            self._catch_up()
+            return copy.deepcopy(self.destinies)
+
+    # Recording changes
+    def enqueue(self, operations: List[Dict[str, Any]]):
+        with self.lock:
+            for operation in operations:
+                _apply(self.destinies, copy.deepcopy(operation))
+            self._pending.extend(operations)
+
+            if self.flush_interval <= 0:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    # Persistence
+    def flush(self):
+        """Append all pending operations to the journal in one write, compacting when the journal is long."""
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            try:
+                with self._file_lock():
+                    self._catch_up()
+                    # Numbered only now, after the operations of other processes were replayed
+                    for offset, operation in enumerate(self._pending, start=1):
+                        operation["sequence"] = self._sequence + offset
+                    os.makedirs(os.path.dirname(self.journal_path) or '.', exist_ok=True)
+                    with open(self.journal_path, 'ab') as journal_file:
+                        journal_file.write("".join(json.dumps(operation, separators=(',', ':'), ensure_ascii=False)
+                                                   + "\n" for operation in self._pending).encode('utf-8'))
+                        self._journal_offset = journal_file.tell()
+                    for operation in self._pending:
+                        _apply(self._committed, copy.deepcopy(operation))
+                    self._sequence += len(self._pending)
+                    self._journal_length += len(self._pending)
+                    self._pending.clear()
+                    if self._journal_length >= self.compact_every:
+                        self._compact()
+            except OSError as e:
+                logger.error(f"Failed to append to destiny journal {self.journal_path}: {str(e)}")
+
+    def compact(self):
+        with self.lock:
+            self.flush()
+            with self._file_lock():
+                self._catch_up()
+                self._compact()
+
+    def _compact(self):
+        """Write the committed destinies as a new snapshot (atomically) and truncate the journal; both locks held."""
+        os.makedirs(os.path.dirname(self.snapshot_path) or '.', exist_ok=True)
+        temp_path = f"{self.snapshot_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as snapshot_file:
+            json.dump({"destinies": self._committed, "sequence": self._sequence}, snapshot_file,
+                      separators=(',', ':'), ensure_ascii=False)
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        # Journal entries up to `sequence` are now in the snapshot and would be skipped on replay anyway
+        open(self.journal_path, 'w').close()
+        self._snapshot_stat = self._stat(self.snapshot_path)
+        self._journal_offset = self._journal_length = 0
+        logger.info(f"Compacted {len(self._committed)} destinies into {self.snapshot_path}")
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            with self._file_lock():
+                self._catch_up()
+                if self._journal_length or not os.path.exists(self.snapshot_path):
+                    self._compact()
+
+
+def _apply(destinies: List[Dict[str, Any]], operation: Dict[str, Any]):
+    op = operation["op"]
+    if op == "add":
+        destinies.append(operation["destiny"])
+    elif op == "set":
+        if operation["index"] < len(destinies):
+            destinies[operation["index"]] = operation["destiny"]
+        else:  # The list was shortened by another writer
+            destinies.append(operation["destiny"])
+    elif op == "clear":
+        destinies.clear()
+    elif op == "replace":
+        destinies[:] = operation["destinies"]
+
+
+_journals: "weakref.WeakValueDictionary[str, _DestinyJournal]" = weakref.WeakValueDictionary()
+_journals_lock = threading.Lock()
+
+
+def _shared_journal(snapshot_path: str, flush_interval: float, compact_every: int) -> _DestinyJournal:
+    key = os.path.normcase(os.path.abspath(snapshot_path))
+    with _journals_lock:
+        journal = _journals.get(key)
+        if journal is None:
+            journal = _DestinyJournal(snapshot_path, flush_interval, compact_every)
+            _journals[key] = journal
+        return journal
+
+
+class BicaDestinyStore:
+    def __init__(self, snapshot_path: str, flush_interval: float = 1.0, compact_every: int = 200):
+        """
+        :param flush_interval: Seconds to wait after the first unflushed change before appending to the journal;
+                               0 flushes synchronously in record(). The first store opened on a path sets it.
+        :param compact_every: Journaled operations after which a new snapshot is written and the journal truncated
+        """
+        self._journal = _shared_journal(snapshot_path, flush_interval, compact_every)
+        self.snapshot_path = self._journal.snapshot_path
+        self.journal_path = self._journal.journal_path
+        self._base: List[Dict[str, Any]] = []  # What this store last loaded or recorded
+
+    # Loading
+    def load(self) -> List[Dict[str, Any]]:
+        destinies = self._journal.load()
+        self._base = copy.deepcopy(destinies)
+        return destinies
+
+    # Recording changes
+    def _diff(self, destinies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        previous = self._base
+        if not destinies:
+            return [{"op": "clear"}] if previous else []
+        if len(destinies) < len(previous):
+            return [{"op": "replace", "destinies": destinies}]
+        operations = [{"op": "set", "index": index, "destiny": destiny}
+                      for index, destiny in enumerate(destinies[:len(previous)]) if destiny != previous[index]]
+        operations += [{"op": "add", "destiny": destiny} for destiny in destinies[len(previous):]]
+        return operations
+
+    def record(self, destinies: List[Dict[str, Any]]):
+        """Record the current list of destinies; only the differences to the last recorded list are journaled."""
+        operations = self._diff(destinies)
+        if not operations:
+            return
+        self._base = copy.deepcopy(destinies)
+        self._journal.enqueue(copy.deepcopy(operations))
+
+    # Persistence
+    def flush(self):
+        self._journal.flush()
+
+    def compact(self):
+        """Write the current destinies as a new snapshot (atomically) and truncate the journal."""
+        self._journal.compact()
+
+    def close(self):
+        """Flush and compact. Other stores on the same path stay usable."""
+        self._journal.close()
@@ -1,26 +1,38 @@
 from typing import List, Dict
+import itertools
 import time
 import random
 from collections import Counter
 from bica.external.gpt_handler import GPTHandler
 from bica.core.profile import BicaProfile
+from bica.core.memory_decay import MemoryDecay
+from bica.core.memory_search import BM25Index, VectorIndex, reciprocal_rank_fusion
+from bica.core.memory_themes import BicaThemeClusterer
+from bica.utils.embeddings import BicaEmbedder
 from bica.utils.utilities import normalize_text
 
+HIGH_IMPORTANCE_THRESHOLD = 0.7
+
 
 class Memory:
+    _id_counter = itertools.count()
+
     def __init__(self, content: str, importance: float):
+        self.memory_id = next(Memory._id_counter)
         self.content = content
         self.importance = importance
         self.timestamp = time.time()
+        self.active = True
 
     def __str__(self):
         return f"Memory(content='{self.content[:50]}...', importance={self.importance:.2f})"
 
 
 class BicaMemory:
-    def __init__(self, character_profile: BicaProfile, debug_mode: bool):
+    def __init__(self, character_profile: BicaProfile, debug_mode: bool, vector_index: VectorIndex = None,
+                 gpt_handler: GPTHandler = None):
         self.debug_mode = debug_mode
-        self.gpt_handler = GPTHandler()
+        self.gpt_handler = gpt_handler if gpt_handler is not None else GPTHandler()
         self.profile = character_profile
         # self.base_emotions = self.profile.character_profile['cognitiveModel']['emotions']
 
@@ -29,6 +41,19 @@ class BicaMemory:
         self.long_term_memory = []
         self.self_memory = self.initialize_self_memory()
 
+        # Every memory that lives in one of the layers above, keyed by memory_id
+        self._memories_by_id: Dict[int, Memory] = {}
+        self.decay = MemoryDecay()
+
+        # Local retrieval indexes; embeddings are computed in batches the first time vector recall needs them.
+        # Pass a QuantizedVectorIndex as vector_index to trade a little recall for much less embedding RAM.
+        self.keyword_index = BM25Index()
+        self.vector_index = vector_index if vector_index is not None else VectorIndex()
+        self.embedder = BicaEmbedder()
+        self._pending_embeddings: Dict[int, str] = {}
+        # High-importance memories grouped into themes as they arrive; see get_dominant_themes
+        self.themes = BicaThemeClusterer(embedder=self.embedder)
+
     def initialize_self_memory(self):
         return f"I am {self.profile.character_name}. My Description: {self.profile.character_summary}"
 
@@ -63,6 +88,8 @@ class BicaMemory:
 
         new_memory_content = f"User: {context_data['user_input']}\nContext: {context_data['updated_context']}"
         new_memory = Memory(content=new_memory_content, importance=importance)
+        self._register_memory(new_memory)
+        previous_short_term = self.short_term_memory
 
         if importance > 0.7:
             self.working_memory.append(new_memory)
@@ -77,8 +104,127 @@ class BicaMemory:
                 self.long_term_memory.append(oldest_memory)
             self.short_term_memory.remove(oldest_memory)
 
-    def get_memories(self):
-        relevant_long_term_memories = self.get_relevant_long_term_memories()
+        # Memories that fell out of short-term memory and are not kept anywhere else are forgotten
+        kept_ids = {m.memory_id for m in self.short_term_memory + self.working_memory + self.long_term_memory}
+        for memory in previous_short_term + [new_memory]:
+            if memory.memory_id not in kept_ids:
+                self._forget_memory(memory)
+
+        self.decay_active_memories()
+        # Runs in the background update, so theme reads on the turn path find everything assigned
+        self.themes.assign_pending()
+
+    def _register_memory(self, memory: Memory):
+        self._memories_by_id[memory.memory_id] = memory
+        self.decay.add(memory.memory_id, memory.timestamp, memory.importance)
+        self.keyword_index.add(memory.memory_id, memory.content)
+        self._pending_embeddings[memory.memory_id] = memory.content
+        if memory.importance >= HIGH_IMPORTANCE_THRESHOLD:
+            self.themes.add(memory.memory_id, memory.content, memory.importance)
+
+    def _forget_memory(self, memory: Memory):
+        self._memories_by_id.pop(memory.memory_id, None)
+        self.decay.remove(memory.memory_id)
+        self.keyword_index.remove(memory.memory_id)
+        self.vector_index.remove(memory.memory_id)
+        self._pending_embeddings.pop(memory.memory_id, None)
+        self.themes.remove(memory.memory_id)
+
+    def export_state(self) -> Dict:
+        """JSON-serializable snapshot of the memory layers; indexes are rebuilt on load."""
+        memories = {}
+        for memory in self.working_memory + self.short_term_memory + self.long_term_memory:
+            memories[memory.memory_id] = {"content": memory.content, "importance": memory.importance,
+                                          "timestamp": memory.timestamp, "active": memory.active}
+        return {
+            "memories": {str(memory_id): data for memory_id, data in memories.items()},
+            "working_memory": [m.memory_id for m in self.working_memory],
+            "short_term_memory": [m.memory_id for m in self.short_term_memory],
+            "long_term_memory": [m.memory_id for m in self.long_term_memory],
+        }
+
+    def load_state(self, state: Dict):
+        """Replace the memory layers with an exported snapshot. Memories get fresh ids in this process."""
+        for memory in list(self._memories_by_id.values()):
+            self._forget_memory(memory)
+        restored = {}
+        for memory_id, data in state.get("memories", {}).items():
+            memory = Memory(content=data["content"], importance=data["importance"])
+            memory.timestamp = data["timestamp"]
+            memory.active = data.get("active", True)
+            self._register_memory(memory)
+            restored[int(memory_id)] = memory
+        self.working_memory = [restored[memory_id] for memory_id in state.get("working_memory", [])]
+        self.short_term_memory = [restored[memory_id] for memory_id in state.get("short_term_memory", [])]
+        self.long_term_memory = [restored[memory_id] for memory_id in state.get("long_term_memory", [])]
+
+    def _embed_pending_memories(self):
+        if not self._pending_embeddings:
+            return
+        memory_ids = list(self._pending_embeddings)
+        vectors = self.embedder.encode([self._pending_embeddings[memory_id] for memory_id in memory_ids])
+        self.vector_index.add_batch(memory_ids, vectors)
+        self._pending_embeddings.clear()
+
+    def recall_memory(self, query: str, top_k: int = 5, mode: str = "hybrid") -> List[Memory]:
+        """
+        Recall the memories most relevant to `query` without an LLM call.
+
+        :param mode: "keyword" uses the BM25 index only (exact names and numbers, sub-millisecond),
+                     "vector" uses embedding similarity only, "hybrid" fuses both with reciprocal-rank fusion
+        """
+        candidates = top_k * 4
+        rankings = []
+        if mode in ("keyword", "hybrid"):
+            rankings.append(self.keyword_index.search(query, candidates))
+        if mode in ("vector", "hybrid"):
+            self._embed_pending_memories()
+            rankings.append(self.vector_index.search(self.embedder.encode(query), candidates))
+        if not rankings:
+            raise ValueError(f"Unknown recall mode: {mode}")
+
+        ranked = rankings[0] if len(rankings) == 1 else reciprocal_rank_fusion(rankings, top_k=candidates)
+        recalled = []
+        for memory_id, _ in ranked:
+            memory = self._memories_by_id.get(memory_id)
+            if memory is not None and memory.active:
+                recalled.append(memory)
+                self.decay.refresh(memory_id)
+            if len(recalled) == top_k:
+                break
+        return recalled
+
+    def add_long_term_memory(self, memory: Memory):
+        self._register_memory(memory)
+        self.long_term_memory.append(memory)
+
+    def get_activation(self, memory: Memory) -> float:
+        """Current decayed activation of a memory, computed lazily from its timestamp and importance."""
+        return self.decay.activation(memory.memory_id)
+
+    def decay_active_memories(self, force: bool = False) -> List[Memory]:
+        """
+        Deactivate every memory whose activation has faded below the decay threshold.
+        The check is a single vectorized pass over the whole store and only runs once per sweep interval
+        unless `force` is set. Returns the memories that were deactivated by this call.
+        """
+        faded_ids = self.decay.deactivate() if force else self.decay.maybe_deactivate()
+        faded = [self._memories_by_id[memory_id] for memory_id in faded_ids.tolist() if memory_id in self._memories_by_id]
+        for memory in faded:
+            memory.active = False
+        if self.debug_mode and faded:
+            print(f"Deactivated {len(faded)} memories due to decay")
+        return faded
+
+    def get_memories(self, local_query: str = None):
+        """
+        :param local_query: When given, long-term memories are ranked locally against it (see
+                            get_local_relevant_long_term_memories) instead of with a GPT call
+        """
+        if local_query is None:
+            relevant_long_term_memories = self.get_relevant_long_term_memories()
+        else:
+            relevant_long_term_memories = self.get_local_relevant_long_term_memories(local_query)
         if self.debug_mode:
             print(f"Working Memory: {self.working_memory}")
             print(f"Short Term Memory: {self.short_term_memory}")
@@ -97,8 +243,7 @@ class BicaMemory:
         Extract and return high-importance memories from working, short-term, and long-term memory.
         Returns a summary of high-importance memories.
         """
-        # Define importance threshold for high-importance memories
-        threshold = 0.7
+        threshold = HIGH_IMPORTANCE_THRESHOLD
 
         # Collect high-importance memories from all memory types
         high_importance_memories = [
@@ -119,8 +264,17 @@ class BicaMemory:
         return summary or "No high-importance memories found."
 
 
+    def get_dominant_themes(self, top_k: int = 3):
+        """
+        The heaviest themes among the high-importance memories as [(label, weight), ...], weights summing to at
+        most 1. Themes are maintained incrementally, so this does not rescan memories.
+        """
+        self.themes.assign_pending()  # No-op unless memories were added outside update_memories
+        return self.themes.dominant_themes(top_k)
+
     def get_relevant_long_term_memories(self):
-        if not self.long_term_memory:
+        active_long_term_memory = [m for m in self.long_term_memory if m.active]
+        if not active_long_term_memory:
             return []
 
         context = f"Working Memory: {[m.content for m in self.working_memory]}\n" \
@@ -131,7 +285,7 @@ class BicaMemory:
         {context}
 
         Analyze the following long-term memories and select the 5 most relevant ones:
-        {[m.content for m in self.long_term_memory]}
+        {[m.content for m in active_long_term_memory]}
 
         Provide the indices of the 5 most relevant memories, separated by commas.
         """
@@ -143,7 +297,17 @@ class BicaMemory:
             print("Warning: No relevant long-term memories found.")
             return []
 
-        return [self.long_term_memory[idx] for idx in relevant_indices if idx < len(self.long_term_memory)]
+        return [active_long_term_memory[idx] for idx in relevant_indices if idx < len(active_long_term_memory)]
+
+    def get_local_relevant_long_term_memories(self, query: str, top_k: int = 5) -> List[Memory]:
+        """Cheap stand-in for get_relevant_long_term_memories: BM25 score first, decayed activation second."""
+        active_long_term_memory = [m for m in self.long_term_memory if m.active]
+        if not active_long_term_memory:
+            return []
+        scores = dict(self.keyword_index.search(query, len(self._memories_by_id)))
+        ranked = sorted(active_long_term_memory,
+                        key=lambda m: (scores.get(m.memory_id, 0.0), self.get_activation(m)), reverse=True)
+        return ranked[:top_k]
 
     def text_similarity(self, text1: str, text2: str) -> float:
         return len(set(normalize_text(text1).split()) & set(normalize_text(text2).split())) / len(set(normalize_text(text1).split() + normalize_text(text2).split()))
@@ -175,30 +339,11 @@ class BicaMemory:
                 self.short_term_layer3.remove(memory)
                 self.long_term_memories.append(memory)
 
-    def recall_memory(self, query: str, top_k: int = 5) -> List[Memory]:
-        all_memories = self.short_term_layer1 + self.short_term_layer2 + self.short_term_layer3 + self.long_term_memories
-        similarities = [(memory, self.text_similarity(query, memory.content)) for memory in all_memories]
-        top_memories = sorted(similarities, key=lambda x: x[1], reverse=True)[:top_k]
-        return [memory for memory, _ in top_memories]
-
-    def text_similarity(self, text1: str, text2: str) -> float:
-        return len(set(normalize_text(text1).split()) & set(normalize_text(text2).split())) / len(set(normalize_text(text1).split() + normalize_text(text2).split()))
-
     def get_recent_memories(self, n: int) -> List[str]:
         all_memories = self.short_term_layer1 + self.short_term_layer2 + self.short_term_layer3
         sorted_memories = sorted(all_memories, key=lambda x: x.timestamp, reverse=True)
         return [memory.content for memory in sorted_memories[:n]]
 
-    def decay_active_memories(self, decay_rate: float = 0.1):
-        current_time = time.time()
-        for layer in [self.short_term_layer1, self.short_term_layer2, self.short_term_layer3, self.long_term_memories]:
-            for memory in layer:
-                if memory.active:
-                    memory_age = current_time - memory.timestamp
-                    if random.random() < decay_rate * memory_age / 3600:  # Probability increases with age
-                        memory.active = False
-                        print(f"Memory deactivated due to decay: {memory.content[:30]}...")
-
     def get_emotional_memories(self, emotion: str, threshold: float = 0.5) -> List[Memory]:
         return [m for layer in [self.short_term_layer1, self.short_term_layer2, self.short_term_layer3, self.long_term_memories]
                 for m in layer if m.emotions.get(emotion, 0) >= threshold]
@@ -276,7 +421,7 @@ def main():
         "Last week, the user talked about their recent trip to Japan."
     ]
     for memory in long_term_memories:
-        memory_system.long_term_memory.append(Memory(memory, importance=0.5))
+        memory_system.add_long_term_memory(Memory(memory, importance=0.5))
 
     print("Added diverse long-term memories.")
 
@@ -315,6 +460,19 @@ def main():
                 else:
                     print(f"  - {memory[:100]}...")
 
+    print("\n===== Testing Keyword Recall =====")
+    for query in ["What is my favorite color?", "secret code 1234"]:
+        start = time.perf_counter()
+        recalled = memory_system.recall_memory(query, top_k=3, mode="keyword")
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{query} ({elapsed:.3f} ms):")
+        for memory in recalled:
+            print(f"  - {memory.content[:100]}... (Importance: {memory.importance:.2f})")
+
+    print("\nHybrid recall:")
+    for memory in memory_system.recall_memory("What pets does the user have?", top_k=3):
+        print(f"  - {memory.content[:100]}... (Importance: {memory.importance:.2f})")
+
     print("\n===== Memory System Test Complete =====")
 
 
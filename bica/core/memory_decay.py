@@ -0,0 +1,187 @@
+"""
+BicameralAGI Memory Decay Module
+================================
+
+Overview:
+---------
+This module keeps track of how "active" each memory of the BicameralAGI system still is. Instead of visiting every
+memory on every tick, the store only keeps the timestamp and importance of each memory in flat NumPy columns.
+Activation is a closed-form exponential decay that is evaluated lazily whenever somebody reads it, and faded memories
+are deactivated in periodic batches with a single vectorized pass over the whole store.
+
+Key Features:
+-------------
+1. Lazy activation: 2 ** (-age / half_life), where the half-life grows with the importance of the memory
+2. Amortized O(1) registration and removal of memories (freed slots are reused)
+3. Batch deactivation of the full store in one NumPy pass, throttled to a configurable interval
+4. Refreshing a memory when it is recalled, which restarts its decay
+
+Usage:
+------
+    decay = MemoryDecay(base_half_life=3600)
+    decay.add(memory.memory_id, memory.timestamp, memory.importance)
+    print(decay.activation(memory.memory_id))
+    faded_ids = decay.maybe_deactivate()
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class MemoryDecay:
+    def __init__(self, base_half_life: float = 3600.0, importance_boost: float = 4.0, threshold: float = 0.1,
+                 sweep_interval: float = 60.0, initial_capacity: int = 64):
+        """
+        :param base_half_life: Half-life in seconds of a memory with importance 0
+        :param importance_boost: A memory with importance 1 lives (1 + importance_boost) times longer
+        :param threshold: Activation below which a memory gets deactivated by a sweep
+        :param sweep_interval: Minimum number of seconds between two batch deactivation passes
+        :param initial_capacity: Number of slots allocated up front (the arrays double when full)
+        """
+        self.base_half_life = base_half_life
+        self.importance_boost = importance_boost
+        self.threshold = threshold
+        self.sweep_interval = sweep_interval
+
+        self._timestamps = np.zeros(initial_capacity, dtype=np.float64)
+        self._importance = np.zeros(initial_capacity, dtype=np.float32)
+        self._ids = np.full(initial_capacity, -1, dtype=np.int64)
+        self._alive = np.zeros(initial_capacity, dtype=bool)
+        self._active = np.zeros(initial_capacity, dtype=bool)
+
+        self._slots: Dict[int, int] = {}
+        self._free_slots: List[int] = []
+        self._high_water = 0
+        self._last_sweep = time.time()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, memory_id: int):
+        return memory_id in self._slots
+
+    # Store maintenance
+    def add(self, memory_id: int, timestamp: float, importance: float):
+        if memory_id in self._slots:
+            slot = self._slots[memory_id]
+        elif self._free_slots:
+            slot = self._free_slots.pop()
+        else:
+            if self._high_water == len(self._ids):
+                self._grow()
+            slot = self._high_water
+            self._high_water += 1
+
+        self._slots[memory_id] = slot
+        self._ids[slot] = memory_id
+        self._timestamps[slot] = timestamp
+        self._importance[slot] = importance
+        self._alive[slot] = True
+        self._active[slot] = True
+
+    def remove(self, memory_id: int):
+        slot = self._slots.pop(memory_id, None)
+        if slot is None:
+            return
+        self._alive[slot] = False
+        self._active[slot] = False
+        self._ids[slot] = -1
+        self._free_slots.append(slot)
+
+    def refresh(self, memory_id: int, timestamp: Optional[float] = None):
+        """Restart the decay of a memory, e.g. because it was just recalled."""
+        slot = self._slots.get(memory_id)
+        if slot is None:
+            return
+        self._timestamps[slot] = time.time() if timestamp is None else timestamp
+        self._active[slot] = True
+
+    def _grow(self):
+        capacity = max(1, len(self._ids)) * 2
+        self._timestamps = self._resize(self._timestamps, capacity, 0.0)
+        self._importance = self._resize(self._importance, capacity, 0.0)
+        self._ids = self._resize(self._ids, capacity, -1)
+        self._alive = self._resize(self._alive, capacity, False)
+        self._active = self._resize(self._active, capacity, False)
+
+    @staticmethod
+    def _resize(array: np.ndarray, capacity: int, fill) -> np.ndarray:
+        resized = np.full(capacity, fill, dtype=array.dtype)
+        resized[:len(array)] = array
+        return resized
+
+    # Activation
+    def _half_lives(self, importance: np.ndarray) -> np.ndarray:
+        return self.base_half_life * (1.0 + self.importance_boost * importance)
+
+    def _activation(self, timestamps, importance, now: float):
+        age = np.maximum(now - timestamps, 0.0)
+        return np.exp2(-age / self._half_lives(importance))
+
+    def activation(self, memory_id: int, now: Optional[float] = None) -> float:
+        """Current activation of a single memory in [0, 1]; 0.0 for unknown or deactivated memories."""
+        slot = self._slots.get(memory_id)
+        if slot is None or not self._active[slot]:
+            return 0.0
+        now = time.time() if now is None else now
+        return float(self._activation(self._timestamps[slot], self._importance[slot], now))
+
+    def activations(self, now: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Memory ids and activations of every active memory in the store."""
+        now = time.time() if now is None else now
+        mask = self._active[:self._high_water]
+        values = self._activation(self._timestamps[:self._high_water][mask],
+                                  self._importance[:self._high_water][mask], now)
+        return self._ids[:self._high_water][mask], values
+
+    def is_active(self, memory_id: int) -> bool:
+        slot = self._slots.get(memory_id)
+        return slot is not None and bool(self._active[slot])
+
+    # Batch deactivation
+    def deactivate(self, now: Optional[float] = None) -> np.ndarray:
+        """Deactivate every memory whose activation fell below the threshold and return their ids."""
+        now = time.time() if now is None else now
+        self._last_sweep = now
+        n = self._high_water
+        activation = self._activation(self._timestamps[:n], self._importance[:n], now)
+        faded = self._active[:n] & (activation < self.threshold)
+        self._active[:n] &= ~faded
+        return self._ids[:n][faded]
+
+    def maybe_deactivate(self, now: Optional[float] = None) -> np.ndarray:
+        """Run `deactivate` only if the sweep interval has elapsed since the last pass."""
+        now = time.time() if now is None else now
+        if now - self._last_sweep < self.sweep_interval:
+            return np.empty(0, dtype=np.int64)
+        return self.deactivate(now)
+
+
+def main():
+    print("===== MemoryDecay Test =====")
+    decay = MemoryDecay(base_half_life=60.0, sweep_interval=0.0)
+    now = time.time()
+    n = 1_000_000
+    rng = np.random.default_rng(0)
+    ages = rng.uniform(0, 3600, n)
+    importance = rng.uniform(0, 1, n)
+
+    start = time.perf_counter()
+    for memory_id in range(n):
+        decay.add(memory_id, now - ages[memory_id], importance[memory_id])
+    print(f"Registered {len(decay)} memories in {time.perf_counter() - start:.2f}s")
+
+    print(f"Activation of memory 0 (age {ages[0]:.0f}s, importance {importance[0]:.2f}): {decay.activation(0, now):.4f}")
+
+    start = time.perf_counter()
+    faded = decay.deactivate(now)
+    print(f"Deactivated {len(faded)} memories in one pass ({(time.perf_counter() - start) * 1000:.1f} ms)")
+
+    ids, values = decay.activations(now)
+    print(f"{len(ids)} memories still active, mean activation {values.mean():.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+BicameralAGI Memory Search Module
+=================================
+
+Overview:
+---------
+This module provides the local retrieval indexes used by BicaMemory to recall memories without asking GPT.
+Keyword recall is served by an incrementally maintained BM25 inverted index, semantic recall by a dense vector index
+over sentence embeddings, and both rankings can be merged with reciprocal-rank fusion.
+
+Key Features:
+-------------
+1. BM25Index: inverted index with O(len(memory)) insertion and removal, queries only touch matching postings
+2. VectorIndex: contiguous float32 embedding matrix with exact top-k by dot product
+3. QuantizedVectorIndex: int8 or binary (sign-bit, Hamming) first pass with exact float32 re-scoring of a shortlist
+4. reciprocal_rank_fusion: rank-based fusion of any number of result lists
+
+Usage:
+------
+    keyword_index = BM25Index()
+    keyword_index.add(memory.memory_id, memory.content)
+    hits = keyword_index.search("secret code 1234", top_k=5)  # [(memory_id, score), ...]
+
+    fused = reciprocal_rank_fusion([hits, vector_hits], top_k=5)
+"""
+
+import math
+import os
+import re
+import tempfile
+import weakref
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bica.utils.utilities import normalize_text
+
+SearchResults = List[Tuple[int, float]]
+
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r'\w+', normalize_text(text))
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the `top_k` highest scores, best first, without fully sorting the array."""
+    if top_k <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.int64)
+    if top_k < len(scores):
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_terms: Dict[int, Counter] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def __contains__(self, doc_id: int):
+        return doc_id in self.doc_lengths
+
+    def add(self, doc_id: int, text: str):
+        if doc_id in self.doc_lengths:
+            self.remove(doc_id)
+        terms = Counter(tokenize(text))
+        for term, frequency in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = frequency
+        self.doc_terms[doc_id] = terms
+        self.doc_lengths[doc_id] = sum(terms.values())
+        self.total_length += self.doc_lengths[doc_id]
+
+    def remove(self, doc_id: int):
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self.postings[term]
+            del posting[doc_id]
+            if not posting:
+                del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(doc_id)
+
+    def idf(self, term: str) -> float:
+        document_frequency = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self) - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def search(self, query: str, top_k: int = 5) -> SearchResults:
+        if not self.doc_lengths:
+            return []
+        average_length = self.total_length / len(self.doc_lengths)
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = self.idf(term)
+            for doc_id, frequency in posting.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+
+class VectorIndex:
+    def __init__(self, dimension: Optional[int] = None, initial_capacity: int = 64):
+        self.dimension = dimension
+        self._capacity = initial_capacity
+        self._vectors: Optional[np.ndarray] = None
+        self._ids = np.full(initial_capacity, -1, dtype=np.int64)
+        self._slots: Dict[int, int] = {}
+        self._free_slots: List[int] = []
+        self._high_water = 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, doc_id: int):
+        return doc_id in self._slots
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of embedding data held in RAM."""
+        return 0 if self._vectors is None else self._vectors.nbytes
+
+    # Storage hooks, overridden by QuantizedVectorIndex
+    def _allocate_storage(self, capacity: int):
+        self._vectors = np.zeros((capacity, self.dimension), dtype=np.float32)
+
+    def _grow_storage(self, capacity: int):
+        vectors = np.zeros((capacity, self.dimension), dtype=np.float32)
+        vectors[:len(self._vectors)] = self._vectors
+        self._vectors = vectors
+
+    def _store(self, slots: np.ndarray, vectors: np.ndarray):
+        self._vectors[slots] = vectors
+
+    def _slot_for(self, doc_id: int) -> int:
+        slot = self._slots.get(doc_id)
+        if slot is None:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+            else:
+                if self._high_water == self._capacity:
+                    self._grow()
+                slot = self._high_water
+                self._high_water += 1
+            self._slots[doc_id] = slot
+            self._ids[slot] = doc_id
+        return slot
+
+    def add(self, doc_id: int, vector: np.ndarray):
+        self.add_batch([doc_id], np.asarray(vector, dtype=np.float32)[None, :])
+
+    def add_batch(self, doc_ids: Sequence[int], vectors: np.ndarray):
+        """Add many vectors at once; slots are assigned per id, the vectors are stored in one vectorized write."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(vectors) == 0:
+            return
+        if self.dimension is None:
+            self.dimension = vectors.shape[1]
+        if self._vectors is None:
+            self._allocate_storage(self._capacity)
+        slots = np.fromiter((self._slot_for(doc_id) for doc_id in doc_ids), dtype=np.int64, count=len(vectors))
+        self._store(slots, vectors)
+
+    def remove(self, doc_id: int):
+        slot = self._slots.pop(doc_id, None)
+        if slot is None:
+            return
+        self._ids[slot] = -1
+        self._free_slots.append(slot)
+
+    def get_vector(self, doc_id: int) -> Optional[np.ndarray]:
+        slot = self._slots.get(doc_id)
+        return None if slot is None else np.asarray(self._vectors[slot])
+
+    def _grow(self):
+        self._capacity *= 2
+        self._grow_storage(self._capacity)
+        ids = np.full(self._capacity, -1, dtype=np.int64)
+        ids[:len(self._ids)] = self._ids
+        self._ids = ids
+
+    def search(self, query_vector: np.ndarray, top_k: int = 5) -> SearchResults:
+        if not self._slots:
+            return []
+        ids = self._ids[:self._high_water]
+        scores = self._vectors[:self._high_water] @ np.asarray(query_vector, dtype=np.float32)
+        scores[ids < 0] = -np.inf
+        best = top_k_indices(scores, min(top_k, len(self._slots)))
+        return [(int(ids[i]), float(scores[i])) for i in best]
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+_POPCOUNT_8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+_POPCOUNT_16 = _POPCOUNT_8[np.arange(1 << 16) & 0xFF] + _POPCOUNT_8[np.arange(1 << 16) >> 8]
+
+
+class QuantizedVectorIndex(VectorIndex):
+    """
+    Vector index that keeps only compact codes in RAM for the first-pass search:
+
+    - "int8": every vector is scaled by its own max magnitude into int8 (4x smaller than float32)
+    - "binary": only the sign bit of every dimension is kept and compared by Hamming distance (32x smaller)
+
+    The best `top_k * rescore_multiplier` candidates of the first pass are re-scored exactly against the float32
+    vectors. Those always live in a disk-backed memmap, so they cost page cache instead of resident memory: at
+    `float_store_path` if given, otherwise in a temporary file that is deleted with the index. A larger
+    `rescore_multiplier` trades latency for recall.
+    """
+    MODES = ("int8", "binary")
+
+    def __init__(self, mode: str = "binary", rescore_multiplier: int = 10, float_store_path: Optional[str] = None,
+                 dimension: Optional[int] = None, initial_capacity: int = 64, chunk_size: int = 65536):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown quantization mode: {mode}. Expected one of {self.MODES}")
+        super().__init__(dimension, initial_capacity)
+        self.mode = mode
+        self.rescore_multiplier = rescore_multiplier
+        if float_store_path is None:
+            file_descriptor, float_store_path = tempfile.mkstemp(prefix="bica-vectors-", suffix=".f32")
+            os.close(file_descriptor)
+            weakref.finalize(self, _remove_file, float_store_path)
+        self.float_store_path = float_store_path
+        self.chunk_size = chunk_size
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+
+    @property
+    def nbytes(self) -> int:
+        if self._codes is None:
+            return 0
+        return self._codes.nbytes + (self._scales.nbytes if self.mode == "int8" else 0)
+
+    def _code_width(self) -> int:
+        return self.dimension if self.mode == "int8" else (self.dimension + 15) // 16
+
+    def _open_float_store(self, capacity: int) -> np.ndarray:
+        with open(self.float_store_path, 'ab') as store:
+            store.truncate(capacity * self.dimension * 4)
+        return np.memmap(self.float_store_path, dtype=np.float32, mode='r+', shape=(capacity, self.dimension))
+
+    def _allocate_storage(self, capacity: int):
+        if os.path.exists(self.float_store_path):
+            os.remove(self.float_store_path)
+        self._vectors = self._open_float_store(capacity)
+        self._codes = np.zeros((capacity, self._code_width()), dtype=np.int8 if self.mode == "int8" else np.uint16)
+        self._scales = np.zeros(capacity, dtype=np.float32)
+
+    def _grow_storage(self, capacity: int):
+        self._vectors.flush()
+        self._vectors = self._open_float_store(capacity)
+        codes = np.zeros((capacity, self._codes.shape[1]), dtype=self._codes.dtype)
+        codes[:len(self._codes)] = self._codes
+        scales = np.zeros(capacity, dtype=np.float32)
+        scales[:len(self._scales)] = self._scales
+        self._codes, self._scales = codes, scales
+
+    def _quantize(self, vectors: np.ndarray):
+        if self.mode == "binary":
+            # Sign bits packed into 16-bit words so the Hamming distance is one table lookup per 16 dimensions
+            bits = np.packbits(vectors > 0, axis=-1)
+            padding = [(0, 0)] * (bits.ndim - 1) + [(0, 2 * self._code_width() - bits.shape[-1])]
+            return np.ascontiguousarray(np.pad(bits, padding)).view(np.uint16), None
+        scales = np.maximum(np.abs(vectors).max(axis=-1), 1e-12) / 127.0
+        codes = np.rint(vectors / scales[..., None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def _store(self, slots: np.ndarray, vectors: np.ndarray):
+        self._vectors[slots] = vectors
+        codes, scales = self._quantize(vectors)
+        self._codes[slots] = codes
+        if scales is not None:
+            self._scales[slots] = scales
+
+    def _first_pass_scores(self, query_vector: np.ndarray) -> np.ndarray:
+        """Approximate similarity of the query to every slot, computed from the codes only (higher is better)."""
+        n = self._high_water
+        query_codes, query_scale = self._quantize(query_vector)
+        scores = np.empty(n, dtype=np.float32)
+        for start in range(0, n, self.chunk_size):
+            end = min(start + self.chunk_size, n)
+            if self.mode == "binary":
+                hamming = _POPCOUNT_16[np.bitwise_xor(self._codes[start:end], query_codes)].sum(axis=1, dtype=np.int32)
+                scores[start:end] = -hamming
+            else:
+                dots = self._codes[start:end].astype(np.float32) @ query_codes.astype(np.float32)
+                scores[start:end] = dots * self._scales[start:end] * query_scale
+        return scores
+
+    def search(self, query_vector: np.ndarray, top_k: int = 5, rescore_multiplier: Optional[int] = None) -> SearchResults:
+        if not self._slots:
+            return []
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        ids = self._ids[:self._high_water]
+        scores = self._first_pass_scores(query_vector)
+        scores[ids < 0] = -np.inf
+
+        multiplier = self.rescore_multiplier if rescore_multiplier is None else rescore_multiplier
+        candidates = top_k_indices(scores, min(max(top_k * multiplier, top_k), len(self._slots)))
+        candidates = np.sort(candidates)  # sequential reads from the float store
+        exact = np.asarray(self._vectors[candidates]) @ query_vector
+        best = top_k_indices(exact, top_k)
+        return [(int(ids[candidates[i]]), float(exact[i])) for i in best]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[SearchResults], top_k: int = 5, k: int = 60) -> SearchResults:
+    """
+    Fuse several ranked result lists: every document scores sum(1 / (k + rank)) over the lists it appears in.
+    Only ranks are used, so BM25 scores and cosine similarities never need to be calibrated against each other.
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, (doc_id, _) in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+
+def main():
+    import time
+
+    memories = [
+        "User: Remember that my favorite color is blue.",
+        "User: Remember this: The secret code is 1234.",
+        "User mentioned having a dog named Max.",
+        "Last conversation was about climate change.",
+        "User's birthday is on July 15th.",
+    ]
+    index = BM25Index()
+    for doc_id, text in enumerate(memories):
+        index.add(doc_id, text)
+
+    for query in ["what is my favorite color", "secret code", "1234", "dog Max"]:
+        start = time.perf_counter()
+        hits = index.search(query, top_k=2)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{query!r} ({elapsed:.3f} ms): {[(memories[i], round(score, 2)) for i, score in hits]}")
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(len(memories), 8)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    vector_index = VectorIndex()
+    vector_index.add_batch(range(len(memories)), vectors)
+    vector_hits = vector_index.search(vectors[1], top_k=3)
+    print(f"Vector hits: {vector_hits}")
+    print(f"Fused: {reciprocal_rank_fusion([index.search('secret code', 3), vector_hits])}")
+
+    print("\nQuantized search on 100k clustered 384-d vectors:")
+    centers = rng.normal(size=(1000, 384)).astype(np.float32)
+    corpus = centers[rng.integers(0, len(centers), 100_000)] + rng.normal(scale=0.8, size=(100_000, 384)).astype(np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    queries = centers[:50] + rng.normal(scale=0.8, size=(50, 384)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    exact_index = VectorIndex()
+    exact_index.add_batch(range(len(corpus)), corpus)
+    truth = [set(i for i, _ in exact_index.search(q, 10)) for q in queries]
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        candidates = [("float32", exact_index, None)]
+        for mode in QuantizedVectorIndex.MODES:
+            quantized = QuantizedVectorIndex(mode, float_store_path=os.path.join(store_dir, f"{mode}.f32"))
+            quantized.add_batch(range(len(corpus)), corpus)
+            candidates += [(f"{mode} x{m}", quantized, m) for m in (4, 10, 40)]
+
+        for name, candidate, multiplier in candidates:
+            start = time.perf_counter()
+            if multiplier is None:
+                results = [set(i for i, _ in candidate.search(q, 10)) for q in queries]
+            else:
+                results = [set(i for i, _ in candidate.search(q, 10, rescore_multiplier=multiplier)) for q in queries]
+            elapsed = (time.perf_counter() - start) * 1000 / len(queries)
+            recall = np.mean([len(r & t) / len(t) for r, t in zip(results, truth)])
+            print(f"  {name:11s} {candidate.nbytes / 2**20:7.1f} MiB resident  {elapsed:6.2f} ms/query  "
+                  f"recall@10 {recall:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+BicameralAGI Sharded Memory Index Module
+========================================
+
+Overview:
+---------
+This module provides a vector index for characters whose memory store is too large for a single core to scan.
+Memories are partitioned across shards, every shard keeps its ids and float32 embeddings in its own shared memory
+block, and queries fan out over a process pool. Worker processes attach to the shard blocks by name, so no embedding
+data is copied per query; each worker returns its local top-k and the parent merges them into the global top-k.
+
+Key Features:
+-------------
+1. Same add / remove / search interface as VectorIndex, so it can be passed to BicaMemory as `vector_index`
+2. One shared memory block per shard, grown by doubling
+3. Parallel query fan-out through a ProcessPoolExecutor with a global top-k merge
+4. Adding shards at runtime and rebalancing memories so every shard holds an even share
+
+Usage:
+------
+    with ShardedMemoryIndex(num_shards=4) as index:
+        memory = BicaMemory(profile, debug_mode=False, vector_index=index)
+        ...
+        index.add_shard()  # rebalances automatically
+"""
+
+import heapq
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bica.core.memory_search import SearchResults, top_k_indices
+
+# Shared memory blocks a worker process is attached to, keyed by shard id -> (block name, block)
+_attached_blocks: Dict[str, Tuple[str, shared_memory.SharedMemory]] = {}
+
+
+def _shard_views(buffer, capacity: int, dimension: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Interpret a shard block as [ids: int64 * capacity][vectors: float32 * capacity * dimension]."""
+    ids = np.ndarray((capacity,), dtype=np.int64, buffer=buffer)
+    vectors = np.ndarray((capacity, dimension), dtype=np.float32, buffer=buffer, offset=capacity * 8)
+    return ids, vectors
+
+
+def _search_shard(shard_id: str, block_name: str, capacity: int, dimension: int, high_water: int,
+                  query_vector: np.ndarray, top_k: int) -> SearchResults:
+    """Runs inside a worker process: attach to the shard block (once) and return the shard-local top-k."""
+    attached = _attached_blocks.get(shard_id)
+    if attached is None or attached[0] != block_name:
+        if attached is not None:
+            attached[1].close()
+        attached = (block_name, shared_memory.SharedMemory(name=block_name))
+        _attached_blocks[shard_id] = attached
+
+    ids, vectors = _shard_views(attached[1].buf, capacity, dimension)
+    ids = ids[:high_water]
+    scores = vectors[:high_water] @ query_vector
+    scores[ids < 0] = -np.inf
+    best = top_k_indices(scores, min(top_k, int((ids >= 0).sum())))
+    return [(int(ids[i]), float(scores[i])) for i in best]
+
+
+class _Shard:
+    def __init__(self, dimension: int, capacity: int):
+        self.shard_id = uuid.uuid4().hex
+        self.dimension = dimension
+        self.capacity = 0
+        self.block: Optional[shared_memory.SharedMemory] = None
+        self.ids: Optional[np.ndarray] = None
+        self.vectors: Optional[np.ndarray] = None
+        self.slots: Dict[int, int] = {}
+        self.free_slots: List[int] = []
+        self.high_water = 0
+        # Blocks replaced by a larger one; searches in flight may still attach to them by name
+        self.retired: List[shared_memory.SharedMemory] = []
+        self._allocate(capacity)
+
+    def __len__(self):
+        return len(self.slots)
+
+    def _allocate(self, capacity: int):
+        block = shared_memory.SharedMemory(create=True, size=capacity * (8 + 4 * self.dimension))
+        ids, vectors = _shard_views(block.buf, capacity, self.dimension)
+        ids[:] = -1
+        if self.block is not None:
+            ids[:self.capacity] = self.ids
+            vectors[:self.capacity] = self.vectors
+            self.ids = self.vectors = None
+            self.retired.append(self.block)
+        self.block, self.ids, self.vectors, self.capacity = block, ids, vectors, capacity
+
+    def add(self, doc_id: int, vector: np.ndarray):
+        if doc_id in self.slots:
+            slot = self.slots[doc_id]
+        elif self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            if self.high_water == self.capacity:
+                self._allocate(self.capacity * 2)
+            slot = self.high_water
+            self.high_water += 1
+        self.slots[doc_id] = slot
+        self.vectors[slot] = vector
+        self.ids[slot] = doc_id
+
+    def remove(self, doc_id: int) -> Optional[np.ndarray]:
+        slot = self.slots.pop(doc_id, None)
+        if slot is None:
+            return None
+        self.ids[slot] = -1
+        self.free_slots.append(slot)
+        return self.vectors[slot].copy()
+
+    def release_retired(self):
+        for block in self.retired:
+            block.close()
+            block.unlink()
+        self.retired = []
+
+    def release(self):
+        self.release_retired()
+        if self.block is None:
+            return
+        # Drop the NumPy views before closing, otherwise the buffer is still exported
+        self.ids = self.vectors = None
+        self.block.close()
+        self.block.unlink()
+        self.block = None
+
+
+class ShardedMemoryIndex:
+    def __init__(self, num_shards: int = 4, dimension: Optional[int] = None, max_workers: Optional[int] = None,
+                 initial_capacity: int = 1024):
+        self.dimension = dimension
+        self.initial_capacity = initial_capacity
+        self.shards: List[_Shard] = []
+        self._num_initial_shards = num_shards
+        self._placement: Dict[int, _Shard] = {}
+        self._pool = ProcessPoolExecutor(max_workers=max_workers or num_shards)
+        # Searches read the shard layout under the lock and then run without it; a rebalance waits for them to
+        # drain, and new searches wait for the rebalance, so no search sees a memory in two shards or in none
+        self._lock = threading.Condition()
+        self._active_searches = 0
+        self._rebalancing = False
+        if dimension is not None:
+            self._create_shards()
+
+    def __len__(self):
+        return len(self._placement)
+
+    def __contains__(self, doc_id: int):
+        return doc_id in self._placement
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def nbytes(self) -> int:
+        return sum(shard.block.size for shard in self.shards)
+
+    def shard_sizes(self) -> List[int]:
+        return [len(shard) for shard in self.shards]
+
+    def _create_shards(self):
+        for _ in range(self._num_initial_shards):
+            self.shards.append(_Shard(self.dimension, self.initial_capacity))
+
+    def add(self, doc_id: int, vector: np.ndarray):
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = vector.shape[0]
+            if not self.shards:
+                self._create_shards()
+            shard = self._placement.get(doc_id) or min(self.shards, key=len)
+            shard.add(doc_id, vector)
+            self._placement[doc_id] = shard
+            self._release_retired()
+
+    def add_batch(self, doc_ids: Sequence[int], vectors: np.ndarray):
+        for doc_id, vector in zip(doc_ids, vectors):
+            self.add(doc_id, vector)
+
+    def remove(self, doc_id: int):
+        with self._lock:
+            shard = self._placement.pop(doc_id, None)
+            if shard is not None:
+                shard.remove(doc_id)
+
+    def add_shard(self, rebalance: bool = True):
+        with self._lock:
+            self.shards.append(_Shard(self.dimension, self.initial_capacity))
+        if rebalance:
+            self.rebalance()
+
+    def rebalance(self):
+        """Move memories from the fullest shards to the emptiest until shard sizes differ by at most one."""
+        with self._lock:
+            self._rebalancing = True
+            self._lock.wait_for(lambda: not self._active_searches)
+            try:
+                self._move_surplus()
+            finally:
+                self._rebalancing = False
+                self._lock.notify_all()
+            self._release_retired()
+
+    def _move_surplus(self):
+        while self.shards:
+            fullest = max(self.shards, key=len)
+            emptiest = min(self.shards, key=len)
+            surplus = (len(fullest) - len(emptiest)) // 2
+            if surplus == 0:
+                break
+            for doc_id in list(fullest.slots)[:surplus]:
+                emptiest.add(doc_id, fullest.remove(doc_id))
+                self._placement[doc_id] = emptiest
+
+    def _release_retired(self):
+        """Unlink blocks replaced by growth once no search can still be attaching to them; lock held."""
+        if not self._active_searches:
+            for shard in self.shards:
+                shard.release_retired()
+
+    def search(self, query_vector: np.ndarray, top_k: int = 5) -> SearchResults:
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        # Only the shard layout is read under the lock; the fan-out runs without it, so searches overlap each other
+        # and adds
+        with self._lock:
+            self._lock.wait_for(lambda: not self._rebalancing)
+            tasks = [(shard.shard_id, shard.block.name, shard.capacity, self.dimension, shard.high_water)
+                     for shard in self.shards if len(shard)]
+            self._active_searches += 1
+        try:
+            futures = [self._pool.submit(_search_shard, *task, query_vector, top_k) for task in tasks]
+            partial_results = [future.result() for future in futures]
+        finally:
+            with self._lock:
+                self._active_searches -= 1
+                self._lock.notify_all()
+                self._release_retired()
+        return heapq.nlargest(top_k, (hit for hits in partial_results for hit in hits), key=lambda hit: hit[1])
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        for shard in self.shards:
+            shard.release()
+        self.shards = []
+        self._placement.clear()
+
+
+def main():
+    import time
+    from bica.core.memory_search import VectorIndex
+
+    print("===== ShardedMemoryIndex Test =====")
+    rng = np.random.default_rng(0)
+    corpus = rng.normal(size=(200_000, 384)).astype(np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    queries = corpus[:20]
+
+    exact = VectorIndex()
+    exact.add_batch(range(len(corpus)), corpus)
+
+    with ShardedMemoryIndex(num_shards=4) as index:
+        start = time.perf_counter()
+        index.add_batch(range(len(corpus)), corpus)
+        print(f"Built 4 shards {index.shard_sizes()} in {time.perf_counter() - start:.2f}s")
+
+        index.search(queries[0], 10)  # warm up the worker processes
+        for name, candidate in [("single process", exact), ("sharded", index)]:
+            start = time.perf_counter()
+            results = [candidate.search(q, 10) for q in queries]
+            elapsed = (time.perf_counter() - start) * 1000 / len(queries)
+            print(f"{name:15s} {elapsed:6.2f} ms/query, top hit of first query: {results[0][0]}")
+
+        index.add_shard()
+        print(f"After adding a shard and rebalancing: {index.shard_sizes()}")
+        assert [hit[0] for hit in index.search(queries[1], 10)] == [hit[0] for hit in exact.search(queries[1], 10)]
+        print("Sharded results match the single-process index.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+BicameralAGI Memory Themes Module
+=================================
+
+Overview:
+---------
+This module groups a character's high-importance memories into themes as they are formed, so destiny decisions can
+ask "what is this character's life about right now" without rescanning every memory each turn. Memories are
+queued when they are stored and embedded in one batch the next time the queue is processed (BicaMemory does this
+in its background update). Each embedding joins the most similar theme centroid. A new theme is opened when nothing
+is similar enough and there is room. Joining a theme moves its centroid by the mini-batch k-means step
+1 / theme_size.
+
+A theme's weight is the summed importance of its memories, decayed a little every time a memory is assigned so that
+recent themes dominate. Its label is made of the terms that are most frequent in the theme and rare in the others,
+so themes are named after whatever the memories talk about instead of a fixed vocabulary.
+
+Key Features:
+-------------
+1. Incremental assignment: O(themes) per new memory, no re-clustering
+2. Batched embedding of queued memories
+3. Recency-weighted theme importance and cached dominant themes, so reads are O(1) until memories change
+4. Memories can be removed again when they are forgotten
+
+Usage:
+------
+    themes = BicaThemeClusterer()
+    themes.add(memory.memory_id, memory.content, memory.importance)
+    themes.assign_pending()
+    themes.dominant_themes(top_k=3)  # [("Climate and Emissions", 0.62), ("Cooking", 0.38)]
+"""
+
+import math
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from bica.core.memory_search import tokenize
+from bica.utils.embeddings import BicaEmbedder
+
+THEME_STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between both but by
+can could did do does doing down during each few for from further had has have having he her here hers herself him
+himself his how i if in into is it its itself just me more most my myself no nor not now of off on once only or other
+our ours ourselves out over own same she should so some such than that the their theirs them themselves then there
+these they this those through to too under until up very was we were what when where which while who whom why will
+with would you your yours yourself yourselves user context ai character weights weight viewpoint viewpoints
+""".split())
+
+
+class Theme:
+    def __init__(self, theme_id: int):
+        self.theme_id = theme_id
+        self.size = 0
+        self.weight = 0.0
+        self.terms: Counter = Counter()
+
+    def __repr__(self):
+        return f"Theme(id={self.theme_id}, size={self.size}, weight={self.weight:.2f})"
+
+
+class BicaThemeClusterer:
+    def __init__(self, embedder: BicaEmbedder = None, max_themes: int = 8, similarity_threshold: float = 0.45,
+                 recency_decay: float = 0.97, label_terms: int = 2):
+        """
+        :param similarity_threshold: Cosine similarity to the nearest centroid below which a memory opens a new
+                                     theme (while fewer than `max_themes` exist)
+        :param recency_decay: Factor applied to every theme weight each time a memory is assigned
+        :param label_terms: Number of terms in a theme label
+        """
+        self.embedder = embedder if embedder is not None else BicaEmbedder()
+        self.max_themes = max_themes
+        self.similarity_threshold = similarity_threshold
+        self.recency_decay = recency_decay
+        self.label_terms = label_terms
+
+        self._lock = threading.Lock()
+        self._themes: List[Theme] = []
+        self._centroids: Optional[np.ndarray] = None  # (themes, dim), rows aligned with self._themes
+        self._pending: Dict[int, Tuple[str, float]] = {}
+        self._assignments: Dict[int, Tuple[Theme, float, Counter]] = {}
+        self._next_theme_id = 0
+        self._dominant: Optional[List[Tuple[str, float]]] = None
+
+    def __len__(self):
+        return len(self._themes)
+
+    def add(self, memory_id: int, content: str, importance: float):
+        """Queue a memory; it is embedded and assigned on the next assign_pending()."""
+        with self._lock:
+            if memory_id not in self._assignments:
+                self._pending[memory_id] = (content, importance)
+
+    def remove(self, memory_id: int):
+        """Take a forgotten memory's weight and terms out of its theme; empty themes are dropped."""
+        with self._lock:
+            self._pending.pop(memory_id, None)
+            assignment = self._assignments.pop(memory_id, None)
+            if assignment is None:
+                return
+            theme, importance, terms = assignment
+            theme.size -= 1
+            theme.weight = max(theme.weight - importance, 0.0)
+            theme.terms.subtract(terms)
+            if theme.size <= 0:
+                row = self._themes.index(theme)
+                del self._themes[row]
+                self._centroids = np.delete(self._centroids, row, axis=0) if self._themes else None
+            self._dominant = None
+
+    def assign_pending(self):
+        """Embed all queued memories in one batch and assign them to themes."""
+        with self._lock:
+            if not self._pending:
+                return
+            memory_ids = list(self._pending)
+            vectors = self.embedder.encode([self._pending[memory_id][0] for memory_id in memory_ids])
+            for memory_id, vector in zip(memory_ids, np.atleast_2d(vectors)):
+                content, importance = self._pending.pop(memory_id)
+                self._assign(memory_id, content, importance, np.asarray(vector, dtype=np.float32))
+            self._dominant = None
+
+    def _assign(self, memory_id: int, content: str, importance: float, vector: np.ndarray):
+        row = -1
+        if self._centroids is not None:
+            similarities = self._centroids @ vector
+            row = int(similarities.argmax())
+            if similarities[row] < self.similarity_threshold and len(self._themes) < self.max_themes:
+                row = -1
+
+        if row < 0:
+            theme = Theme(self._next_theme_id)
+            self._next_theme_id += 1
+            self._themes.append(theme)
+            self._centroids = vector[None, :] if self._centroids is None else np.vstack([self._centroids, vector])
+            row = len(self._themes) - 1
+        theme = self._themes[row]
+
+        theme.size += 1
+        centroid = self._centroids[row] + (vector - self._centroids[row]) / theme.size
+        self._centroids[row] = centroid / max(float(np.linalg.norm(centroid)), 1e-9)
+
+        for other in self._themes:
+            other.weight *= self.recency_decay
+        theme.weight += importance
+        terms = Counter(term for term in tokenize(content) if term not in THEME_STOPWORDS and not term.isdigit())
+        theme.terms.update(terms)
+        self._assignments[memory_id] = (theme, importance, terms)
+
+    def _label(self, theme: Theme) -> str:
+        # Terms frequent in this theme and rare in the others (tf-idf over themes)
+        scores = {}
+        for term, count in theme.terms.items():
+            if count > 0:
+                themes_with_term = sum(1 for other in self._themes if other.terms.get(term, 0) > 0)
+                scores[term] = count * math.log(1 + len(self._themes) / themes_with_term)
+        best = sorted(scores, key=lambda term: (-scores[term], term))[:self.label_terms]
+        return " and ".join(term.capitalize() for term in best) or f"Theme {theme.theme_id}"
+
+    def dominant_themes(self, top_k: int = 3) -> List[Tuple[str, float]]:
+        """The `top_k` heaviest themes as (label, share of the total theme weight), heaviest first."""
+        with self._lock:
+            if self._dominant is None:
+                total = sum(theme.weight for theme in self._themes)
+                ranked = sorted(self._themes, key=lambda theme: -theme.weight)
+                self._dominant = [(self._label(theme), theme.weight / total) for theme in ranked] if total > 0 else []
+            return self._dominant[:top_k]
+
+
+def main():
+    import time
+
+    class HashingEmbedder:
+        """Bag-of-words hashing embedder, so the demo runs without downloading a model."""
+        def encode(self, texts):
+            vectors = np.zeros((len(texts), 256), dtype=np.float32)
+            for row, text in enumerate(texts):
+                for term in tokenize(text):
+                    if term not in THEME_STOPWORDS:
+                        vectors[row, hash(term) % 256] += 1.0
+            return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+
+    memories = [
+        ("We talked about climate change and rising carbon emissions", 0.9),
+        ("The user worries that climate change will flood the coast", 0.8),
+        ("Carbon emissions from factories keep rising", 0.75),
+        ("The user shared a family recipe for tomato soup", 0.8),
+        ("We cooked tomato soup together with fresh basil", 0.85),
+    ]
+    themes = BicaThemeClusterer(embedder=HashingEmbedder(), similarity_threshold=0.2)
+    for memory_id, (content, importance) in enumerate(memories):
+        themes.add(memory_id, content, importance)
+    themes.assign_pending()
+    print(f"Themes after {len(memories)} memories: {themes.dominant_themes()}")
+
+    themes.add(len(memories), "Another long talk about climate change policy", 0.9)
+    themes.assign_pending()
+    print(f"After a new climate memory: {themes.dominant_themes()}")
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        themes.dominant_themes()
+    print(f"dominant_themes(): {(time.perf_counter() - start) * 1000:.3f} ms for 1000 reads")
+
+    themes.remove(3)
+    themes.remove(4)
+    print(f"After forgetting the cooking memories: {themes.dominant_themes()}")
+
+
+if __name__ == "__main__":
+    main()
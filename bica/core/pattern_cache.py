@@ -0,0 +1,84 @@
+"""
+BicameralAGI Custom Pattern Cache Module
+========================================
+
+Overview:
+---------
+This module remembers the custom response-tendency patterns (emotionalTriggers, problemSolvingApproach) that GPT
+generated for a character summary, so creating a profile for a summary that was seen before does not need those
+calls again. Entries are keyed by a hash of the normalized summary, the pattern type and a hash of the reference
+traits file the patterns were generated from. Editing the reference file therefore invalidates them. The cache is
+kept in memory and persisted the same way as the character definition cache, as an append-only JSONL log of
+{"key", "patterns"} lines (see jsonl_log).
+
+Usage:
+------
+    cache = get_pattern_cache()
+    version = reference_version(ref_character_traits)
+    patterns = cache.get(summary, "emotionalTriggers", version)  # None on a miss
+    cache.put(summary, "emotionalTriggers", version, [{"trigger": "...", "response": "..."}])
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from bica.utils.jsonl_log import append_jsonl, read_jsonl
+from bica.utils.utilities import normalize_text
+
+DEFAULT_CACHE_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../../data/characters/pattern_cache.jsonl'))
+
+
+def reference_version(reference: Dict[str, Any]) -> str:
+    """Short content hash of a loaded reference file."""
+    serialized = json.dumps(reference, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()[:16]
+
+
+def pattern_key(summary: str, pattern_type: str, version: str) -> str:
+    digest = hashlib.sha256(normalize_text(summary).encode('utf-8')).hexdigest()
+    return f"{digest}:{pattern_type}:{version}"
+
+
+class CustomPatternCache:
+    def __init__(self, file_path: Optional[str] = DEFAULT_CACHE_PATH):
+        """:param file_path: JSONL log backing the cache; None keeps it in memory only"""
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._patterns: Dict[str, List[Dict[str, Any]]] = {}
+        if file_path:
+            try:
+                for entry in read_jsonl(file_path):
+                    self._patterns[entry["key"]] = entry["patterns"]
+            except OSError as e:
+                print(f"Warning: Ignoring unreadable custom pattern cache {file_path}: {str(e)}")
+
+    def get(self, summary: str, pattern_type: str, version: str) -> Optional[List[Dict[str, Any]]]:
+        patterns = self._patterns.get(pattern_key(summary, pattern_type, version))
+        return [dict(pattern) for pattern in patterns] if patterns else None
+
+    def put(self, summary: str, pattern_type: str, version: str, patterns: List[Dict[str, Any]]):
+        key = pattern_key(summary, pattern_type, version)
+        with self._lock:
+            self._patterns[key] = patterns
+            if self.file_path:
+                append_jsonl(self.file_path, [{"key": key, "patterns": patterns}])
+
+    def __len__(self):
+        return len(self._patterns)
+
+
+_default_cache: Optional[CustomPatternCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_pattern_cache() -> CustomPatternCache:
+    """The process-wide cache used by BicaProfile, loaded on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = CustomPatternCache()
+        return _default_cache
@@ -1,14 +1,27 @@
 import os
 import json
+import contextvars
+import copy
+import random
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from pydantic import BaseModel
 from external.gpt_handler import GPTHandler
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 import configparser
-import shutil
 import time
 import re
 from typing import Union
 
+from bica.core.pattern_cache import get_pattern_cache, reference_version
+from bica.core.profile_history import ProfileHistoryFile, apply_patch, diff_profiles, split_pointer, validate_patch
+from bica.core.profile_templates import BicaProfileTemplateIndex, get_template_index
+
+# Profile sections sent to GPT when the personality is updated from an experience
+DEFAULT_PERSONALITY_SECTIONS = ("characterInfo", "cognitiveModel")
+# responseTendencies pattern sets written for each character
+CUSTOM_PATTERN_TYPES = ("emotionalTriggers", "problemSolvingApproach")
+
 
 class CharacterProfileSchema(BaseModel):
     characterInfo: Dict[str, Union[str, int, Dict[str, str]]]
@@ -17,7 +30,14 @@ class CharacterProfileSchema(BaseModel):
 
 
 class BicaProfile:
-    def __init__(self, character_name: str, character_summary: str, gpt_handler: GPTHandler):
+    def __init__(self, character_name: str, character_summary: str, gpt_handler: GPTHandler, store=None,
+                 template_policy: str = "adapt", template_index: BicaProfileTemplateIndex = None):
+        """
+        :param store: Optional BicaCharacterStore; profiles are then read from and written to it instead of files
+        :param template_policy: How a new profile uses the nearest existing one: "adapt", "reuse" or "off"
+                                (see BicaProfileTemplateIndex)
+        :param template_index: Index of existing profiles; defaults to the process-wide one
+        """
         # Load configuration to determine base path
         config = configparser.ConfigParser()
         try:
@@ -33,10 +53,71 @@ class BicaProfile:
         self.gpt_handler = gpt_handler
         self.character_name = self.sanitize_filename(character_name)
         self.character_summary = character_summary
+        self.store = store
+        self.template_policy = template_policy
+        self._template_index = template_index
         self.character_profile = self.create_character_profile(character_summary)
-
-    def get_profile(self):
-        return json.dumps(self.character_profile, indent=4)
+        # Versioned deltas of personality updates, with periodic full snapshots
+        if store is not None:
+            self.history = store.profile_history(self.character_name)
+        else:
+            self.history = ProfileHistoryFile(os.path.join(self.get_character_path(self.character_name),
+                                                           f'{self.character_name}_profile.history.jsonl'))
+        self.version = 0  # Incremented whenever the profile changes, so cached renderings can be refreshed
+        # Serialized forms and trait/emotion vectors, rebuilt on first use after a change (see _invalidate_caches)
+        self._serialized: Dict[bool, str] = {}
+        self._vectors: Dict[str, Tuple[np.ndarray, Dict[str, int]]] = {}
+
+    @property
+    def template_index(self) -> BicaProfileTemplateIndex:
+        if self._template_index is None:
+            self._template_index = get_template_index()
+        return self._template_index
+
+    def get_profile(self, compact: bool = False) -> str:
+        """The profile as JSON, indented or compact (no whitespace); cached until the profile changes."""
+        if compact not in self._serialized:
+            if compact:
+                self._serialized[compact] = json.dumps(self.character_profile, separators=(',', ':'), ensure_ascii=False)
+            else:
+                self._serialized[compact] = json.dumps(self.character_profile, indent=4)
+        return self._serialized[compact]
+
+    def _invalidate_caches(self):
+        self._serialized.clear()
+        self._vectors.clear()
+
+    def _cognitive_vector(self, section: str) -> Tuple[np.ndarray, Dict[str, int]]:
+        # Values in the profile's key order; non-numeric entries are left out
+        if section not in self._vectors:
+            values = self.character_profile.get('cognitiveModel', {}).get(section, {})
+            names = [name for name, value in values.items()
+                     if isinstance(value, (int, float)) and not isinstance(value, bool)]
+            self._vectors[section] = (np.array([values[name] for name in names], dtype=np.float32),
+                                      {name: index for index, name in enumerate(names)})
+        return self._vectors[section]
+
+    @property
+    def traits(self) -> np.ndarray:
+        """Trait values as a float32 vector, ordered as in `trait_index`."""
+        return self._cognitive_vector('traits')[0]
+
+    @property
+    def trait_index(self) -> Dict[str, int]:
+        return self._cognitive_vector('traits')[1]
+
+    @property
+    def emotions(self) -> np.ndarray:
+        """Emotion values as a float32 vector, ordered as in `emotion_index`."""
+        return self._cognitive_vector('emotions')[0]
+
+    @property
+    def emotion_index(self) -> Dict[str, int]:
+        return self._cognitive_vector('emotions')[1]
+
+    def get_trait(self, name: str, default: float = 0.5) -> float:
+        value = self.character_profile.get('cognitiveModel', {}).get('traits', {}).get(name)
+        return float(value) if isinstance(value, (int, float)) else default
 
     def get_data_path(self, *args):
         return os.path.join(self.base_path, 'data', *args)
@@ -77,14 +158,20 @@ class BicaProfile:
 
     def create_character_profile(self, character_summary: str) -> Dict[str, Any]:
         try:
+            if self.store is not None:
+                stored_profile = self.store.get_profile(self.character_name)
+                if stored_profile:
+                    return stored_profile
+
             ref_character_traits, ref_communication_styles = self.load_reference_files()
-            character_dir = self.ensure_character_directory()
-            profile_path = os.path.join(character_dir, f'{self.character_name}_profile.json')
+            if self.store is None:
+                character_dir = self.ensure_character_directory()
+                profile_path = os.path.join(character_dir, f'{self.character_name}_profile.json')
 
-            # If profile already exists, load it
-            if os.path.exists(profile_path):
-                with open(profile_path, 'r') as profile_file:
-                    return json.load(profile_file)
+                # If profile already exists, load it
+                if os.path.exists(profile_path):
+                    with open(profile_path, 'r') as profile_file:
+                        return json.load(profile_file)
 
             # Create a tailored initial profile for the character
             initial_profile = {
@@ -172,30 +259,127 @@ class BicaProfile:
                         "leadership": 0.7
                     }
                 },
-                "responseTendencies": ref_character_traits["responseTendencies"],
+                "responseTendencies": copy.deepcopy(ref_character_traits["responseTendencies"]),
                 "communicationStyle": {"formality": ref_communication_styles["styleGuide"]["formality"]["medium"]}
             }
 
-            # Customize responseTendencies for the character
-            emotional_trigger_patterns = self.generate_custom_patterns(ref_character_traits, character_summary, "emotionalTriggers")
-            initial_profile["responseTendencies"]["emotionalTriggers"]["patterns"] = emotional_trigger_patterns
-
-            problem_solving_patterns = self.generate_custom_patterns(ref_character_traits, character_summary, "problemSolvingApproach")
-            initial_profile["responseTendencies"]["problemSolvingApproach"]["patterns"] = problem_solving_patterns
-
-            with open(profile_path, 'w') as profile_file:
-                json.dump(initial_profile, profile_file, indent=4)
+            # Customize responseTendencies for the character, starting from the closest existing profile if there is
+            # one; otherwise the pattern sets are generated, both GPT calls at the same time since they are independent
+            custom_patterns = self._patterns_from_template(character_summary)
+            if custom_patterns is None:
+                with ThreadPoolExecutor(max_workers=len(CUSTOM_PATTERN_TYPES), thread_name_prefix="bica-patterns") as executor:
+                    futures = {pattern_type: executor.submit(contextvars.copy_context().run, self.generate_custom_patterns,
+                                                             ref_character_traits, character_summary, pattern_type)
+                               for pattern_type in CUSTOM_PATTERN_TYPES}
+                    custom_patterns = {pattern_type: future.result() for pattern_type, future in futures.items()}
+            for pattern_type, patterns in custom_patterns.items():
+                initial_profile["responseTendencies"][pattern_type]["patterns"] = patterns
+
+            if self.store is not None:
+                self.store.put_profile(self.character_name, initial_profile, summary=character_summary)
+            else:
+                with open(profile_path, 'w') as profile_file:
+                    json.dump(initial_profile, profile_file, indent=4)
+            self._add_to_template_index(character_summary)
 
             return initial_profile
         except FileNotFoundError as e:
             print(f"Error: {str(e)}")
             raise
 
+    def _patterns_from_template(self, character_summary: str):
+        """
+        Custom patterns derived from the nearest existing profile under the template policy (see
+        BicaProfileTemplateIndex.decide), or None if they have to be generated.
+        """
+        try:
+            decision = self.template_index.decide(character_summary, self.template_policy, exclude=self.character_name)
+        except Exception as e:
+            print(f"Warning: Profile template lookup failed, generating patterns instead: {str(e)}")
+            return None
+        if decision is None:
+            return None
+
+        mode, template_name, similarity = decision
+        template = self._load_template_profile(template_name)
+        tendencies = (template or {}).get("responseTendencies", {})
+        if not all(isinstance(tendencies.get(pattern_type, {}).get("patterns"), list) for pattern_type in CUSTOM_PATTERN_TYPES):
+            return None
+        template_patterns = {pattern_type: tendencies[pattern_type]["patterns"] for pattern_type in CUSTOM_PATTERN_TYPES}
+        print(f"Starting from the profile of {template_name} (similarity {similarity:.2f}, {mode})")
+
+        if mode == "reuse":
+            return copy.deepcopy(template_patterns)
+        template_summary = template.get("characterInfo", {}).get("description", template_name)
+        return self._adapt_template_patterns(template_patterns, template_summary, character_summary)
+
+    def _load_template_profile(self, name: str):
+        if self.store is not None:
+            return self.store.get_profile(name, sections=["characterInfo", "responseTendencies"])
+        profile_path = os.path.join(self.get_character_path(name), f'{name}_profile.json')
+        try:
+            with open(profile_path, 'r') as profile_file:
+                return json.load(profile_file)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: Could not load template profile {profile_path}: {str(e)}")
+            return None
+
+    def _adapt_template_patterns(self, template_patterns: Dict[str, list], template_summary: str, character_summary: str):
+        # One call that only returns what differs, instead of generating every pattern set again
+        prompt = f"""
+        These behavior patterns were written for a character described as: "{template_summary}"
+        {json.dumps(template_patterns, separators=(',', ':'))}
+        Adapt them to a similar character described as: "{character_summary}".
+        Provide your response as a JSON Patch (RFC 6902): a JSON array of "add", "replace" or "remove" operations on
+        the patterns above (paths like /emotionalTriggers/0/response). Return [] if nothing needs to change.
+        """
+        try:
+            response = self._call_gpt_with_retry(messages=[
+                {"role": "system", "content": "You are an AI assistant that helps generate character behavior patterns."},
+                {"role": "user", "content": prompt}
+            ])
+            patch = validate_patch(json.loads(response.strip().strip("```json").strip("```").strip()))
+            adapted = apply_patch(copy.deepcopy(template_patterns), patch)
+            if all(isinstance(adapted.get(pattern_type), list) and
+                   all(isinstance(item, dict) for item in adapted[pattern_type]) for pattern_type in CUSTOM_PATTERN_TYPES):
+                return {pattern_type: adapted[pattern_type] for pattern_type in CUSTOM_PATTERN_TYPES}
+            print("Error: Adapted patterns are not in the expected format. Generating patterns instead.")
+        except Exception as e:
+            print(f"Error adapting template patterns: {str(e)}. Generating patterns instead.")
+        return None
+
+    def _add_to_template_index(self, character_summary: str):
+        if self.template_policy == "off":
+            return
+        try:
+            self.template_index.add(self.character_name, character_summary)
+        except Exception as e:
+            print(f"Warning: Could not add {self.character_name} to the profile template index: {str(e)}")
+
     def generate_custom_patterns(self, character_traits: Dict[str, Any], character_summary: str, pattern_type: str) -> list:
-        # Generate custom patterns using the GPT handler to make the patterns more contextual and generative
+        # Patterns generated earlier for the same summary and reference file are reused
+        cache = get_pattern_cache()
+        version = reference_version(character_traits)
+        cached_patterns = cache.get(character_summary, pattern_type, version)
+        if cached_patterns:
+            return cached_patterns
+
+        generated_patterns = self._generate_custom_patterns(character_traits, character_summary, pattern_type)
+        if generated_patterns is not None:
+            cache.put(character_summary, pattern_type, version, generated_patterns)
+            return generated_patterns
+
+        # Fallback default response if anything goes wrong
+        return [
+            {"trigger": "Default trigger", "response": "Default response based on character background"}
+        ]
+
+    def _generate_custom_patterns(self, character_traits: Dict[str, Any], character_summary: str, pattern_type: str):
+        # Generate custom patterns using the GPT handler to make the patterns more contextual and generative.
+        # The reference is embedded as compact JSON; indentation only costs tokens.
         prompt = f"""
         Given the character traits:
-        {json.dumps(character_traits, indent=2)}
+        {json.dumps(character_traits, separators=(',', ':'))}
         And the character summary: "{character_summary}",
         Generate patterns for '{pattern_type}'. The patterns should reflect unique aspects of the character's behavior.
         Provide the response in the format of a JSON list, including 'trigger' and 'response' for 'emotionalTriggers',
@@ -226,12 +410,9 @@ class BicaProfile:
         except Exception as e:
             print(f"Error: {str(e)}. Returning default pattern.")
 
-        # Fallback default response if anything goes wrong
-        return [
-            {"trigger": "Default trigger", "response": "Default response based on character background"}
-        ]
+        return None
 
-    def _call_gpt_with_retry(self, messages, retries=3, delay=5):
+    def _call_gpt_with_retry(self, messages, retries=3, delay=1.0):
         for attempt in range(retries):
             try:
                 prompt = messages[-1]["content"]
@@ -242,7 +423,8 @@ class BicaProfile:
             except Exception as e:
                 print(f"Attempt {attempt + 1} failed: {str(e)}")
                 if attempt < retries - 1:
-                    time.sleep(delay)
+                    # Exponential backoff with jitter, so concurrent callers do not retry in lockstep
+                    time.sleep(delay * 2 ** attempt + random.uniform(0, delay))
                 else:
                     raise
 
@@ -261,25 +443,25 @@ class BicaProfile:
                     return False
         return True
 
-    def _create_backup_if_exists(self, file_path: str):
-        # Create a backup of the existing profile file if it exists, with versioning to prevent overwriting
-        if os.path.exists(file_path):
-            backup_version = 1
-            backup_path = f"{file_path}.bak.{backup_version}"
-            while os.path.exists(backup_path):
-                backup_version += 1
-                backup_path = f"{file_path}.bak.{backup_version}"
-            shutil.copy(file_path, backup_path)
-
-    def update_personality(self, experience: str):
+    def _profile_path(self) -> str:
+        return os.path.join(self.get_character_path(self.character_name), f'{self.character_name}_profile.json')
+
+    def update_personality(self, experience: str, sections=DEFAULT_PERSONALITY_SECTIONS):
+        """
+        Update the profile from a new experience. Only the given top-level `sections` are sent to GPT, which replies
+        with a JSON Patch; the patch is applied and recorded in the profile history instead of a full backup copy.
+        """
+        relevant = {section: self.character_profile[section] for section in sections if section in self.character_profile}
         prompt = f"""
-        Given the current character profile:
-        {json.dumps(self.character_profile, indent=2)}
-        And the new experience: '{experience}', suggest updates to the entire profile.
-        Provide your response as a JSON object matching the original profile structure.
-        Only include fields that should be updated.
+        Given these sections of the character profile:
+        {json.dumps(relevant, separators=(',', ':'))}
+        And the new experience: '{experience}', suggest how the character changes.
+        Provide your response as a JSON Patch (RFC 6902): a JSON array of "add", "replace" or "remove" operations
+        whose paths start with one of: {', '.join('/' + section for section in relevant)}.
+        Only include values that should change, e.g. [{{"op": "replace", "path": "/cognitiveModel/traits/courage", "value": 0.9}}]
         """
 
+        response = None
         try:
             response = self._call_gpt_with_retry(
                 messages=[
@@ -288,16 +470,27 @@ class BicaProfile:
                 ]
             )
             print(f"Cleaned GPT response: {response}")
-            updates = json.loads(response)
-
-            # Update the character profile with the new values
-            self._update_nested_dict(self.character_profile, updates)
-
-            # Save the updated profile
-            profile_path = os.path.join(self.get_character_path(self.character_name.lower()), f'{self.character_name}_profile.json')
-            self._create_backup_if_exists(profile_path)
-            with open(profile_path, 'w') as profile_file:
-                json.dump(self.character_profile, profile_file, indent=4)
+            patch = self._parse_personality_patch(json.loads(response), relevant)
+            if not patch:
+                print("No personality changes suggested.")
+                return
+
+            # Apply to a copy, so a patch that fails halfway leaves the profile untouched
+            before = self.character_profile
+            self.character_profile = apply_patch(copy.deepcopy(before), patch)
+            self.version += 1
+            self._invalidate_caches()
+            history_version = self.history.record(patch, before, self.character_profile, experience)
+
+            # Save the updated profile; the store only rewrites the sections that changed
+            changed_sections = {split_pointer(operation["path"])[0] for operation in patch}
+            if self.store is not None:
+                self.store.update_profile_sections(
+                    self.character_name, {section: self.character_profile[section] for section in changed_sections})
+            else:
+                with open(self._profile_path(), 'w') as profile_file:
+                    json.dump(self.character_profile, profile_file, indent=4)
+            print(f"Profile updated to version {history_version} ({len(patch)} changes)")
 
         except json.JSONDecodeError as e:
             print(f"Error decoding GPT response: {str(e)}")
@@ -305,7 +498,22 @@ class BicaProfile:
         except Exception as e:
             print(f"Error updating character profile: {str(e)}")
 
+    def _parse_personality_patch(self, reply, relevant: Dict[str, Any]) -> list:
+        # A partial profile object (the previous reply format) is turned into the equivalent patch
+        if isinstance(reply, dict):
+            merged = self._update_nested_dict(copy.deepcopy(relevant), reply)
+            return diff_profiles(relevant, merged)
+        patch = []
+        for operation in validate_patch(reply):
+            tokens = split_pointer(operation["path"])
+            if tokens and tokens[0] in relevant:
+                patch.append(operation)
+            else:
+                print(f"Warning: Ignoring profile change outside the sent sections: {operation['path']}")
+        return patch
+
     def _update_nested_dict(self, d, u):
+        self._invalidate_caches()
         for k, v in u.items():
             if isinstance(v, dict):
                 d[k] = self._update_nested_dict(d.get(k, {}), v)
@@ -0,0 +1,266 @@
+"""
+BicameralAGI Profile History Module
+===================================
+
+Overview:
+---------
+This module records how a character's profile evolves, as small deltas instead of full copies of the profile.
+Every personality update is stored as a JSON Patch (RFC 6902 operations add, replace and remove on JSON Pointer
+paths) together with the experience that caused it. Every `snapshot_every` versions the full profile is stored as
+well, so any past version is rebuilt from the nearest snapshot and at most `snapshot_every - 1` patches. History
+older than `retain_versions` is dropped when a snapshot is written, so the log stays bounded.
+
+Two backends share this logic: ProfileHistoryFile appends to a compact JSONL file next to the profile, and
+BicaCharacterStore.profile_history(name) keeps the entries in the character database.
+
+Key Features:
+-------------
+1. diff_profiles / apply_patch: JSON Patch between two profiles and its application (lists are replaced whole)
+2. Versioned delta log with periodic full snapshots
+3. profile_at(version) reconstruction
+4. Bounded retention instead of an ever-growing pile of .bak.N copies
+
+Usage:
+------
+    history = ProfileHistoryFile("data/characters/Tron/Tron_profile.history.jsonl")
+    patch = diff_profiles(before, after)
+    version = history.record(patch, before, after, experience="Defended the village")
+    history.profile_at(version - 1)
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from bica.utils.jsonl_log import append_jsonl, read_jsonl
+
+PATCH_OPERATIONS = ("add", "replace", "remove")
+
+
+# JSON Pointer / JSON Patch helpers
+def _escape(key: str) -> str:
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+
+def _unescape(token: str) -> str:
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def split_pointer(path: str) -> List[str]:
+    if path == "":
+        return []
+    if not path.startswith('/'):
+        raise ValueError(f"Invalid JSON Pointer '{path}'")
+    return [_unescape(token) for token in path[1:].split('/')]
+
+
+def diff_profiles(before: Any, after: Any, path: str = "") -> List[Dict[str, Any]]:
+    """JSON Patch that turns `before` into `after`, recursing into objects; other values are replaced whole."""
+    if isinstance(before, dict) and isinstance(after, dict):
+        operations = []
+        for key, value in after.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in before:
+                operations.append({"op": "add", "path": child, "value": copy.deepcopy(value)})
+            else:
+                operations += diff_profiles(before[key], value, child)
+        operations += [{"op": "remove", "path": f"{path}/{_escape(key)}"} for key in before if key not in after]
+        return operations
+    if before == after:
+        return []
+    return [{"op": "replace", "path": path, "value": copy.deepcopy(after)}]
+
+
+def validate_patch(patch: Any) -> List[Dict[str, Any]]:
+    if not isinstance(patch, list):
+        raise ValueError("A JSON Patch must be a list of operations")
+    for operation in patch:
+        if not isinstance(operation, dict) or operation.get("op") not in PATCH_OPERATIONS:
+            raise ValueError(f"Unsupported patch operation: {operation}")
+        split_pointer(operation.get("path", ""))
+        if operation["op"] != "remove" and "value" not in operation:
+            raise ValueError(f"Patch operation without a value: {operation}")
+    return patch
+
+
+def apply_patch(document: Any, patch: List[Dict[str, Any]]) -> Any:
+    """Apply a JSON Patch in place and return the document (a new one if the root itself is replaced)."""
+    for operation in validate_patch(patch):
+        tokens = split_pointer(operation["path"])
+        if not tokens:
+            if operation["op"] == "remove":
+                raise ValueError("Cannot remove the document root")
+            document = copy.deepcopy(operation["value"])
+            continue
+
+        parent = document
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent.setdefault(token, {})
+        key = tokens[-1]
+        if isinstance(parent, list):
+            index = len(parent) if key == '-' else int(key)
+            if operation["op"] == "add":
+                parent.insert(index, copy.deepcopy(operation["value"]))
+            elif operation["op"] == "replace":
+                parent[index] = copy.deepcopy(operation["value"])
+            else:
+                del parent[index]
+        elif operation["op"] == "remove":
+            parent.pop(key, None)
+        else:
+            parent[key] = copy.deepcopy(operation["value"])
+    return document
+
+
+class ProfileHistory:
+    """Snapshot and delta bookkeeping; subclasses provide the storage of the entries."""
+
+    def __init__(self, snapshot_every: int = 20, retain_versions: int = 200):
+        """
+        :param snapshot_every: A full profile is stored every this many versions
+        :param retain_versions: Versions kept when old history is pruned (rounded down to a snapshot)
+        """
+        self.snapshot_every = snapshot_every
+        self.retain_versions = retain_versions
+        self._lock = threading.Lock()
+
+    # Storage, implemented by the backends
+    def _entries(self) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def _append(self, entries: List[Dict[str, Any]]):
+        raise NotImplementedError
+
+    def _rewrite(self, entries: List[Dict[str, Any]]):
+        raise NotImplementedError
+
+    # History
+    def latest_version(self) -> int:
+        entries = self._entries()
+        return entries[-1]["version"] if entries else 0
+
+    def versions(self) -> List[int]:
+        return sorted({entry["version"] for entry in self._entries()})
+
+    def record(self, patch: List[Dict[str, Any]], before: Dict[str, Any], after: Dict[str, Any],
+               experience: str = "") -> int:
+        """Append the delta from `before` to `after` and return the new version number."""
+        with self._lock:
+            # A copy: the file backend's _append extends the list _entries() returns
+            entries = list(self._entries())
+            new_entries = []
+            if not entries:
+                new_entries.append({"version": 0, "time": time.time(), "snapshot": before})
+            version = (entries[-1]["version"] if entries else 0) + 1
+            new_entries.append({"version": version, "time": time.time(), "experience": experience[:200],
+                                "patch": patch})
+            if version % self.snapshot_every == 0:
+                new_entries.append({"version": version, "time": time.time(), "snapshot": after})
+            self._append(new_entries)
+
+            if version % self.snapshot_every == 0:
+                self._prune(entries + new_entries, version)
+            return version
+
+    def _prune(self, entries: List[Dict[str, Any]], latest: int):
+        oldest_kept = latest - self.retain_versions
+        snapshots = [entry["version"] for entry in entries if "snapshot" in entry and entry["version"] <= oldest_kept]
+        if not snapshots or snapshots[-1] <= entries[0]["version"]:
+            return
+        start = snapshots[-1]
+        self._rewrite([entry for entry in entries
+                       if entry["version"] > start or (entry["version"] == start and "snapshot" in entry)])
+
+    def profile_at(self, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """The profile as of `version` (default: latest), or None if that version is no longer kept."""
+        entries = self._entries()
+        if not entries:
+            return None
+        version = entries[-1]["version"] if version is None else version
+        base = None
+        for index, entry in enumerate(entries):
+            if "snapshot" in entry and entry["version"] <= version:
+                base = index
+        if base is None:
+            return None
+        profile = copy.deepcopy(entries[base]["snapshot"])
+        for entry in entries[base + 1:]:
+            if entry["version"] > version:
+                break
+            if "patch" in entry:
+                profile = apply_patch(profile, entry["patch"])
+        return profile
+
+
+class ProfileHistoryFile(ProfileHistory):
+    """History kept as one compact JSON entry per line."""
+
+    def __init__(self, file_path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.file_path = file_path
+        self._cache: Optional[List[Dict[str, Any]]] = None
+
+    def _entries(self) -> List[Dict[str, Any]]:
+        if self._cache is None:
+            # A torn line from a crash only loses that entry; the later ones are still replayed
+            self._cache = list(read_jsonl(self.file_path))
+        return self._cache
+
+    def _append(self, entries: List[Dict[str, Any]]):
+        append_jsonl(self.file_path, entries)
+        self._entries().extend(entries)
+
+    def _rewrite(self, entries: List[Dict[str, Any]]):
+        temp_path = f"{self.file_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as history_file:
+            history_file.write("".join(json.dumps(entry, separators=(',', ':'), ensure_ascii=False) + "\n"
+                                       for entry in entries))
+        os.replace(temp_path, self.file_path)
+        self._cache = list(entries)
+
+
+def main():
+    import tempfile
+
+    profile = {"characterInfo": {"name": "Jane Doe", "pastSummary": "A warrior of the north."},
+               "cognitiveModel": {"traits": {"courage": 0.7, "openness": 0.5}, "emotions": {"fear": 0.4}}}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        history = ProfileHistoryFile(os.path.join(temp_dir, "Jane Doe_profile.history.jsonl"), snapshot_every=5,
+                                     retain_versions=10)
+        for step in range(1, 31):
+            before = copy.deepcopy(profile)
+            patch = [{"op": "replace", "path": "/cognitiveModel/traits/courage", "value": round(0.7 + step * 0.01, 2)}]
+            if step == 3:
+                patch.append({"op": "add", "path": "/cognitiveModel/traits/leadership", "value": 0.6})
+            profile = apply_patch(profile, patch)
+            history.record(patch, before, profile, experience=f"Battle number {step}")
+
+        print(f"Latest version: {history.latest_version()}, kept versions: {history.versions()[0]}"
+              f"..{history.versions()[-1]}, history size: {os.path.getsize(history.file_path)} bytes")
+        print(f"Courage at version 22: {history.profile_at(22)['cognitiveModel']['traits']['courage']}")
+        print(f"Version 5 still kept: {history.profile_at(5) is not None}")
+        print(f"Rebuilt latest matches: {history.profile_at() == profile}")
+        print(f"Diff of two versions: {diff_profiles(history.profile_at(25), history.profile_at(27))}")
+
+        # Pruning rewrites the file; reloading it must give back each entry exactly once
+        reloaded = ProfileHistoryFile(history.file_path)
+        lines = [(entry["version"], "snapshot" in entry) for entry in reloaded._entries()]
+        assert len(lines) == len(set(lines)), f"Duplicate history entries after pruning: {lines}"
+        assert reloaded.profile_at() == profile
+        print(f"Reloaded {len(lines)} history entries, no duplicates")
+
+        # A crash in the middle of an append must not hide the versions recorded after it
+        with open(history.file_path, 'a', encoding='utf-8') as history_file:
+            history_file.write('{"version":31,"patch":[{"op"')
+        before = copy.deepcopy(profile)
+        profile = apply_patch(profile, [{"op": "replace", "path": "/characterInfo/pastSummary", "value": "A hero."}])
+        history.record(diff_profiles(before, profile), before, profile, experience="Saved the village")
+        assert ProfileHistoryFile(history.file_path).profile_at() == profile
+        print("Versions after a torn entry are still replayed")
+
+
+if __name__ == "__main__":
+    main()
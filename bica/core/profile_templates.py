@@ -0,0 +1,251 @@
+"""
+BicameralAGI Profile Templates Module
+=====================================
+
+Overview:
+---------
+This module finds the existing character profile whose summary is closest to a new character's summary, so
+BicaProfile can start from it instead of generating the custom response patterns from scratch. Every generated profile
+is indexed by the embedding of its summary. A new summary is embedded once and compared against all of them with one
+matrix product (VectorIndex).
+
+BicaProfile applies a template policy to the nearest match:
+- "reuse": at or above `reuse_threshold`, the template's patterns are copied as they are (no LLM call)
+- "adapt": at or above `adapt_threshold`, the template's patterns are sent with both summaries in one small call
+  that returns a JSON Patch of what differs (one call instead of two full generations)
+- below `adapt_threshold`, or with policy "off", the patterns are generated as before
+
+The index is persisted append-only: the raw float32 vectors are appended to a sidecar file, then one
+{"name", "summary", "dim", "row"} JSON line per profile (see jsonl_log), so adding a profile never rewrites the index.
+Every entry records the sidecar row that holds its vector. A crash between the two writes leaves vector rows that no
+entry points to; they are never read, and the next append starts after them, so entries and vectors cannot drift
+apart. A torn JSON line only loses that entry.
+
+Key Features:
+-------------
+1. Nearest-profile lookup by summary embedding
+2. Append-only persistence (O(1) per new profile)
+3. Batch indexing of existing catalogs from the character files or a BicaCharacterStore
+4. Reuse / adapt thresholds as policy knobs
+
+Usage:
+------
+    index = get_template_index()
+    match = index.nearest("You are Sir Chronos, a knight from the future.")  # ("Sir Tempus", 0.93) or None
+    index.add("Sir Chronos", "You are Sir Chronos, a knight from the future.")
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from bica.core.memory_search import VectorIndex
+from bica.utils.embeddings import BicaEmbedder
+from bica.utils.jsonl_log import append_jsonl, read_jsonl
+
+DEFAULT_INDEX_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../../data/characters/profile_templates.jsonl'))
+
+TEMPLATE_POLICIES = ("off", "adapt", "reuse")
+DEFAULT_REUSE_THRESHOLD = 0.95
+DEFAULT_ADAPT_THRESHOLD = 0.85
+
+
+class BicaProfileTemplateIndex:
+    def __init__(self, file_path: Optional[str] = DEFAULT_INDEX_PATH, embedder: BicaEmbedder = None,
+                 reuse_threshold: float = DEFAULT_REUSE_THRESHOLD, adapt_threshold: float = DEFAULT_ADAPT_THRESHOLD):
+        """:param file_path: Index file (vectors go to <file_path>.f32); None keeps the index in memory only"""
+        self.file_path = file_path
+        self.vector_path = f"{file_path}.f32" if file_path else None
+        self.embedder = embedder if embedder is not None else BicaEmbedder()
+        self.reuse_threshold = reuse_threshold
+        self.adapt_threshold = adapt_threshold
+
+        self._lock = threading.Lock()
+        self._entries: List[Dict[str, Any]] = []
+        self._names: Dict[str, int] = {}
+        self._vectors = VectorIndex()
+        self._load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name: str):
+        return name.casefold() in self._names
+
+    def _load(self):
+        if not self.file_path or not os.path.exists(self.vector_path):
+            return
+        entries = list(read_jsonl(self.file_path))
+        if not entries:
+            return
+        dimension = entries[0]["dim"]
+        vectors = np.fromfile(self.vector_path, dtype=np.float32)
+        vectors = vectors[:len(vectors) // dimension * dimension].reshape(-1, dimension)
+        entries = [entry for entry in entries
+                   if entry["dim"] == dimension and entry.get("row", len(vectors)) < len(vectors)]
+        self._index(entries, vectors[[entry["row"] for entry in entries]])
+
+    def _append_vectors(self, vectors: np.ndarray) -> int:
+        """Append vectors to the sidecar file and return the row of the first one."""
+        row_bytes = vectors.shape[1] * vectors.itemsize
+        with open(self.vector_path, 'ab') as vector_file:
+            vector_file.seek(0, os.SEEK_END)
+            size = vector_file.tell()
+            if size % row_bytes:
+                vector_file.truncate(size - size % row_bytes)  # Drop a row torn by a crash
+            first_row = size // row_bytes
+            vector_file.write(vectors.tobytes())
+        return first_row
+
+    def _index(self, entries: List[Dict[str, Any]], vectors: np.ndarray):
+        start = len(self._entries)
+        for offset, entry in enumerate(entries):
+            self._names[entry["name"].casefold()] = start + offset
+        self._entries.extend(entries)
+        self._vectors.add_batch(list(range(start, start + len(entries))), vectors)
+
+    def add_many(self, profiles: Iterable[Tuple[str, str]]):
+        """Index (name, summary) pairs, embedding them in one batch; names that are already indexed are skipped."""
+        with self._lock:
+            profiles = [(name, summary) for name, summary in dict(profiles).items()
+                        if summary and name.casefold() not in self._names]
+            if not profiles:
+                return
+            vectors = np.atleast_2d(self.embedder.encode([summary for _, summary in profiles])).astype(np.float32)
+            entries = [{"name": name, "summary": summary, "dim": vectors.shape[1]} for name, summary in profiles]
+            if self.file_path:
+                os.makedirs(os.path.dirname(self.file_path) or '.', exist_ok=True)
+                # Vectors first, so an entry only ever points at a row that was written
+                first_row = self._append_vectors(vectors)
+                for offset, entry in enumerate(entries):
+                    entry["row"] = first_row + offset
+                append_jsonl(self.file_path, entries)
+            self._index(entries, vectors)
+
+    def add(self, name: str, summary: str):
+        self.add_many([(name, summary)])
+
+    def nearest(self, summary: str, exclude: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """Name and cosine similarity of the indexed profile closest to `summary`, or None if the index is empty."""
+        if not self._entries:
+            return None
+        hits = self._vectors.search(self.embedder.encode(summary), top_k=2)
+        for row, similarity in hits:
+            name = self._entries[row]["name"]
+            if exclude is None or name.casefold() != exclude.casefold():
+                return name, similarity
+        return None
+
+    def decide(self, summary: str, policy: str = "adapt", exclude: Optional[str] = None
+               ) -> Optional[Tuple[str, str, float]]:
+        """("reuse" or "adapt", template name, similarity) under `policy`, or None to generate from scratch."""
+        if policy not in TEMPLATE_POLICIES:
+            raise ValueError(f"Unknown template policy '{policy}', expected one of {TEMPLATE_POLICIES}")
+        if policy == "off":
+            return None
+        match = self.nearest(summary, exclude=exclude)
+        if match is None:
+            return None
+        name, similarity = match
+        if policy == "reuse" and similarity >= self.reuse_threshold:
+            return "reuse", name, similarity
+        if similarity >= self.adapt_threshold:
+            return "adapt", name, similarity
+        return None
+
+
+def build_template_index(index: BicaProfileTemplateIndex, characters_dir: Optional[str] = None, store=None,
+                         batch_size: int = 256) -> int:
+    """Index existing profiles from the per-character files and/or a BicaCharacterStore; returns how many were added."""
+    before = len(index)
+    batch = []
+
+    def flush():
+        index.add_many(batch)
+        batch.clear()
+
+    if characters_dir and os.path.isdir(characters_dir):
+        for entry in sorted(os.listdir(characters_dir)):
+            profile_path = os.path.join(characters_dir, entry, f"{entry}_profile.json")
+            if entry in index or not os.path.isfile(profile_path):
+                continue
+            with open(profile_path, 'r', encoding='utf-8') as profile_file:
+                summary = json.load(profile_file).get("characterInfo", {}).get("description")
+            batch.append((entry, summary))
+            if len(batch) >= batch_size:
+                flush()
+    if store is not None:
+        offset = 0
+        while True:
+            names = store.list_characters(limit=batch_size, offset=offset)
+            if not names:
+                break
+            offset += len(names)
+            profiles = store.get_profiles([name for name in names if name not in index], sections=["characterInfo"])
+            batch.extend((name, profile["characterInfo"].get("description")) for name, profile in profiles.items())
+            flush()
+    flush()
+    return len(index) - before
+
+
+_default_index: Optional[BicaProfileTemplateIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_template_index() -> BicaProfileTemplateIndex:
+    """The process-wide index used by BicaProfile, loaded on first use."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = BicaProfileTemplateIndex()
+        return _default_index
+
+
+def main():
+    import tempfile
+    import time
+
+    class HashingEmbedder:
+        """Bag-of-words hashing embedder, so the demo runs without downloading a model."""
+        def encode(self, texts):
+            single = isinstance(texts, str)
+            texts = [texts] if single else texts
+            vectors = np.zeros((len(texts), 256), dtype=np.float32)
+            for row, text in enumerate(texts):
+                for word in text.lower().split():
+                    vectors[row, hash(word.strip('.,!?')) % 256] += 1.0
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+            return vectors[0] if single else vectors
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        index_path = os.path.join(temp_dir, "profile_templates.jsonl")
+        index = BicaProfileTemplateIndex(index_path, embedder=HashingEmbedder(), adapt_threshold=0.6)
+        index.add_many([
+            ("Sir Tempus", "You are Sir Tempus, a brave knight who travels through time to protect the realm."),
+            ("Captain Brew", "You are Captain Brew, a cheerful space pirate who collects rare teas."),
+            ("Dr. Root", "You are Dr. Root, a botanist who talks to plants."),
+        ])
+        print(f"Indexed {len(BicaProfileTemplateIndex(index_path, embedder=HashingEmbedder()))} profiles "
+              f"(reloaded from disk)")
+
+        # A crash after the vector was written but before its entry: the orphaned row must not shift later entries
+        with open(index.vector_path, 'ab') as vector_file:
+            vector_file.write(HashingEmbedder().encode("You are Lost, a profile that was never indexed.").tobytes())
+        index.add("Madame Fern", "You are Madame Fern, a fortune teller who reads tea leaves.")
+        reloaded = BicaProfileTemplateIndex(index_path, embedder=HashingEmbedder())
+        print(f"After a torn append: {reloaded.nearest('You are Madame Fern, a fortune teller who reads tea leaves.')}")
+
+        for summary in ["You are Sir Chronos, a brave knight who travels through time to protect the realm.",
+                        "You are Captain Leaf, a cheerful space pirate who collects rare teas.",
+                        "You are Zork, an accountant from Mars."]:
+            start = time.perf_counter()
+            decision = index.decide(summary, policy="reuse")
+            print(f"{summary[:45]}... -> {decision} ({(time.perf_counter() - start) * 1000:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+BicameralAGI Prompt Builder Module
+==================================
+
+Overview:
+---------
+This module lays out the final response call of a conversation turn so that it is small and cache friendly.
+Everything that stays the same from turn to turn (the response instructions, the character definition and the
+character profile) goes first, in a system message that is serialized once per character and reused verbatim,
+so provider-side prompt caching can match it as a prefix. Only the volatile turn data (user input, recent
+conversation, context, memories, destinies) changes, and it follows in a user message. Both parts are serialized
+as compact JSON without indentation.
+
+Usage:
+------
+    builder = BicaPromptBuilder(character_summary, profile)
+    messages = builder.build_messages(user_input="Hi!", recent_conversation=[...], updated_context={...})
+    response = gpt_handler.generate_response({"messages": messages})
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+from bica.core.profile import BicaProfile
+
+RESPONSE_INSTRUCTIONS = (
+    "You are role-playing the character defined below. Stay in character and reply to the user's latest input. "
+    "Use the character profile for personality and communication style, and the turn data that follows for the "
+    "current context, memories and destinies. Respond with the character's reply only."
+)
+
+
+def compact_json(data: Any) -> str:
+    """Serialize without indentation or spaces; memory objects are reduced to their content."""
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=_serialize_object)
+
+
+def _serialize_object(obj: Any) -> Any:
+    if hasattr(obj, 'content'):
+        return obj.content
+    return str(obj)
+
+
+class BicaPromptBuilder:
+    def __init__(self, character_summary: str, profile: BicaProfile):
+        self.character_summary = character_summary
+        self.profile = profile
+        self._static_prefix: Optional[str] = None
+        self._static_key = None
+
+    def _profile_json(self) -> str:
+        return self.profile.get_profile(compact=True)
+
+    def static_prefix(self) -> str:
+        """The system message shared by every turn, rebuilt only when the summary or the profile changes."""
+        key = (self.character_summary, getattr(self.profile, 'version', 0))
+        if self._static_prefix is None or key != self._static_key:
+            self._static_prefix = (
+                f"{RESPONSE_INSTRUCTIONS}\n\n"
+                f"Character definition: {self.character_summary}\n\n"
+                f"Character profile: {self._profile_json()}"
+            )
+            self._static_key = key
+        return self._static_prefix
+
+    def invalidate(self):
+        self._static_prefix = None
+
+    def build_turn_content(self, **turn_data) -> str:
+        """Volatile turn data in a fixed key order, with the user's input last."""
+        user_input = turn_data.pop("user_input", None)
+        ordered = {key: value for key, value in turn_data.items() if value}
+        ordered["user_input"] = user_input
+        return compact_json(ordered)
+
+    def build_messages(self, **turn_data) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self.static_prefix()},
+            {"role": "user", "content": self.build_turn_content(**turn_data)},
+        ]
+
+
+def main():
+    class ExampleProfile:
+        version = 0
+        character_profile = {"characterInfo": {"name": "Tron"}, "cognitiveModel": {"traits": {"courage": 0.9}}}
+
+        def get_profile(self, compact=False):
+            return compact_json(self.character_profile)
+
+    builder = BicaPromptBuilder("You are Tron, a security program.", ExampleProfile())
+    messages = builder.build_messages(
+        user_input="What is your mission?",
+        recent_conversation=[{"user": "Hi", "character": "Greetings, user."}],
+        updated_context={"positive": "The user is curious.", "neutral": "", "negative": ""},
+        relevant_destinies={"title": "Unknown Journey"},
+    )
+    for message in messages:
+        print(f"{message['role']}: {message['content']}\n")
+    print(f"Static prefix reused: {builder.static_prefix() is messages[0]['content']}")
+
+
+if __name__ == "__main__":
+    main()
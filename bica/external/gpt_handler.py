@@ -3,6 +3,7 @@ from typing import List, Dict, Any, Union, Optional
 from openai import OpenAI
 from pydantic import BaseModel, ValidationError
 from bica.utils.utilities import *
+from bica.utils.tracing import tracer
 from typing import Type
 
 
@@ -57,7 +58,8 @@ class GPTHandler:
             params['function_call'] = {"name": "output_json"}
 
         try:
-            response = self.client.chat.completions.create(**params)
+            with tracer.span("gpt.generate_response", model=params["model"]):
+                response = self.client.chat.completions.create(**params)
             return self._process_response(response)
         except Exception as e:
             raise Exception(f"Error generating response: {str(e)}")
@@ -0,0 +1,60 @@
+"""
+BicameralAGI Embeddings Module
+==============================
+
+Overview:
+---------
+This module wraps the sentence-transformer models used across the BicameralAGI system. Models are loaded lazily on
+first use and shared between every component that asks for the same model name, so a character only pays the load
+time once. Embeddings are returned as L2-normalized float32 NumPy arrays so cosine similarity is a plain dot product.
+
+Usage:
+------
+    embedder = BicaEmbedder()
+    vectors = embedder.encode(["first text", "second text"])  # shape (2, 384)
+    scores = vectors @ embedder.encode("query")
+"""
+
+import threading
+from typing import Dict, List, Union
+
+import numpy as np
+
+from bica.utils.tracing import tracer
+
+DEFAULT_EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+
+_models: Dict[str, object] = {}
+_models_lock = threading.Lock()
+
+
+def get_sentence_model(model_name: str = DEFAULT_EMBEDDING_MODEL):
+    """Return the shared SentenceTransformer for `model_name`, loading it on first use."""
+    with _models_lock:
+        if model_name not in _models:
+            from sentence_transformers import SentenceTransformer
+            _models[model_name] = SentenceTransformer(model_name)
+        return _models[model_name]
+
+
+class BicaEmbedder:
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL):
+        self.model_name = model_name
+
+    @property
+    def model(self):
+        return get_sentence_model(self.model_name)
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: Union[str, List[str]]) -> np.ndarray:
+        """Encode one text (returns shape (dim,)) or a list of texts (returns shape (n, dim))."""
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        model = self.model
+        with tracer.span("embedding.encode", model=self.model_name, texts=len(texts)):
+            vectors = model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        return vectors[0] if single else vectors
@@ -0,0 +1,82 @@
+"""
+BicameralAGI JSONL Log Module
+=============================
+
+Overview:
+---------
+This module holds the helpers shared by the append-only JSONL files (character definition cache, custom pattern
+cache, profile history, profile template index): one JSON object per line, appended and never rewritten in place.
+
+A crash can leave a torn line behind. Appends therefore first make sure the file ends with a newline, so the next
+entry always starts on a line of its own instead of being glued onto the torn one. Reading skips any line that does
+not parse and keeps going, so a torn line only ever loses itself.
+
+Usage:
+------
+    append_jsonl("data/characters/pattern_cache.jsonl", [{"key": "...", "patterns": [...]}])
+    for entry in read_jsonl("data/characters/pattern_cache.jsonl"):
+        ...
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator
+
+
+def read_jsonl(file_path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the entries of a JSONL file in order, skipping lines that do not parse; a missing file yields nothing."""
+    if not os.path.exists(file_path):
+        return
+    with open(file_path, 'rb') as log_file:
+        for line_number, line in enumerate(log_file, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:  # JSONDecodeError, or a multi-byte character cut in half
+                print(f"Warning: Skipping unreadable line {line_number} of {file_path}")
+
+
+def _ends_torn(log_file) -> bool:
+    log_file.seek(0, os.SEEK_END)
+    if not log_file.tell():
+        return False
+    log_file.seek(-1, os.SEEK_END)
+    return log_file.read(1) != b'\n'
+
+
+def end_with_newline(file_path: str):
+    """Terminate a torn last line, for writers that keep the file open and append to it themselves."""
+    if not os.path.exists(file_path):
+        return
+    with open(file_path, 'a+b') as log_file:
+        if _ends_torn(log_file):
+            log_file.write(b'\n')
+
+
+def append_jsonl(file_path: str, entries: Iterable[Dict[str, Any]]):
+    """Append entries as compact JSON lines in one write, starting on a fresh line if the file ends in a torn one."""
+    data = "".join(json.dumps(entry, separators=(',', ':'), ensure_ascii=False) + "\n" for entry in entries)
+    if not data:
+        return
+    os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+    with open(file_path, 'a+b') as log_file:
+        if _ends_torn(log_file):
+            data = "\n" + data
+        log_file.write(data.encode('utf-8'))
+
+
+def main():
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_path = os.path.join(temp_dir, "example.jsonl")
+        append_jsonl(log_path, [{"key": "a", "value": 1}])
+        with open(log_path, 'a', encoding='utf-8') as log_file:
+            log_file.write('{"key": "torn", "val')  # A crash in the middle of a write
+        append_jsonl(log_path, [{"key": "b", "value": 2}, {"key": "c", "value": 3}])
+        print(f"Entries after a torn line: {[entry['key'] for entry in read_jsonl(log_path)]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+BicameralAGI Stage Graph Module
+===============================
+
+Overview:
+---------
+This module runs a set of dependent processing stages (for example the steps of BicaCharacter.process_input) as a
+small dependency graph. Every stage starts as soon as all the stages it depends on have finished, stages without a
+dependency between them run concurrently on a thread pool, and each stage can have its own timeout. The latency of
+a run becomes the critical path through the graph rather than the sum of all stages.
+
+Key Features:
+-------------
+1. Stages declare their dependencies by name and receive their results as keyword arguments
+2. Independent stages run concurrently (the stages are mostly waiting on GPT, so threads are enough)
+3. Per-stage timeouts and absolute deadlines, with an optional default result instead of failing the whole run
+4. Per-stage timings of the last run, and a tracing span per stage nested under the caller's span
+
+Usage:
+------
+    graph = BicaStageGraph()
+    graph.add_stage("recall", lambda: memory.get_memories())
+    graph.add_stage("context", lambda recall: update_context(recall), depends_on=["recall"], timeout=30)
+    graph.add_stage("influence", lambda recall: influence(recall), depends_on=["recall"], timeout=10, default={})
+    results = graph.run()
+"""
+
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from bica.utils.tracing import tracer
+
+_NO_DEFAULT = object()
+
+
+class StageTimeoutError(TimeoutError):
+    def __init__(self, stage_name: str, timeout: float):
+        super().__init__(f"Stage '{stage_name}' did not finish within {timeout:.1f}s")
+        self.stage_name = stage_name
+
+
+class Stage:
+    def __init__(self, name: str, func: Callable[..., Any], depends_on: Iterable[str] = (),
+                 timeout: Optional[float] = None, default: Any = _NO_DEFAULT, deadline: Optional[float] = None):
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on)
+        self.timeout = timeout
+        self.default = default
+        self.deadline = deadline
+
+    def expires_at(self, started: float) -> Optional[float]:
+        limits = [limit for limit in (started + self.timeout if self.timeout is not None else None, self.deadline)
+                  if limit is not None]
+        return min(limits) if limits else None
+
+    @property
+    def has_default(self) -> bool:
+        return self.default is not _NO_DEFAULT
+
+
+class BicaStageGraph:
+    def __init__(self, max_workers: int = 4):
+        self.stages: Dict[str, Stage] = {}
+        self.max_workers = max_workers
+        self.timings: Dict[str, float] = {}
+        self.timed_out: List[str] = []
+
+    def add_stage(self, name: str, func: Callable[..., Any], depends_on: Iterable[str] = (),
+                  timeout: Optional[float] = None, default: Any = _NO_DEFAULT,
+                  deadline: Optional[float] = None) -> "BicaStageGraph":
+        """
+        :param func: Called with the results of `depends_on` as keyword arguments
+        :param timeout: Seconds the stage may run, measured from the moment it starts
+        :param default: Result to use when the stage times out or fails; without it the whole run fails
+        :param deadline: Absolute time.perf_counter() value by which the stage must have finished
+        """
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already defined")
+        self.stages[name] = Stage(name, func, depends_on, timeout, default, deadline)
+        return self
+
+    def _validate(self):
+        for stage in self.stages.values():
+            for dependency in stage.depends_on:
+                if dependency not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dependency}'")
+
+        # Kahn's algorithm: every stage must become runnable eventually
+        remaining = {name: set(stage.depends_on) for name, stage in self.stages.items()}
+        while remaining:
+            ready = [name for name, dependencies in remaining.items() if not dependencies]
+            if not ready:
+                raise ValueError(f"Stage graph has a dependency cycle among: {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for dependencies in remaining.values():
+                dependencies.difference_update(ready)
+
+    @staticmethod
+    def _run_stage(stage: Stage, kwargs: Dict[str, Any]) -> Any:
+        with tracer.span(f"stage.{stage.name}"):
+            return stage.func(**kwargs)
+
+    def _finish(self, stage: Stage, results: Dict[str, Any], result: Any, started: float):
+        results[stage.name] = result
+        self.timings[stage.name] = time.perf_counter() - started
+
+    def run(self) -> Dict[str, Any]:
+        """Run every stage once and return their results keyed by stage name."""
+        self._validate()
+        self.timings = {}
+        self.timed_out = []
+        results: Dict[str, Any] = {}
+        pending = dict(self.stages)
+        running: Dict[Future, Stage] = {}
+        started_at: Dict[str, float] = {}
+
+        # Threads of timed-out stages are abandoned rather than joined, so the pool is not used as a context manager
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bica-stage")
+        try:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if all(dependency in results for dependency in stage.depends_on):
+                        kwargs = {dependency: results[dependency] for dependency in stage.depends_on}
+                        started_at[name] = time.perf_counter()
+                        # Each stage runs in a copy of the caller's context so its span nests under the caller's
+                        context = contextvars.copy_context()
+                        running[executor.submit(context.run, self._run_stage, stage, kwargs)] = stage
+                        del pending[name]
+
+                now = time.perf_counter()
+                expiries = [s.expires_at(started_at[s.name]) for s in running.values()]
+                deadlines = [expiry - now for expiry in expiries if expiry is not None]
+                done, _ = wait(running, timeout=max(0.0, min(deadlines)) if deadlines else None,
+                               return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception:
+                        if not stage.has_default:
+                            raise
+                        result = stage.default
+                    self._finish(stage, results, result, started_at[stage.name])
+
+                now = time.perf_counter()
+                for future, stage in list(running.items()):
+                    expiry = stage.expires_at(started_at[stage.name])
+                    if expiry is not None and now >= expiry:
+                        if not stage.has_default:
+                            raise StageTimeoutError(stage.name, expiry - started_at[stage.name])
+                        del running[future]
+                        future.cancel()
+                        self.timed_out.append(stage.name)
+                        self._finish(stage, results, stage.default, started_at[stage.name])
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results
+
+
+def main():
+    def slow(name, seconds, result=None):
+        def run(**dependencies):
+            time.sleep(seconds)
+            print(f"  {name} finished (inputs: {sorted(dependencies)})")
+            return result if result is not None else name
+        return run
+
+    graph = BicaStageGraph()
+    graph.add_stage("recall", slow("recall", 0.2))
+    graph.add_stage("context", slow("context", 0.5), depends_on=["recall"])
+    graph.add_stage("destiny_influence", slow("destiny_influence", 0.4), depends_on=["recall"])
+    graph.add_stage("destiny", slow("destiny", 0.3), depends_on=["recall"])
+    graph.add_stage("slow_optional", slow("slow_optional", 5.0), depends_on=["recall"], timeout=0.3, default={})
+    graph.add_stage("respond", slow("respond", 0.2),
+                    depends_on=["context", "destiny_influence", "destiny", "slow_optional"])
+
+    start = time.perf_counter()
+    results = graph.run()
+    print(f"Ran in {time.perf_counter() - start:.2f}s (sequential: 6.6s, critical path: 0.9s)")
+    print(f"Timed out: {graph.timed_out}")
+    print(f"Timings: { {name: round(seconds, 2) for name, seconds in graph.timings.items()} }")
+    print(f"Respond result: {results['respond']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+BicameralAGI Tracing Module
+===========================
+
+Overview:
+---------
+This module records lightweight timing spans for everything a conversation turn does: the stages of
+BicaCharacter.process_input, every GPTHandler call and every embedding call. Spans nest automatically (also across the
+thread pool of the stage graph and the background work queue, because the current span is kept in a context
+variable), finished spans go into a rolling in-memory ring buffer that can be queried, and the buffer can be exported
+as Chrome trace-event JSON (open it in chrome://tracing or https://ui.perfetto.dev).
+
+Tracing is off unless the BICA_TRACING environment variable is "true" or `tracer.enable()` is called. While disabled,
+`tracer.span(...)` returns one shared no-op context manager, so instrumented code pays a single attribute check.
+
+Usage:
+------
+    from bica.utils.tracing import tracer
+
+    tracer.enable()
+    with tracer.span("respond", character="Aria"):
+        ...
+    print(tracer.summary())
+    tracer.export_chrome_trace("turn_trace.json")
+"""
+
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("bica_current_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "trace_id", "start_ns", "end_ns", "thread_id", "attributes", "_token")
+
+    def __init__(self, name: str, span_id: int, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent.span_id if parent is not None else None
+        self.trace_id = parent.trace_id if parent is not None else span_id
+        self.start_ns = 0
+        self.end_ns = 0
+        self.thread_id = threading.get_ident()
+        self.attributes = attributes
+        self._token = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "trace_id": self.trace_id,
+            "start_ns": self.start_ns,
+            "duration_ms": self.duration_ms,
+            "thread_id": self.thread_id,
+            "attributes": self.attributes,
+        }
+
+
+class _SpanContext:
+    def __init__(self, tracer: "BicaTracer", name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.span = Span(name, next(tracer._ids), _current_span.get(), attributes)
+
+    def __enter__(self) -> Span:
+        self.span._token = _current_span.set(self.span)
+        self.span.start_ns = time.perf_counter_ns()
+        return self.span
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.span.end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.span.attributes["error"] = f"{exc_type.__name__}: {exc_value}"
+        _current_span.reset(self.span._token)
+        self.tracer._buffer.append(self.span)
+        return False
+
+
+class _NoOpSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoOpSpan()
+
+
+class BicaTracer:
+    def __init__(self, enabled: bool = False, buffer_size: int = 10000):
+        self.enabled = enabled
+        self._buffer: deque = deque(maxlen=buffer_size)
+        self._ids = itertools.count(1)
+        self._epoch_ns = time.perf_counter_ns()
+
+    def enable(self, buffer_size: Optional[int] = None):
+        if buffer_size is not None and buffer_size != self._buffer.maxlen:
+            self._buffer = deque(self._buffer, maxlen=buffer_size)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        self._buffer.clear()
+
+    def span(self, name: str, **attributes):
+        """Context manager timing the enclosed block as a child of the current span."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _SpanContext(self, name, attributes)
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get() if self.enabled else None
+
+    # Querying the ring buffer
+    def spans(self, name: Optional[str] = None, trace_id: Optional[int] = None,
+              since_ns: Optional[int] = None) -> List[Span]:
+        return [span for span in list(self._buffer)
+                if (name is None or span.name == name)
+                and (trace_id is None or span.trace_id == trace_id)
+                and (since_ns is None or span.start_ns >= since_ns)]
+
+    def summary(self, spans: Optional[List[Span]] = None) -> Dict[str, Dict[str, float]]:
+        """Count and p50/p95/max duration in milliseconds per span name."""
+        durations: Dict[str, List[float]] = {}
+        for span in self.spans() if spans is None else spans:
+            durations.setdefault(span.name, []).append(span.duration_ms)
+        return {
+            name: {
+                "count": len(values),
+                "p50_ms": float(np.percentile(values, 50)),
+                "p95_ms": float(np.percentile(values, 95)),
+                "max_ms": float(max(values)),
+            }
+            for name, values in durations.items()
+        }
+
+    # Export
+    def to_chrome_trace(self, spans: Optional[List[Span]] = None) -> Dict[str, Any]:
+        pid = os.getpid()
+        events = []
+        for span in self.spans() if spans is None else spans:
+            events.append({
+                "name": span.name,
+                "cat": span.name.split(".")[0],
+                "ph": "X",
+                "ts": (span.start_ns - self._epoch_ns) / 1000,
+                "dur": (span.end_ns - span.start_ns) / 1000,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": {**span.attributes, "span_id": span.span_id, "parent_id": span.parent_id,
+                         "trace_id": span.trace_id},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, file_path: str, spans: Optional[List[Span]] = None):
+        with open(file_path, 'w') as trace_file:
+            json.dump(self.to_chrome_trace(spans), trace_file, default=str)
+
+
+tracer = BicaTracer(enabled=os.getenv('BICA_TRACING', 'False').lower() == 'true')
+
+
+def main():
+    print("===== BicaTracer Test =====")
+    iterations = 100000
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with tracer.span("noop"):
+            pass
+    print(f"Disabled span overhead: {(time.perf_counter() - start) / iterations * 1e9:.0f} ns")
+
+    tracer.enable()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with tracer.span("noop"):
+            pass
+    print(f"Enabled span overhead: {(time.perf_counter() - start) / iterations * 1e9:.0f} ns")
+    tracer.clear()
+
+    with tracer.span("turn", user_input="hello"):
+        with tracer.span("stage.context"):
+            with tracer.span("gpt.generate_response", model="test"):
+                time.sleep(0.01)
+        with tracer.span("stage.respond"):
+            time.sleep(0.005)
+
+    for span in tracer.spans():
+        print(f"  {span.name:24s} parent={span.parent_id} {span.duration_ms:.2f} ms")
+    print(json.dumps(tracer.summary(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
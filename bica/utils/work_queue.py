@@ -0,0 +1,105 @@
+"""
+BicameralAGI Background Work Queue Module
+=========================================
+
+Overview:
+---------
+This module provides a per-character queue for bookkeeping work that does not need to finish before the user sees a
+reply, such as storing a new memory (including its GPT importance rating). Tasks run in submission order on a single
+worker thread while the user is reading the response. Each task is submitted under a key, and the next turn only
+waits for the keys it actually reads from.
+
+Usage:
+------
+    queue = BicaWorkQueue("Aria")
+    queue.submit("memory", memory.update_memories, compiled_data)
+    ...
+    queue.wait_for(["memory"])  # before the next turn recalls memories
+    queue.close()
+"""
+
+import contextvars
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from bica.utils.bica_logging import BicaLogging
+from bica.utils.tracing import tracer
+
+# One logger for all queues: BicaLogging adds a file handler per instance
+logger = BicaLogging("BicaWorkQueue")
+
+
+class BicaWorkQueue:
+    def __init__(self, name: str = "character"):
+        self.name = name
+        self._tasks: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._latest: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name=f"bica-background-{name}", daemon=True)
+        self._worker.start()
+
+    def submit(self, key: str, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queue `func(*args, **kwargs)` under `key` and return a future for its result."""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"Work queue for {self.name} is closed")
+            self._latest[key] = future
+        # Keep the submitter's context so the task's span nests under the turn that queued it
+        self._tasks.put((key, future, contextvars.copy_context(), func, args, kwargs))
+        return future
+
+    def _run(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            key, future, context, func, args, kwargs = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(context.run(self._execute, key, func, args, kwargs))
+            except Exception as e:
+                logger.error(f"Background task '{key}' for {self.name} failed: {str(e)}", exc_info=True)
+                future.set_exception(e)
+
+    @staticmethod
+    def _execute(key: str, func: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        with tracer.span(f"background.{key}"):
+            return func(*args, **kwargs)
+
+    def pending(self) -> List[str]:
+        with self._lock:
+            return [key for key, future in self._latest.items() if not future.done()]
+
+    def wait_for(self, keys: Iterable[str], timeout: Optional[float] = None):
+        """
+        Block until the most recent task of every key in `keys` has finished. Failures of those tasks are logged by
+        the worker and not raised here, so a failed bookkeeping step never breaks the next turn.
+        """
+        with self._lock:
+            futures = [self._latest[key] for key in keys if key in self._latest]
+        for future in futures:
+            try:
+                future.result(timeout=timeout)
+            except FutureTimeoutError:
+                raise
+            except Exception:
+                pass
+
+    def drain(self, timeout: Optional[float] = None):
+        """Block until every task submitted so far has finished."""
+        with self._lock:
+            keys = list(self._latest)
+        self.wait_for(keys, timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._tasks.put(None)
+        self._worker.join(timeout)
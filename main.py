@@ -107,6 +107,7 @@ def main():
     logger.info(f"Character initialized: {character.get_character_definition()}")
     print(f"{Fore.CYAN}Character Summary: {character.get_character_definition()}{Style.RESET_ALL}")
     conversation_loop(character)
+    character.shutdown()
 
     logger.info("BicameralAGI session ended")
     print(f"{Fore.YELLOW}Thank you for interacting with BicameralAGI. Goodbye!{Style.RESET_ALL}")
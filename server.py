@@ -0,0 +1,329 @@
+"""
+BicameralAGI Session Server
+===========================
+
+Overview:
+---------
+This module is a multi-session HTTP entry point for the BicameralAGI system. It serves many concurrent
+conversations from one asyncio process instead of one blocking `input()` loop per conversation. Every session maps to
+its own BicaCharacter. Only the most recently used characters stay in memory; when there are more than `max_live`,
+the least recently used idle character is spilled to disk (BicaCharacter.export_state) and restored on its next
+message (BicaCharacter.from_state). Turns run on a bounded thread pool because the character pipeline is blocking,
+and the turns of a single session are serialized.
+
+Endpoints:
+----------
+    POST   /sessions                  {"description": "..."}  -> {"session_id", "character_name", "character_summary"}
+    POST   /sessions/<id>/messages    {"message": "..."}      -> {"response": "..."}
+    GET    /sessions/<id>                                     -> {"character_name", "recent_conversation"}
+    DELETE /sessions/<id>
+    GET    /health                                            -> session counts
+
+Usage:
+------
+    $ python server.py --port 8080 --max-live 200
+
+    $ curl -X POST localhost:8080/sessions -d '{"description": "A brave knight from the future."}'
+    $ curl -X POST localhost:8080/sessions/<id>/messages -d '{"message": "What is your mission?"}'
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from bica.core.character import BicaCharacter
+from bica.utils.bica_logging import BicaLogging
+
+logger = BicaLogging("SessionServer")
+
+DEFAULT_SPILL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'sessions')
+SESSION_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+MAX_BODY_BYTES = 1024 * 1024
+
+HTTP_REASONS = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+                405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class SessionNotFoundError(KeyError):
+    pass
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class BicaSessionManager:
+    def __init__(self, spill_dir: str = DEFAULT_SPILL_DIR, max_live: int = 64, max_workers: int = 32,
+                 debug_mode: bool = False, character_class=BicaCharacter):
+        """
+        :param max_live: Characters kept in memory; idle ones beyond this are spilled to `spill_dir`
+        :param max_workers: Threads running character construction, turns and spills
+        """
+        self.spill_dir = spill_dir
+        self.max_live = max_live
+        self.debug_mode = debug_mode
+        self.character_class = character_class
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bica-session")
+        self._live: "OrderedDict[str, Any]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._spilling = set()
+        os.makedirs(self.spill_dir, exist_ok=True)
+
+    # Helpers
+    def _spill_path(self, session_id: str) -> str:
+        return os.path.join(self.spill_dir, f"{session_id}.json")
+
+    def _lock(self, session_id: str) -> asyncio.Lock:
+        if not SESSION_ID_PATTERN.match(session_id):
+            raise SessionNotFoundError(session_id)
+        return self._locks.setdefault(session_id, asyncio.Lock())
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def _write_spill(self, session_id: str, character) -> None:
+        state = character.export_state()
+        temp_path = self._spill_path(session_id) + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as spill_file:
+            json.dump(state, spill_file, separators=(',', ':'), ensure_ascii=False)
+        os.replace(temp_path, self._spill_path(session_id))
+        character.shutdown()
+
+    def _read_spill(self, session_id: str):
+        with open(self._spill_path(session_id), 'r', encoding='utf-8') as spill_file:
+            state = json.load(spill_file)
+        return self.character_class.from_state(state, debug_mode=self.debug_mode)
+
+    async def _checkout(self, session_id: str):
+        """Return the live character for a session, restoring it from disk if needed. Caller holds the lock."""
+        character = self._live.get(session_id)
+        if character is not None:
+            self._live.move_to_end(session_id)
+            return character
+        if not os.path.exists(self._spill_path(session_id)):
+            self._locks.pop(session_id, None)
+            raise SessionNotFoundError(session_id)
+        character = await self._run(self._read_spill, session_id)
+        self._live[session_id] = character
+        logger.info(f"Restored session {session_id} from disk")
+        return character
+
+    async def _evict_idle(self):
+        while len(self._live) - len(self._spilling) > self.max_live:
+            victim = next((session_id for session_id in self._live
+                           if session_id not in self._spilling and not self._locks[session_id].locked()), None)
+            if victim is None:
+                return  # Every live character is busy; try again after the next turn
+            self._spilling.add(victim)
+            try:
+                async with self._locks[victim]:
+                    await self._run(self._write_spill, victim, self._live[victim])
+                    del self._live[victim]
+                    logger.info(f"Spilled idle session {victim} to disk")
+            finally:
+                self._spilling.discard(victim)
+
+    # Session operations
+    async def create_session(self, description: str) -> Tuple[str, Any]:
+        session_id = uuid.uuid4().hex
+        async with self._lock(session_id):
+            character = await self._run(self.character_class, description, self.debug_mode)
+            self._live[session_id] = character
+        await self._evict_idle()
+        return session_id, character
+
+    async def send_message(self, session_id: str, message: str) -> str:
+        async with self._lock(session_id):
+            character = await self._checkout(session_id)
+            response = await self._run(character.process_input, message)
+        await self._evict_idle()
+        return response
+
+    async def describe_session(self, session_id: str) -> Dict[str, Any]:
+        async with self._lock(session_id):
+            character = await self._checkout(session_id)
+            description = {"character_name": character.character_name,
+                           "recent_conversation": character.get_recent_conversation()}
+        await self._evict_idle()
+        return description
+
+    async def delete_session(self, session_id: str):
+        async with self._lock(session_id):
+            character = self._live.pop(session_id, None)
+            spilled = os.path.exists(self._spill_path(session_id))
+            if character is None and not spilled:
+                raise SessionNotFoundError(session_id)
+            if character is not None:
+                await self._run(character.shutdown)
+            if spilled:
+                os.remove(self._spill_path(session_id))
+        self._locks.pop(session_id, None)
+
+    async def close(self):
+        """Spill every live session so the next server process can pick them up."""
+        for session_id in list(self._live):
+            async with self._lock(session_id):
+                await self._run(self._write_spill, session_id, self._live.pop(session_id))
+        self.executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, int]:
+        on_disk = {name[:-len('.json')] for name in os.listdir(self.spill_dir) if name.endswith('.json')}
+        return {"live_sessions": len(self._live), "max_live": self.max_live,
+                "spilled_sessions": len(on_disk - set(self._live))}
+
+
+class BicaSessionServer:
+    def __init__(self, manager: BicaSessionManager, host: str = "127.0.0.1", port: int = 8080):
+        self.manager = manager
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Session server listening on {self.host}:{self.port}")
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.manager.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, path, _ = request_line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            raise HttpError(400, "Malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        content_length = headers.get('content-length') or '0'
+        if not (content_length.isascii() and content_length.isdigit()):
+            raise HttpError(400, "Invalid Content-Length")
+        length = int(content_length)
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), path.split('?', 1)[0].rstrip('/') or '/', headers, body
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, Optional[Dict[str, Any]]]:
+        payload = {}
+        if body:
+            try:
+                payload = json.loads(body)
+            except json.JSONDecodeError:
+                raise HttpError(400, "Body must be JSON")
+
+        parts = path.strip('/').split('/')
+        if path == '/health' and method == 'GET':
+            return 200, {"status": "ok", **self.manager.stats()}
+        if path == '/sessions' and method == 'POST':
+            description = payload.get("description")
+            if not description:
+                raise HttpError(400, "'description' is required")
+            session_id, character = await self.manager.create_session(description)
+            return 201, {"session_id": session_id, "character_name": character.character_name,
+                         "character_summary": character.character_summary}
+        if len(parts) == 2 and parts[0] == 'sessions':
+            if method == 'GET':
+                return 200, await self.manager.describe_session(parts[1])
+            if method == 'DELETE':
+                await self.manager.delete_session(parts[1])
+                return 204, None
+            raise HttpError(405, f"{method} is not allowed on {path}")
+        if len(parts) == 3 and parts[0] == 'sessions' and parts[2] == 'messages' and method == 'POST':
+            message = payload.get("message")
+            if not message:
+                raise HttpError(400, "'message' is required")
+            return 200, {"response": await self.manager.send_message(parts[1], message)}
+        raise HttpError(404, f"No route for {method} {path}")
+
+    @staticmethod
+    async def _write_response(writer: asyncio.StreamWriter, status: int, payload: Optional[Dict[str, Any]],
+                              keep_alive: bool):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else b''
+        head = (f"HTTP/1.1 {status} {HTTP_REASONS.get(status, 'Unknown')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    keep_alive = headers.get('connection', '').lower() != 'close'
+                    status, payload = await self._route(method, path, body)
+                except HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except SessionNotFoundError as e:
+                    status, payload = 404, {"error": f"Unknown session {e.args[0]}"}
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as e:
+                    logger.error(f"Error handling request: {str(e)}")
+                    status, payload = 500, {"error": "Internal server error"}
+                await self._write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+
+async def serve(args):
+    manager = BicaSessionManager(spill_dir=args.spill_dir, max_live=args.max_live, max_workers=args.workers,
+                                 debug_mode=args.debug)
+    server = BicaSessionServer(manager, host=args.host, port=args.port)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve many BicameralAGI character sessions over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-live", type=int, default=64, help="Characters kept in memory before spilling to disk")
+    parser.add_argument("--workers", type=int, default=32, help="Threads running character turns")
+    parser.add_argument("--spill-dir", default=DEFAULT_SPILL_DIR)
+    parser.add_argument("--debug", action="store_true", default=os.getenv('DEBUG_MODE', 'False').lower() == 'true')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("Session server stopped; live sessions were spilled to disk.")
+
+
+if __name__ == "__main__":
+    main()